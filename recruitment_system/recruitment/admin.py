@@ -1,7 +1,18 @@
 
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Candidate
+from .models import Application, Candidate, CandidateSkill, EmailCampaign, EmailDelivery, ExtractionCacheEntry, GeminiRateState, Job, ScreeningBatch, ScreeningTask, Skill
+
+class CandidateSkillInline(admin.TabularInline):
+    model = CandidateSkill
+    extra = 0
+    raw_id_fields = ['skill']
+
+class ApplicationInline(admin.TabularInline):
+    model = Application
+    extra = 0
+    fields = ['job', 'match_score', 'batch', 'updated_at']
+    readonly_fields = fields
 
 @admin.register(Candidate)
 class CandidateAdmin(admin.ModelAdmin):
@@ -9,6 +20,7 @@ class CandidateAdmin(admin.ModelAdmin):
     readonly_fields = ['match_score','cv_file']
     list_filter = ['job_title']
     search_fields = ['name', 'email']
+    inlines = [CandidateSkillInline, ApplicationInline]
 
     def cv_download_link(self, obj):
         """Provide a download link for the CV file."""
@@ -17,3 +29,57 @@ class CandidateAdmin(admin.ModelAdmin):
         return 'No CV file'
     cv_download_link.short_description = 'CV File'
 
+
+class ScreeningTaskInline(admin.TabularInline):
+    model = ScreeningTask
+    extra = 0
+    fields = ['file_name', 'status', 'attempts', 'deferrals', 'error', 'candidate']
+    readonly_fields = fields
+
+@admin.register(ScreeningBatch)
+class ScreeningBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job_title', 'job', 'status', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['jd_file', 'jd_data', 'started_at', 'finished_at']
+    inlines = [ScreeningTaskInline]
+
+@admin.register(ExtractionCacheEntry)
+class ExtractionCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ['content_hash', 'kind', 'prompt_version', 'model_name', 'size_bytes', 'hits', 'last_accessed_at']
+    list_filter = ['kind', 'prompt_version', 'model_name']
+    search_fields = ['content_hash']
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['title', 'jd_hash', 'created_at', 'updated_at']
+    search_fields = ['title', 'jd_hash']
+
+@admin.register(Application)
+class ApplicationAdmin(admin.ModelAdmin):
+    list_display = ['candidate', 'job', 'match_score', 'batch', 'updated_at']
+    list_filter = ['job']
+    search_fields = ['candidate__name', 'candidate__email', 'job__title']
+    raw_id_fields = ['candidate', 'batch']
+
+class EmailDeliveryInline(admin.TabularInline):
+    model = EmailDelivery
+    extra = 0
+    fields = ['email', 'name', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'error']
+    readonly_fields = fields
+
+@admin.register(EmailCampaign)
+class EmailCampaignAdmin(admin.ModelAdmin):
+    list_display = ['id', 'subject', 'batch', 'status', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['batch', 'finished_at']
+    inlines = [EmailDeliveryInline]
+
+@admin.register(GeminiRateState)
+class GeminiRateStateAdmin(admin.ModelAdmin):
+    list_display = ['key', 'rate', 'blocked_until', 'decreased_at', 'updated_at']
+    readonly_fields = ['workers', 'updated_at']
@@ -0,0 +1,114 @@
+import logging
+import os
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from .models import Application, Candidate, ScreeningBatch, ScreeningTask
+from .screening import (
+    APPLICATION_UPSERT, CANDIDATE_UPSERT, TASK_COMPLETION_FIELDS, application_rows, complete_task, defer_tasks,
+    fail_batch, finalize_batch, get_job, latest_candidates, record_batch_metrics, release_batch, save_fingerprints,
+    save_scored, score_task, sync_candidate_skills,
+)
+from .semantic_index import index_candidates
+from .utils import QuotaExceededError, extract_cvs_async, summarize_jd_async
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+async def save_candidates_async(entries):
+    """save_candidates on the async ORM: one upsert, then one query for the primary keys."""
+    latest = latest_candidates(entries)
+    await Candidate.objects.abulk_create(list(latest.values()), **CANDIDATE_UPSERT)
+    ids = {email: pk async for email, pk in Candidate.objects.filter(email__in=latest).values_list('email', 'id')}
+    for email, candidate in latest.items():
+        candidate.pk = ids[email]
+    logger.info(f"Saved {len(latest)} candidate(s)")
+    return [latest[cv_data.get('email')] for cv_data, _, _, _ in entries]
+
+async def complete_tasks_async(batch, scored):
+    """complete_tasks on the async ORM.
+
+    Django has no async transactions, so the statements commit one by one; each is an idempotent
+    upsert, so a request that dies part way is safely redone when the worker picks the tasks up.
+    """
+    finished_at = timezone.now()
+    with metrics.timer('candidate_save_seconds'):
+        candidates = await save_candidates_async([(cv_data, score, batch.job_title, task.cv_file) for task, cv_data, score in scored])
+        await sync_to_async(sync_candidate_skills)([(candidate, cv_data) for candidate, (_, cv_data, _) in zip(candidates, scored)])
+        await Application.objects.abulk_create(
+            application_rows(batch, [(candidate, score) for candidate, (_, _, score) in zip(candidates, scored)]), **APPLICATION_UPSERT,
+        )
+        tasks = [complete_task(task, candidate, cv_data, score, finished_at) for candidate, (task, cv_data, score) in zip(candidates, scored)]
+        await ScreeningTask.objects.abulk_update(tasks, TASK_COMPLETION_FIELDS)
+
+async def summarize_batch_jd_async(batch):
+    """process_batch_jd for a claimed batch; return True once its CVs can be screened."""
+    try:
+        jd_result = await summarize_jd_async(os.path.join(settings.MEDIA_ROOT, batch.jd_file))
+    except QuotaExceededError as e:
+        logger.warning(f"Gemini quota exhausted summarizing JD of batch {batch.pk}: {str(e)}")
+        await sync_to_async(release_batch)(batch)
+        return False
+    if not jd_result or not jd_result.get('summary'):
+        logger.warning(f"Empty JD summary for batch {batch.pk}")
+        await sync_to_async(fail_batch)(batch, 'Failed to process job description.')
+        return False
+    batch.jd_data = jd_result
+    batch.job_title = jd_result.get('job_title', 'Unknown')
+    batch.job = await sync_to_async(get_job)(batch.job_title, jd_result)
+    batch.status = ScreeningBatch.STATUS_PROCESSING
+    await batch.asave(update_fields=['jd_data', 'job_title', 'job', 'status'])
+    logger.info(f"Summarized JD for batch {batch.pk}: {batch.job_title}")
+    return True
+
+def _score_tasks(tasks, extracted):
+    scored, deferred = [], []
+    for task, cv_data in zip(tasks, extracted):
+        if cv_data is None:
+            deferred.append(task)
+            continue
+        match_score = score_task(task, cv_data)
+        if match_score is not None:
+            scored.append((task, cv_data, match_score))
+    return scored, deferred
+
+async def screen_batch_async(batch):
+    """Screen a batch created with create_batch(claimed=True) inside the current request.
+
+    The JD and every CV go to Gemini through the async client, CVs concurrently (at most
+    GEMINI_MAX_CONCURRENCY at a time), so the request holds no thread while it waits. Work that
+    runs out of Gemini quota is handed to the queue worker instead of failing. Stage metrics are
+    added to the batch like the worker does.
+    """
+    before = metrics.totals()
+    if not await summarize_batch_jd_async(batch):
+        await sync_to_async(record_batch_metrics)({batch.pk: metrics.delta(before, metrics.totals())})
+        return
+    tasks = [task async for task in batch.tasks.filter(status=ScreeningTask.STATUS_RUNNING)]
+    for task in tasks:
+        task.batch = batch
+    entries = [(os.path.join(settings.MEDIA_ROOT, task.cv_file), task.content_hash, task.cv_text or None) for task in tasks]
+    fingerprints = [None] * len(tasks)
+    extracted = await extract_cvs_async(entries, fingerprints=fingerprints)
+    done = [task.pk for task, cv_data in zip(tasks, extracted) if cv_data]
+    if done:
+        await ScreeningTask.objects.filter(pk__in=done).aupdate(stage=ScreeningTask.STAGE_EXTRACTED)
+    scored, deferred = await sync_to_async(_score_tasks)(tasks, extracted)
+    if scored:
+        try:
+            await complete_tasks_async(batch, scored)
+        except Exception as e:
+            logger.error(f"Async save of {len(scored)} CV(s) failed, retrying in a transaction: {str(e)}")
+            await sync_to_async(save_scored)(scored)
+    if deferred:
+        await sync_to_async(defer_tasks)(deferred)
+    await sync_to_async(save_fingerprints)(tasks, fingerprints)
+    indexed = [(task.candidate_id, cv_data) for task, cv_data, _ in scored if task.status == ScreeningTask.STATUS_DONE]
+    if settings.SEMANTIC_SCORING_ENABLED and indexed:
+        try:
+            await sync_to_async(index_candidates)(indexed)
+        except Exception as e:
+            logger.error(f"Error updating semantic index: {str(e)}")
+    # Recorded before finalizing, which logs the batch's stage summary
+    await sync_to_async(record_batch_metrics)({batch.pk: metrics.delta(before, metrics.totals())})
+    await sync_to_async(finalize_batch)(batch)
@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` acquisitions per `period` seconds with bursts up to `capacity`."""
+
+    def __init__(self, rate, period=60.0, capacity=None):
+        self.rate = float(rate)
+        self.period = float(period)
+        self.capacity = float(capacity if capacity is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate / self.period)
+        self._updated = now
+
+    def reserve(self, tokens=1.0):
+        """Take `tokens` if they are available and return 0, otherwise return the seconds until they will be."""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) * self.period / self.rate
+
+    def acquire(self, tokens=1.0, timeout=None):
+        """Block until `tokens` are available; return False if `timeout` seconds pass first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.reserve(tokens)
+            if not wait:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            logger.debug(f"Rate limiter waiting {wait:.2f}s for a Gemini request slot")
+            time.sleep(wait)
+
+    def drain(self):
+        """Discard any saved-up burst so the next acquisition waits a full interval."""
+        with self._lock:
+            self._updated = time.monotonic()
+            self._tokens = min(self._tokens, 0.0)
+
+def map_bounded(func, items, max_workers=None):
+    """Apply `func` to every item on a bounded thread pool and return results in input order.
+
+    Each entry of the returned list is a `(result, error)` tuple so one failing item never
+    discards the results of the others.
+    """
+    items = list(items)
+    max_workers = settings.GEMINI_MAX_CONCURRENCY if max_workers is None else max_workers
+    if not items:
+        return []
+
+    def run(item):
+        try:
+            return func(item), None
+        except Exception as e:
+            return None, e
+
+    def run_in_pool(item):
+        try:
+            return run(item)
+        finally:
+            # Pool threads open their own database connections; don't leak them
+            connections.close_all()
+
+    if max_workers <= 1 or len(items) == 1:
+        return [run(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix='cv-extract') as executor:
+        return list(executor.map(run_in_pool, items))
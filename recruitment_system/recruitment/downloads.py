@@ -0,0 +1,167 @@
+import logging
+import os
+import re
+import zipfile
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, content_disposition_header
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+CV_DIRECTORY = 'cvs'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+OFFLOAD_X_SENDFILE = 'x-sendfile'
+OFFLOAD_X_ACCEL_REDIRECT = 'x-accel-redirect'
+
+def resolve_cv_path(relative_path):
+    """Return the absolute path of a stored CV, or None if it escapes the CV directory or does not exist."""
+    root = os.path.realpath(os.path.join(settings.MEDIA_ROOT, CV_DIRECTORY))
+    path = os.path.realpath(os.path.join(settings.MEDIA_ROOT, relative_path))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
+
+def _etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+def _parse_range(header, size):
+    """Return (start, end) inclusive for a single byte range, None to ignore it, or False if unsatisfiable."""
+    match = RANGE_RE.match(header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        # Multiple or malformed ranges: serve the whole file, which RFC 9110 allows
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+def _offload_response(path):
+    response = HttpResponse()
+    if settings.CV_DOWNLOAD_OFFLOAD == OFFLOAD_X_SENDFILE:
+        response['X-Sendfile'] = path
+    else:
+        relative_path = os.path.relpath(path, os.path.realpath(settings.MEDIA_ROOT)).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = settings.CV_DOWNLOAD_ACCEL_PREFIX.rstrip('/') + '/' + relative_path
+    # Let the proxy fill in the type and length of the file it serves
+    del response['Content-Type']
+    return response
+
+def file_response(request, path, content_type='application/pdf'):
+    """Stream a stored file as an attachment with ETag, Last-Modified and single byte-range support.
+
+    With CV_DOWNLOAD_OFFLOAD set, the body (and range handling) is left to the front proxy via
+    X-Sendfile or X-Accel-Redirect.
+    """
+    stat = os.stat(path)
+    etag = _etag(stat)
+    last_modified = int(stat.st_mtime)
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        return conditional
+
+    filename = os.path.basename(path)
+    size = stat.st_size
+    if settings.CV_DOWNLOAD_OFFLOAD:
+        response = _offload_response(path)
+    else:
+        byte_range = None
+        if request.META.get('HTTP_RANGE') and _if_range_matches(request, etag, last_modified):
+            byte_range = _parse_range(request.META['HTTP_RANGE'], size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+class _ZipStream:
+    """Write-only, unseekable file object that hands written bytes to a streaming response."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def _archive_name(row, used):
+    stem = re.sub(r'[^A-Za-z0-9._-]+', '_', row['name']).strip('_') or 'candidate'
+    name = f"{row['match_score']:05.1f}_{stem}.pdf"
+    counter = 1
+    while name in used:
+        counter += 1
+        name = f"{row['match_score']:05.1f}_{stem}_{counter}.pdf"
+    used.add(name)
+    return name
+
+def stream_zip(rows):
+    """Yield a ZIP archive of the CV files of `rows` chunk by chunk, never holding more than one chunk in memory."""
+    stream = _ZipStream()
+    used = set()
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for row in rows:
+            path = resolve_cv_path(row['cv_file']) if row.get('cv_file') else None
+            if path is None:
+                logger.warning(f"Skipping missing CV in export: {row.get('cv_file')}")
+                continue
+            info = zipfile.ZipInfo.from_file(path, arcname=_archive_name(row, used))
+            # PDFs are already compressed; storing them keeps CPU use and latency low
+            info.compress_type = zipfile.ZIP_STORED
+            with open(path, 'rb') as source, archive.open(info, mode='w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as target:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    target.write(chunk)
+                    data = stream.drain()
+                    if data:
+                        yield data
+    # Remaining data descriptor and central directory
+    yield stream.drain()
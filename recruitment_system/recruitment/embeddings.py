@@ -0,0 +1,105 @@
+import functools
+import hashlib
+import math
+import re
+import zlib
+from collections import Counter
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+TOKEN_RE = re.compile(r'[a-z0-9+#]+')
+
+# Abbreviations and alternate spellings rewritten to one canonical phrase before hashing,
+# so e.g. "IDS" in a CV and "intrusion detection" in a JD land in the same buckets
+SYNONYMS = {
+    'ids': 'intrusion detection',
+    'ips': 'intrusion prevention',
+    'idps': 'intrusion detection',
+    'pentest': 'penetration testing',
+    'pentesting': 'penetration testing',
+    'pen testing': 'penetration testing',
+    'pentester': 'penetration tester',
+    'vapt': 'vulnerability assessment penetration testing',
+    'infosec': 'information security',
+    'appsec': 'application security',
+    'netsec': 'network security',
+    'soc': 'security operations',
+    'siem': 'siem security monitoring',
+    'iam': 'identity access management',
+    'k8s': 'kubernetes',
+    'gcp': 'google cloud',
+    'amazon web services': 'aws',
+    'crypto': 'cryptography',
+    'ethical hacker': 'ethical hacking',
+    'firewall': 'firewalls',
+    'b.s.': "bachelor's",
+    'b.sc': "bachelor's",
+    'bsc': "bachelor's",
+    'm.s.': "master's",
+    'm.sc': "master's",
+    'msc': "master's",
+}
+_SYNONYM_RE = re.compile(
+    r'(?<![a-z0-9])(' + '|'.join(re.escape(k) for k in sorted(SYNONYMS, key=len, reverse=True)) + r')(?![a-z0-9])'
+)
+
+def normalize_text(text):
+    """Lower-case `text` and rewrite known abbreviations to their canonical phrase."""
+    return _SYNONYM_RE.sub(lambda m: SYNONYMS[m.group(1)], text.lower())
+
+def tokenize(text):
+    """Return the unigram and bigram features of a normalized text."""
+    words = TOKEN_RE.findall(normalize_text(text))
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+class HashedTfidfEmbedder:
+    """Offline text embedder: unigrams and bigrams hashed into `dim` buckets with sublinear term frequency.
+
+    Vectors hold raw term weights; the index applies inverse document frequencies at query time
+    (`uses_idf`), so IDF stays current as candidates are added without re-embedding anything.
+    """
+
+    name = 'hashed-tfidf'
+    uses_idf = True
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    @functools.lru_cache(maxsize=65536)
+    def _bucket(self, feature):
+        return zlib.crc32(feature.encode('utf-8')) % self.dim
+
+    def embed(self, texts):
+        """Return a float32 matrix with one row per text."""
+        texts = list(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets = Counter(self._bucket(feature) for feature in tokenize(text or ''))
+            for bucket, count in buckets.items():
+                vectors[row, bucket] = 1.0 + math.log(count)
+        return vectors
+
+@functools.lru_cache(maxsize=None)
+def get_embedder():
+    """Return the embedder configured by SEMANTIC_EMBEDDER (a dotted path to a class taking `dim`)."""
+    return import_string(settings.SEMANTIC_EMBEDDER)(dim=settings.SEMANTIC_EMBEDDING_DIM)
+
+def candidate_text(cv_data):
+    """Return the text embedded for a candidate: their skills, experience and education."""
+    if not isinstance(cv_data, dict):
+        return ''
+    parts = []
+    for field in ('skills', 'experience', 'education'):
+        parts.extend(str(entry) for entry in cv_data.get(field) or [])
+    return '\n'.join(parts)
+
+def jd_text(jd_data):
+    """Return the text embedded for a job description."""
+    if not isinstance(jd_data, dict):
+        return ''
+    return '\n'.join(str(jd_data.get(field) or '') for field in ('job_title', 'summary'))
+
+def text_digest(text):
+    """Return a stable 63-bit digest of `text`, used to skip re-embedding unchanged candidates."""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big') >> 1
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+from . import metrics
+from .models import ExtractionCacheEntry
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 64 * 1024
+HIT_FLUSH_SIZE = 100  # Entries whose hits are written in one round of updates
+HIT_FLUSH_INTERVAL = 30  # Seconds a recorded hit may wait before it is written
+SIZE_RESYNC_WRITES = 500  # Stores between recounts of the cache's size from the table
+EVICT_LOW_WATER = 0.9  # Eviction frees down to this fraction of the budget, so a full cache doesn't evict on every store
+
+# Per-process bookkeeping: hits waiting to be written, and the cache size as last counted plus later stores
+_lock = threading.Lock()
+_pending_hits = Counter()
+_last_hit_flush = time.monotonic()
+_approx_bytes = None
+_writes_since_count = 0
+
+def content_hash(file_obj):
+    """Return the SHA-256 hex digest of a file object's bytes, leaving it rewound for parsing."""
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+def get(kind, digest, prompt_version, model_name=None):
+    """Return the cached extraction result for a document, or None on a miss.
+
+    Without a `model_name` (no model resolved yet in this process) the most recently used entry
+    from any model is returned, so a hit needs neither an API key nor a model listing.
+    """
+    if not settings.EXTRACTION_CACHE_ENABLED:
+        return None
+    try:
+        entries = ExtractionCacheEntry.objects.filter(kind=kind, content_hash=digest, prompt_version=prompt_version)
+        if model_name:
+            entries = entries.filter(model_name=model_name)
+        entry = entries.order_by('-last_accessed_at').only('id', 'data').first()
+        if entry is None:
+            metrics.increment(f'extraction_cache_misses_{kind}')
+            return None
+        record_hit(entry.pk)
+        metrics.increment(f'extraction_cache_hits_{kind}')
+        logger.debug(f"Extraction cache hit for {kind} {digest[:12]}")
+        return entry.data
+    except Exception as e:
+        logger.warning(f"Extraction cache lookup failed: {str(e)}")
+        return None
+
+def put(kind, digest, prompt_version, model_name, data):
+    """Store an extraction result, evicting least recently used entries once the cache looks over budget."""
+    if not settings.EXTRACTION_CACHE_ENABLED or not data:
+        return
+    try:
+        size = len(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        ExtractionCacheEntry.objects.update_or_create(
+            kind=kind, content_hash=digest, prompt_version=prompt_version, model_name=model_name,
+            defaults={'data': data, 'size_bytes': size, 'last_accessed_at': timezone.now()},
+        )
+        metrics.increment(f'extraction_cache_stores_{kind}')
+        _note_store(size)
+    except IntegrityError:
+        # Another worker stored the same document concurrently
+        pass
+    except Exception as e:
+        logger.warning(f"Extraction cache store failed: {str(e)}")
+
+def record_hit(entry_id):
+    """Count a hit on an entry; hits are written in bulk by flush_hits()."""
+    with _lock:
+        _pending_hits[entry_id] += 1
+        due = len(_pending_hits) >= HIT_FLUSH_SIZE or time.monotonic() - _last_hit_flush >= HIT_FLUSH_INTERVAL
+    if due:
+        flush_hits()
+
+def flush_hits():
+    """Write the recorded hits and access times: one UPDATE per distinct hit count."""
+    global _last_hit_flush
+    with _lock:
+        hits = dict(_pending_hits)
+        _pending_hits.clear()
+        _last_hit_flush = time.monotonic()
+    if not hits:
+        return
+    by_count = {}
+    for entry_id, count in hits.items():
+        by_count.setdefault(count, []).append(entry_id)
+    now = timezone.now()
+    try:
+        for count, entry_ids in by_count.items():
+            ExtractionCacheEntry.objects.filter(pk__in=entry_ids).update(hits=F('hits') + count, last_accessed_at=now)
+    except Exception as e:
+        logger.warning(f"Extraction cache hit update failed: {str(e)}")
+
+def _note_store(size):
+    """Track the cache size from stores, counting the table only every SIZE_RESYNC_WRITES stores, and evict once over budget."""
+    global _approx_bytes, _writes_since_count
+    with _lock:
+        _writes_since_count += 1
+        recount = _approx_bytes is None or _writes_since_count >= SIZE_RESYNC_WRITES
+        if not recount:
+            # Overwriting an entry counts its size twice; the overestimate only brings the next recount forward
+            _approx_bytes += size
+        over = not recount and _approx_bytes > settings.EXTRACTION_CACHE_MAX_BYTES
+    if recount or over:
+        evict()
+
+def evict(max_bytes=None):
+    """Once the cache exceeds `max_bytes`, delete least recently used entries down to EVICT_LOW_WATER of it; return the number deleted."""
+    global _approx_bytes, _writes_since_count
+    max_bytes = settings.EXTRACTION_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    # Order by up-to-date access times
+    flush_hits()
+    total = ExtractionCacheEntry.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+    excess = total - int(max_bytes * EVICT_LOW_WATER) if total > max_bytes else 0
+    doomed = []
+    if excess > 0:
+        for entry_id, size in ExtractionCacheEntry.objects.order_by('last_accessed_at').values_list('id', 'size_bytes').iterator():
+            doomed.append(entry_id)
+            excess -= size
+            total -= size
+            if excess <= 0:
+                break
+    with _lock:
+        _approx_bytes = total
+        _writes_since_count = 0
+    if not doomed:
+        return 0
+    deleted, _ = ExtractionCacheEntry.objects.filter(pk__in=doomed).delete()
+    metrics.increment('extraction_cache_evictions', deleted)
+    logger.info(f"Evicted {deleted} extraction cache entr(ies) to stay under {max_bytes} bytes")
+    return deleted
+
+def purge(prompt_version=None, kind=None):
+    """Delete cached results, optionally limited to a prompt version and/or kind; return the number deleted."""
+    entries = ExtractionCacheEntry.objects.all()
+    if prompt_version:
+        entries = entries.filter(prompt_version=prompt_version)
+    if kind:
+        entries = entries.filter(kind=kind)
+    deleted, _ = entries.delete()
+    return deleted
+
+def stats():
+    """Return hit/miss counters for this process and the size of the persisted cache."""
+    flush_hits()
+    counters = metrics.snapshot()
+    result = {}
+    for kind, _ in ExtractionCacheEntry.KIND_CHOICES:
+        hits = int(counters.get(f'extraction_cache_hits_{kind}', 0))
+        misses = int(counters.get(f'extraction_cache_misses_{kind}', 0))
+        result[kind] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
+    aggregate = ExtractionCacheEntry.objects.aggregate(total=Sum('size_bytes'))
+    result['entries'] = ExtractionCacheEntry.objects.count()
+    result['size_bytes'] = aggregate['total'] or 0
+    result['evictions'] = int(counters.get('extraction_cache_evictions', 0))
+    return result
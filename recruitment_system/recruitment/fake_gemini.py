@@ -0,0 +1,147 @@
+"""Offline stand-in for the google.generativeai API used by the screening pipeline.
+
+Select it with GEMINI_BACKEND='fake'. It exposes the same `list_models` and `GenerativeModel`
+surface the model registry uses, answers CV and JD prompts with deterministic JSON derived from
+the prompt text, and can inject latency, quota exhaustion, server errors and truncated output
+(FAKE_GEMINI_* settings) so the pipeline can be measured without an API key. FAKE_GEMINI_QUOTA_RPM
+simulates a real per-minute quota: requests over it are rejected with a retry-after hint.
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from django.conf import settings
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+from . import metrics
+from .scoring import CYBERSECURITY_ROLES, JD_SKILLS, RELATED_SKILLS
+
+MODEL_NAMES = ['gemini-2.0-flash', 'gemini-1.5-flash']
+SKILLS = list(dict.fromkeys(JD_SKILLS + RELATED_SKILLS))
+CERTIFICATIONS = ['CISSP', 'CEH', 'CISM', 'OSCP', 'Security+', 'CCNA']
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+BATCH_CV_RE = re.compile(r'CV (\d+):\n(.*?)(?=\n\nCV \d+:\n|\Z)', re.S)
+
+_random = random.Random(settings.FAKE_GEMINI_SEED)
+_random_lock = threading.Lock()
+# Start times of the requests accepted in the last minute (FAKE_GEMINI_QUOTA_RPM)
+_quota_window = deque()
+
+def _roll():
+    with _random_lock:
+        return _random.random()
+
+def reseed(seed=None):
+    """Restart the fault-injection sequence (benchmarks call this for reproducible runs)."""
+    with _random_lock:
+        _random.seed(settings.FAKE_GEMINI_SEED if seed is None else seed)
+        _quota_window.clear()
+
+def _check_quota():
+    """Raise ResourceExhausted, with the wait the real API would suggest, once the per-minute quota is used up."""
+    if settings.FAKE_GEMINI_QUOTA_RPM <= 0:
+        return
+    with _random_lock:
+        now = time.monotonic()
+        while _quota_window and _quota_window[0] <= now - 60:
+            _quota_window.popleft()
+        if len(_quota_window) >= settings.FAKE_GEMINI_QUOTA_RPM:
+            retry_after = _quota_window[0] + 60 - now
+            metrics.increment('fake_gemini_quota_errors')
+            raise ResourceExhausted(f'Fake Gemini quota of {settings.FAKE_GEMINI_QUOTA_RPM} requests per minute exceeded. Please retry in {retry_after:.1f}s.')
+        _quota_window.append(now)
+
+def list_models():
+    """Return the fake models in the shape of google.generativeai.list_models()."""
+    return [
+        SimpleNamespace(name=f'models/{name}', supported_generation_methods=['generateContent'])
+        for name in MODEL_NAMES
+    ]
+
+def _lines(text):
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def _find_terms(text, terms):
+    lowered = text.lower()
+    return [term for term in terms if term.lower() in lowered]
+
+def cv_payload(text):
+    """Return the JSON object the real model is asked to produce for one CV's text."""
+    lines = _lines(text)
+    email = EMAIL_RE.search(text)
+    return {
+        'name': lines[0] if lines else '',
+        'email': email.group(0) if email else '',
+        'skills': _find_terms(text, SKILLS),
+        'experience': [line for line in lines if 'year' in line.lower()],
+        'education': [line for line in lines if re.search(r'bachelor|master|degree|ph\.?d', line, re.I)],
+        'certifications': _find_terms(text, CERTIFICATIONS),
+        'summary': ' '.join(lines[1:3])[:200],
+    }
+
+def jd_payload(text):
+    """Return the JSON object the real model is asked to produce for a job description."""
+    lines = _lines(text)
+    roles = _find_terms(text, CYBERSECURITY_ROLES)
+    parts = [f"Skills: {', '.join(_find_terms(text, SKILLS)) or 'not specified'}"]
+    years = re.search(r'(\d+)\+?\s*years?', text, re.I)
+    if years:
+        parts.append(f"Experience: {years.group(1)} years")
+    certifications = _find_terms(text, CERTIFICATIONS)
+    if certifications:
+        parts.append(f"Certifications: {', '.join(certifications)}")
+    return {
+        'job_title': lines[0] if lines else (roles[0].title() if roles else 'Unknown'),
+        'summary': '; '.join(parts),
+    }
+
+def respond(prompt):
+    """Build the JSON response text for a pipeline prompt (single CV, CV batch or JD)."""
+    if 'Job description:' in prompt:
+        return json.dumps(jd_payload(prompt.split('Job description:', 1)[1]))
+    blocks = BATCH_CV_RE.findall(prompt)
+    if blocks:
+        return json.dumps([dict(cv_payload(text), index=int(number)) for number, text in blocks])
+    return json.dumps(cv_payload(prompt.split('CV:', 1)[-1]))
+
+class GenerativeModel:
+    """Drop-in for google.generativeai.GenerativeModel backed by `respond`."""
+
+    def __init__(self, model_name):
+        self.model_name = model_name if model_name.startswith('models/') else f'models/{model_name}'
+
+    def _latency(self):
+        metrics.increment('fake_gemini_requests')
+        _check_quota()
+        return settings.FAKE_GEMINI_LATENCY + settings.FAKE_GEMINI_LATENCY_JITTER * _roll()
+
+    def _reply(self, prompt):
+        if _roll() < settings.FAKE_GEMINI_QUOTA_RATE:
+            metrics.increment('fake_gemini_quota_errors')
+            raise ResourceExhausted('Fake Gemini quota exhausted')
+        if _roll() < settings.FAKE_GEMINI_ERROR_RATE:
+            metrics.increment('fake_gemini_server_errors')
+            raise ServiceUnavailable('Fake Gemini backend unavailable')
+        text = respond(prompt)
+        if _roll() < settings.FAKE_GEMINI_MALFORMED_RATE:
+            # Cut the JSON short, like a response that hit the output token limit
+            metrics.increment('fake_gemini_truncated')
+            text = text[:max(1, len(text) * 2 // 3)]
+        # Report usage like the real API, estimating four characters per token
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def generate_content(self, prompt, generation_config=None):
+        latency = self._latency()
+        if latency > 0:
+            time.sleep(latency)
+        return self._reply(prompt)
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        latency = self._latency()
+        if latency > 0:
+            await asyncio.sleep(latency)
+        return self._reply(prompt)
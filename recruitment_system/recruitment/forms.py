@@ -1,5 +1,6 @@
 
 from django import forms
+from .shortlist import DEFAULT_MIN_SCORE, SORT_CHOICES, SORT_SCORE_DESC
 
 class UploadFileForm(forms.Form):
     jd_file = forms.FileField(
@@ -34,3 +35,79 @@ class UploadFileForm(forms.Form):
         if not jd_file.name.lower().endswith('.pdf'):
             raise forms.ValidationError('Job description must be in PDF format.')
         return jd_file
+
+class RescoreForm(forms.Form):
+    jd_summary = forms.CharField(
+        label='Job Description Summary',
+        required=True,
+        widget=forms.Textarea(attrs={
+            'rows': 6,
+            'class': 'mt-1 block w-full border border-gray-300 rounded p-2 text-sm'
+        })
+    )
+    job_title = forms.CharField(
+        label='Job Title',
+        required=False,
+        max_length=100,
+        widget=forms.TextInput(attrs={
+            'class': 'mt-1 block w-full border border-gray-300 rounded p-2 text-sm'
+        })
+    )
+    min_score = forms.FloatField(
+        label='Minimum Match Score',
+        required=False,
+        initial=70,
+        min_value=0,
+        max_value=100,
+        widget=forms.NumberInput(attrs={
+            'class': 'mt-1 block w-32 border border-gray-300 rounded p-2 text-sm'
+        })
+    )
+
+class ShortlistFilterForm(forms.Form):
+    min_score = forms.FloatField(required=False, min_value=0, max_value=100)
+    sort = forms.ChoiceField(required=False, choices=SORT_CHOICES)
+    after = forms.CharField(required=False, max_length=200)
+
+    def clean_min_score(self):
+        min_score = self.cleaned_data['min_score']
+        return DEFAULT_MIN_SCORE if min_score is None else min_score
+
+    def clean_sort(self):
+        return self.cleaned_data['sort'] or SORT_SCORE_DESC
+
+class EmailCampaignForm(forms.Form):
+    recipients = forms.MultipleChoiceField(
+        label='Candidates',
+        required=True,
+        widget=forms.CheckboxSelectMultiple,
+        error_messages={'required': 'Select at least one candidate.'},
+    )
+    subject = forms.CharField(
+        label='Subject',
+        required=True,
+        max_length=255,
+        widget=forms.TextInput(attrs={
+            'placeholder': 'e.g., Interview Invitation for Cybersecurity Analyst',
+            'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-900 focus:ring-blue-900'
+        })
+    )
+    message = forms.CharField(
+        label='Message',
+        required=True,
+        widget=forms.Textarea(attrs={
+            'rows': 5,
+            'placeholder': 'e.g., We are pleased to invite you for an interview...',
+            'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-900 focus:ring-blue-900'
+        })
+    )
+
+    def __init__(self, *args, candidates=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.candidates = {str(candidate['candidate_id']): candidate for candidate in candidates}
+        self.fields['recipients'].choices = [
+            (key, f"{candidate['name']} ({candidate['email']})") for key, candidate in self.candidates.items()
+        ]
+
+    def clean_recipients(self):
+        return [self.candidates[key] for key in self.cleaned_data['recipients']]
@@ -0,0 +1,59 @@
+import logging
+import threading
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+class LLMClient:
+    """Import and configure the Gemini SDK (or the offline fake) on first use instead of at import time.
+
+    google.generativeai takes about half a second to import and needs an API key, which every
+    manage.py command, test run and worker boot paid even when it never called Gemini.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backends = {}
+
+    def backend(self):
+        """Return the module providing `list_models` and `GenerativeModel` for GEMINI_BACKEND."""
+        name = settings.GEMINI_BACKEND
+        backend = self._backends.get(name)
+        if backend is None:
+            with self._lock:
+                backend = self._backends.get(name)
+                if backend is None:
+                    backend = self._backends[name] = self._load(name)
+        return backend
+
+    def _load(self, name):
+        with metrics.timer('gemini_sdk_load_seconds'):
+            if name == 'fake':
+                from . import fake_gemini
+                return fake_gemini
+            if not settings.GOOGLE_API_KEY:
+                raise ImproperlyConfigured('GOOGLE_API_KEY is not set; set it in .env or use GEMINI_BACKEND=fake.')
+            import google.generativeai as genai
+            genai.configure(api_key=settings.GOOGLE_API_KEY)
+            logger.info('Configured the Gemini SDK')
+            return genai
+
+    @property
+    def errors(self):
+        """google.api_core.exceptions, imported when an `except` clause first needs it."""
+        from google.api_core import exceptions
+        return exceptions
+
+    def list_models(self):
+        return self.backend().list_models()
+
+    def GenerativeModel(self, model_name):
+        return self.backend().GenerativeModel(model_name)
+
+    def is_loaded(self):
+        """Return True once the SDK for GEMINI_BACKEND has been imported."""
+        return settings.GEMINI_BACKEND in self._backends
+
+llm_client = LLMClient()
@@ -0,0 +1,356 @@
+import hashlib
+import http.client
+import logging
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.cookies import SimpleCookie
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import Q
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from . import fake_gemini, local_extraction, metrics
+from .model_registry import model_registry
+from .models import Candidate, ExtractionCacheEntry, ScreeningBatch, ScreeningTask
+from .rate_control import gemini_rate_controller
+from .scoring import CYBERSECURITY_ROLES, JD_SKILLS, RELATED_SKILLS
+from .screening import run_worker
+
+logger = logging.getLogger(__name__)
+
+MAX_CVS_PER_UPLOAD = 80
+EMAIL_DOMAIN = 'bench.invalid'
+CERTIFICATIONS = ['CISSP', 'CEH', 'CISM', 'OSCP', 'Security+']
+DEGREES = ["Bachelor's in Computer Science", "Master's in Cybersecurity", "Bachelor's in Information Technology"]
+FIRST_NAMES = ['Alice', 'Omar', 'Priya', 'Chen', 'Maria', 'Tom', 'Aisha', 'Lukas', 'Sofia', 'Kwame']
+LAST_NAMES = ['Smith', 'Haddad', 'Patel', 'Wang', 'Garcia', 'Novak', 'Okafor', 'Berg', 'Rossi', 'Mensah']
+UNSTRUCTURED_SHARE = 0.25  # CVs written as prose, which the local extractor leaves to Gemini
+
+def synthetic_pdf(lines):
+    """Return the bytes of a one-page PDF showing `lines` of Helvetica text."""
+    escaped = [line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in lines]
+    content = 'BT /F1 11 Tf 50 750 Td 14 TL\n' + ''.join(f"({line}) '\n" for line in escaped) + 'ET'
+    objects = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        '<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>',
+        f'<< /Length {len(content)} >>\nstream\n{content}\nendstream',
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    body = b'%PDF-1.4\n'
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f'{number} 0 obj\n{obj}\nendobj\n'.encode('latin-1')
+    xref = len(body)
+    body += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    body += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    body += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return body
+
+def synthetic_jd():
+    """Return the PDF bytes of a cybersecurity job description."""
+    return synthetic_pdf([
+        'Security Analyst',
+        f"Required skills: {', '.join(JD_SKILLS[:6])}",
+        'Minimum 3 years of experience in security monitoring',
+        "Bachelor's degree in Computer Science or related field",
+        'Certifications: CISSP or CEH preferred',
+    ])
+
+def synthetic_cv(number, run_id, rng):
+    """Return (email, PDF bytes) for a randomised candidate unique to this benchmark run."""
+    email = f'cand{number}-{run_id}@{EMAIL_DOMAIN}'
+    name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+    skills = rng.sample(JD_SKILLS, rng.randint(1, 6)) + rng.sample(RELATED_SKILLS, rng.randint(0, 4))
+    years = rng.randint(0, 12)
+    role = rng.choice(CYBERSECURITY_ROLES)
+    if rng.random() < UNSTRUCTURED_SHARE:
+        return email, synthetic_pdf([
+            f'Profile of {name.lower()}, reachable at {email}.',
+            f"Worked {years} years as {role}, mostly on {', '.join(skills)}.",
+            f'Holds a {rng.choice(DEGREES)} and the {rng.choice(CERTIFICATIONS)} certification.',
+        ])
+    return email, synthetic_pdf([
+        name,
+        email,
+        f"Skills: {', '.join(skills)}",
+        f'{years} years as {role}',
+        rng.choice(DEGREES),
+        f'Certifications: {rng.choice(CERTIFICATIONS)}',
+    ])
+
+def percentile(values, pct):
+    """Return the `pct` percentile of `values` (nearest-rank), or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+@contextmanager
+def fake_gemini_backend(latency=None, quota_rate=None, error_rate=None, malformed_rate=None, requests_per_minute=0, seed=None, quota_rpm=None):
+    """Route Gemini calls to the offline fake for the duration of the block.
+
+    The process-wide rate controller restarts at `requests_per_minute` (0 = unpaced until the fake's
+    `quota_rpm` quota pushes back) and is reset to the configured rate afterwards.
+    """
+    # Keep the run's metrics snapshot out of the directory the /metrics endpoint exports
+    overrides = {'GEMINI_BACKEND': 'fake', 'METRICS_DIR': os.path.join(tempfile.gettempdir(), 'talentscope-bench-metrics')}
+    for name, value in [
+        ('FAKE_GEMINI_LATENCY', latency),
+        ('FAKE_GEMINI_QUOTA_RATE', quota_rate),
+        ('FAKE_GEMINI_ERROR_RATE', error_rate),
+        ('FAKE_GEMINI_MALFORMED_RATE', malformed_rate),
+        ('FAKE_GEMINI_QUOTA_RPM', quota_rpm),
+    ]:
+        if value is not None:
+            overrides[name] = value
+    with override_settings(**overrides):
+        model_registry.invalidate()
+        fake_gemini.reseed(seed)
+        gemini_rate_controller.reset(requests_per_minute)
+        try:
+            yield
+        finally:
+            gemini_rate_controller.reset(settings.GEMINI_REQUESTS_PER_MINUTE)
+            model_registry.invalidate()
+
+class PipelineBenchmark:
+    """Drive the upload view and the screening worker end to end over a synthetic CV corpus."""
+
+    def __init__(self, size, seed=0, keep=False):
+        self.size = size
+        self.run_id = uuid.uuid4().hex[:8]
+        self.rng = random.Random(seed)
+        self.keep = keep
+        self.batch_ids = []
+        self.digests = []
+
+    def _corpus(self):
+        jd = synthetic_jd()
+        cvs = [synthetic_cv(number, self.run_id, self.rng) for number in range(self.size)]
+        self.digests = [hashlib.sha256(pdf).hexdigest() for pdf in [jd] + [pdf for _, pdf in cvs]]
+        return jd, cvs
+
+    def _upload(self, client, jd, cvs):
+        """POST the corpus through views.upload in chunks of MAX_CVS_PER_UPLOAD; return per-request seconds."""
+        latencies = []
+        for start in range(0, len(cvs), MAX_CVS_PER_UPLOAD):
+            chunk = cvs[start:start + MAX_CVS_PER_UPLOAD]
+            files = [SimpleUploadedFile(f'bench-{self.run_id}-{start + i}.pdf', pdf, 'application/pdf') for i, (_, pdf) in enumerate(chunk)]
+            started = time.perf_counter()
+            response = client.post(reverse('recruitment:upload'), {
+                'jd_file': SimpleUploadedFile(f'bench-{self.run_id}-jd.pdf', jd, 'application/pdf'),
+                'cv_files': files,
+            })
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 302:
+                raise RuntimeError(f'Upload failed with status {response.status_code}')
+            self.batch_ids.append(client.session['batch_id'])
+        return latencies
+
+    def run(self, claim_size=None):
+        """Run the benchmark and return a dict of throughput, latency percentiles and API call counts."""
+        user = User.objects.create_user(f'bench-{self.run_id}')
+        client = Client()
+        client.force_login(user)
+        jd, cvs = self._corpus()
+        metrics.reset()
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                upload_latencies = self._upload(client, jd, cvs)
+            started = time.perf_counter()
+            run_worker(once=True, poll_interval=0, claim_size=claim_size)
+            worker_seconds = time.perf_counter() - started
+            return self._report(upload_latencies, worker_seconds)
+        finally:
+            if not self.keep:
+                self.cleanup(user)
+
+    def _report(self, upload_latencies, worker_seconds):
+        tasks = ScreeningTask.objects.filter(batch_id__in=self.batch_ids)
+        turnaround = [
+            (finished - created).total_seconds()
+            for created, finished in tasks.exclude(finished_at=None).values_list('created_at', 'finished_at')
+        ]
+        done = tasks.filter(status=ScreeningTask.STATUS_DONE).count()
+        api_calls = int(metrics.get('gemini_api_calls'))
+        return {
+            'cvs': self.size,
+            'uploads': len(upload_latencies),
+            'done': done,
+            'failed': tasks.filter(status=ScreeningTask.STATUS_FAILED).count(),
+            'upload_p50': percentile(upload_latencies, 50),
+            'upload_p95': percentile(upload_latencies, 95),
+            'turnaround_p50': percentile(turnaround, 50),
+            'turnaround_p95': percentile(turnaround, 95),
+            'worker_seconds': worker_seconds,
+            'throughput': done / worker_seconds if worker_seconds else 0.0,
+            'api_calls': api_calls,
+            'api_calls_per_cv': api_calls / self.size if self.size else 0.0,
+            'quota_errors': int(metrics.get('fake_gemini_quota_errors')),
+            'server_errors': int(metrics.get('fake_gemini_server_errors')),
+            'deferred': int(metrics.get('screening_tasks_deferred')),
+            'llm_avoidance_rate': local_extraction.avoidance_rate(metrics.snapshot()),
+            'rate_control': gemini_rate_controller.stats(),
+            'stage_seconds': {name: round(histogram['sum'], 3) for name, histogram in metrics.histograms().items()},
+            'counters': metrics.snapshot(),
+        }
+
+    def cleanup(self, user):
+        """Delete the run's batches, candidates, cache entries and uploaded files."""
+        paths = [os.path.join(settings.MEDIA_ROOT, path) for path in ScreeningTask.objects.filter(batch_id__in=self.batch_ids).values_list('cv_file', flat=True)]
+        paths += [os.path.join(settings.MEDIA_ROOT, path) for path in ScreeningBatch.objects.filter(pk__in=self.batch_ids).values_list('jd_file', flat=True)]
+        # Match on the run id as well: a truncated fake response can mangle the stored email
+        candidate_ids = list(Candidate.objects.filter(
+            Q(screening_tasks__batch_id__in=self.batch_ids) | Q(email__contains=self.run_id)
+        ).distinct().values_list('id', flat=True))
+        if settings.SEMANTIC_SCORING_ENABLED and candidate_ids:
+            from .semantic_index import get_index
+            get_index().remove(candidate_ids)
+        Candidate.objects.filter(pk__in=candidate_ids).delete()
+        ScreeningBatch.objects.filter(pk__in=self.batch_ids).delete()
+        ExtractionCacheEntry.objects.filter(content_hash__in=self.digests).delete()
+        user.delete()
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+SERVER_COMMANDS = {
+    # One process each: the event loop against a fixed pool of request threads
+    'asgi': ['-m', 'uvicorn', 'recruitment_system.asgi:application', '--workers', '1', '--host', '127.0.0.1', '--port', '{port}', '--log-level', 'warning'],
+    'wsgi': ['-m', 'gunicorn', 'recruitment_system.wsgi:application', '--workers', '1', '--threads', '{threads}', '--bind', '127.0.0.1:{port}', '--timeout', '300'],
+}
+SERVER_START_TIMEOUT = 30
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def multipart_body(fields, files):
+    """Encode form `fields` and `files` [(field, file name, bytes)] as multipart/form-data; return (content type, body)."""
+    boundary = uuid.uuid4().hex
+    body = b''
+    for name, value in fields.items():
+        body += f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+    for name, file_name, content in files:
+        body += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{file_name}"\r\n'
+            'Content-Type: application/pdf\r\n\r\n'
+        ).encode() + content + b'\r\n'
+    return f'multipart/form-data; boundary={boundary}', body + f'--{boundary}--\r\n'.encode()
+
+@contextmanager
+def run_server(kind, latency, threads=4):
+    """Start one `kind` ('asgi' or 'wsgi') server process on the fake Gemini backend; yield its port."""
+    port = _free_port()
+    env = dict(os.environ, GEMINI_BACKEND='fake', FAKE_GEMINI_LATENCY=str(latency), FAKE_GEMINI_LATENCY_JITTER='0', GEMINI_REQUESTS_PER_MINUTE='0')
+    args = [arg.format(port=port, threads=threads) for arg in SERVER_COMMANDS[kind]]
+    process = subprocess.Popen([sys.executable, *args], cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'{kind} server exited: {process.stderr.read().decode(errors="replace")[-2000:]}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'{kind} server did not start within {SERVER_START_TIMEOUT} s')
+                time.sleep(0.1)
+        yield port
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+class ServerUploadBenchmark(PipelineBenchmark):
+    """Post concurrent uploads to views.upload_async on one server process and time them.
+
+    Each upload screens its CVs inside the request, so the latency covers the whole pipeline. Under
+    ASGI the waits on Gemini share one event loop; under WSGI each request holds one of the
+    worker's threads until its batch is screened.
+    """
+
+    def __init__(self, concurrency, cvs_per_upload, seed=0, keep=False):
+        super().__init__(concurrency * cvs_per_upload, seed=seed, keep=keep)
+        self.concurrency = concurrency
+        self.cvs_per_upload = cvs_per_upload
+
+    def _session(self, port, user):
+        client = Client()
+        client.force_login(user)
+        cookies = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        connection.request('GET', reverse('recruitment:upload_async'), headers={'Cookie': cookies, 'Host': 'localhost'})
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+        token = SimpleCookie(response.getheader('Set-Cookie', ''))[settings.CSRF_COOKIE_NAME].value
+        return f'{cookies}; {settings.CSRF_COOKIE_NAME}={token}', token
+
+    def _post(self, port, cookies, token, jd, chunk, start):
+        files = [('jd_file', f'bench-{self.run_id}-jd.pdf', jd)]
+        files += [('cv_files', f'bench-{self.run_id}-{start + i}.pdf', pdf) for i, (_, pdf) in enumerate(chunk)]
+        content_type, body = multipart_body({'csrfmiddlewaretoken': token}, files)
+        started = time.perf_counter()
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+            connection.request('POST', reverse('recruitment:upload_async'), body=body, headers={
+                'Content-Type': content_type, 'Cookie': cookies, 'Host': 'localhost',
+            })
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+            status = response.status
+        except OSError as e:
+            logger.warning(f'Benchmark upload failed: {str(e)}')
+            status = None
+        return time.perf_counter() - started, status
+
+    def run(self, port):
+        """Post `concurrency` uploads at once to the server on `port`; return a dict of latency percentiles and throughput."""
+        user = User.objects.create_user(f'bench-{self.run_id}')
+        jd, cvs = self._corpus()
+        try:
+            cookies, token = self._session(port, user)
+            chunks = [(cvs[start:start + self.cvs_per_upload], start) for start in range(0, len(cvs), self.cvs_per_upload)]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                results = list(executor.map(lambda chunk: self._post(port, cookies, token, jd, *chunk), chunks))
+            wall_seconds = time.perf_counter() - started
+            self.batch_ids = list(ScreeningBatch.objects.filter(created_by=user).values_list('pk', flat=True))
+            latencies = [seconds for seconds, status in results if status == 302]
+            done = ScreeningTask.objects.filter(batch_id__in=self.batch_ids, status=ScreeningTask.STATUS_DONE).count()
+            return {
+                'concurrency': self.concurrency,
+                'cvs': self.size,
+                'uploads': len(results),
+                'errors': len(results) - len(latencies),
+                'done': done,
+                'upload_p50': percentile(latencies, 50),
+                'upload_p95': percentile(latencies, 95),
+                'wall_seconds': wall_seconds,
+                'uploads_per_second': len(latencies) / wall_seconds if wall_seconds else 0.0,
+                'throughput': done / wall_seconds if wall_seconds else 0.0,
+            }
+        finally:
+            if not self.keep:
+                self.cleanup(user)
@@ -0,0 +1,163 @@
+import logging
+import re
+from django.conf import settings
+from . import metrics
+from .prompt_text import split_cv_text
+from .scoring import KEYWORDS, ROLE_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+CERTIFICATIONS = [
+    'CISSP', 'CISM', 'CISA', 'CRISC', 'CCSP', 'CEH', 'OSCP', 'OSCE', 'GSEC', 'GCIH', 'GPEN', 'GCIA',
+    'Security+', 'Network+', 'CySA+', 'PenTest+', 'CASP+', 'CCNA', 'CCNP', 'ISO 27001',
+]
+CERTIFICATION_RE = re.compile(r'(?<![\w+])(' + '|'.join(re.escape(c) for c in sorted(CERTIFICATIONS, key=len, reverse=True)) + r')(?![\w+])', re.I)
+EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+YEARS_RE = re.compile(r'(\d{1,2})\+?\s*(?:years?|yrs)\b', re.I)
+DEGREE_RE = re.compile(r"\b(bachelor|master|b\.?sc|m\.?sc|b\.?s\.|m\.?s\.|b\.?tech|m\.?tech|mba|ph\.?d|doctorate|diploma|degree)\b", re.I)
+NAME_RE = re.compile(r"^[A-Z][a-zA-Z'.-]+(?: [A-Z][a-zA-Z'.-]+){1,3}$")
+NOT_NAME_WORDS = {'curriculum', 'vitae', 'resume', 'cv', 'profile', 'contact', 'page'}
+LIST_SPLIT_RE = re.compile(r'\s*[,;|/]\s*|\s+-\s+')
+
+# Share of the confidence score earned by each field that was found
+CONFIDENCE_WEIGHTS = {
+    'email': 0.25,
+    'name': 0.2,
+    'skills': 0.25,
+    'experience': 0.15,
+    'education': 0.1,
+    'certifications': 0.05,
+}
+
+ONLY_MODE_REJECTED = 'Local extraction below confidence: no name or email found, and LOCAL_EXTRACTION_MODE is "only".'
+
+class LocalExtraction(dict):
+    """CV data produced without Gemini; kept out of the extraction cache so turning local extraction off takes effect.
+
+    An empty instance with `error` set marks a CV rejected in 'only' mode, which the caller fails with that reason.
+    """
+
+    def __init__(self, data=(), error=''):
+        super().__init__(data)
+        self.error = error
+
+def _find_name(header_lines):
+    for line in header_lines[:5]:
+        candidate = EMAIL_RE.sub('', line).split('|')[0].strip(' -,')
+        if NAME_RE.match(candidate) and not NOT_NAME_WORDS & set(candidate.lower().split()):
+            return candidate
+    return ''
+
+def _section_body(sections, name):
+    """Return the content lines of every section called `name`, without the heading (keeping "Skills: ..." content)."""
+    body = []
+    for section, lines in sections:
+        if section != name:
+            continue
+        if name == 'header':
+            body.extend(lines)
+            continue
+        inline = lines[0].split(':', 1)[1].strip() if ':' in lines[0] else ''
+        body.extend(([inline] if inline else []) + lines[1:])
+    return body
+
+def _skill_items(lines):
+    """Split skill lines ("SIEM, Python | Linux") into short items."""
+    items, seen = [], set()
+    for line in lines:
+        if DEGREE_RE.search(line) or YEARS_RE.search(line):
+            # Layouts without headings run the next fields on after an inline "Skills:" line
+            continue
+        for item in LIST_SPLIT_RE.split(line.lstrip('- ')):
+            item = item.strip(' .-')
+            if item and len(item.split()) <= 4 and item.lower() not in seen:
+                seen.add(item.lower())
+                items.append(item)
+    return items
+
+def extract(text, sections=None):
+    """Extract the CV fields Gemini would return from well-structured CV text without an API call.
+
+    `sections` is the text already split by prompt_text.split_cv_text, if available. Returns
+    (cv_data, confidence) where confidence in [0, 1] is the weighted share of fields found;
+    a CV without an email always scores 0.
+    """
+    if sections is None:
+        sections, _ = split_cv_text(text)
+    lines = [line for _, section_lines in sections for line in section_lines]
+    header = _section_body(sections, 'header')
+    email = EMAIL_RE.search('\n'.join(lines))
+
+    skills = _skill_items(_section_body(sections, 'skills'))
+    # Known skills mentioned anywhere (e.g. in the summary) count too, as they do when Gemini reads the CV
+    known = {skill.lower() for skill in skills}
+    for keyword in sorted(KEYWORDS.find('\n'.join(lines).lower()) - ROLE_KEYWORDS):
+        if not any(keyword in item for item in known):
+            skills.append(keyword)
+
+    experience = [line.lstrip('- ') for line in lines if YEARS_RE.search(line)]
+    roles = [line.lstrip('- ') for line in _section_body(sections, 'experience')]
+    experience += [line for line in roles if line not in experience][:10]
+    education = [line.lstrip('- ') for line in lines if DEGREE_RE.search(line)]
+    certifications = list(dict.fromkeys(match.group(1) for match in CERTIFICATION_RE.finditer('\n'.join(lines))))
+
+    data = {
+        'name': _find_name(header),
+        'email': email.group(0) if email else '',
+        'skills': skills,
+        'experience': experience,
+        'education': education,
+        'certifications': certifications,
+    }
+    years = [int(match.group(1)) for line in experience for match in YEARS_RE.finditer(line)]
+    data['summary'] = '; '.join(part for part in [
+        f"Skills: {', '.join(skills)}" if skills else '',
+        f"Experience: {max(years)} years" if years else '',
+        f"Education: {', '.join(education)}" if education else '',
+        f"Certifications: {', '.join(certifications)}" if certifications else '',
+    ] if part)
+
+    found = {
+        'email': bool(data['email']),
+        'name': bool(data['name']),
+        'skills': len(skills) >= 2,
+        'experience': bool(years),
+        'education': bool(education),
+        'certifications': bool(certifications),
+    }
+    confidence = sum(weight for field, weight in CONFIDENCE_WEIGHTS.items() if found[field]) if data['email'] else 0.0
+    return data, round(confidence, 2)
+
+@metrics.timed('local_extraction_seconds')
+def try_extract(text, sections=None):
+    """Return locally extracted CV data if LOCAL_EXTRACTION_MODE allows it and it is confident enough, else None.
+
+    'auto' accepts results scoring at least LOCAL_EXTRACTION_MIN_CONFIDENCE; 'only' accepts any result
+    with a name and email (Gemini is never called) and returns an empty LocalExtraction carrying the
+    failure reason otherwise; 'off' always defers to Gemini. `sections` is passed on to extract().
+    """
+    mode = settings.LOCAL_EXTRACTION_MODE
+    if mode == 'off' or not text:
+        return None
+    metrics.increment('local_extraction_attempts')
+    try:
+        data, confidence = extract(text, sections)
+    except Exception as e:
+        logger.error(f"Local CV extraction failed: {str(e)}")
+        data, confidence = {}, 0.0
+    usable = bool(data.get('email') and data.get('name'))
+    if usable and (mode == 'only' or confidence >= settings.LOCAL_EXTRACTION_MIN_CONFIDENCE):
+        metrics.increment('local_extraction_accepted')
+        logger.debug(f"Extracted CV locally with confidence {confidence}")
+        return LocalExtraction(data)
+    metrics.increment('local_extraction_rejected')
+    if mode == 'only':
+        logger.warning(f"Local CV extraction found no name or email (confidence {confidence}); failing the CV")
+        return LocalExtraction(error=ONLY_MODE_REJECTED)
+    logger.debug(f"Local CV extraction confidence {confidence} too low; using Gemini")
+    return None
+
+def avoidance_rate(counters):
+    """Share of local extraction attempts that avoided a Gemini call, from a metrics counter dict."""
+    attempts = counters.get('local_extraction_attempts', 0)
+    return counters.get('local_extraction_accepted', 0) / attempts if attempts else 0.0
@@ -0,0 +1,235 @@
+import logging
+import random
+import smtplib
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from . import metrics
+from .models import EmailCampaign, EmailDelivery
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATE = 'emails/custom_email.txt'
+
+def create_campaign(user, subject, message, recipients, batch=None):
+    """Queue one email per recipient and return the campaign.
+
+    `recipients` is an iterable of dicts with name, email and (optionally) candidate_id; duplicate
+    addresses are only mailed once.
+    """
+    with transaction.atomic():
+        campaign = EmailCampaign.objects.create(created_by=user, batch=batch, subject=subject, message=message)
+        seen = set()
+        deliveries = []
+        for recipient in recipients:
+            email = recipient['email'].strip()
+            if not email or email.lower() in seen:
+                continue
+            seen.add(email.lower())
+            deliveries.append(EmailDelivery(
+                campaign=campaign,
+                candidate_id=recipient.get('candidate_id'),
+                email=email,
+                name=recipient.get('name') or 'Candidate',
+            ))
+        EmailDelivery.objects.bulk_create(deliveries)
+    logger.info(f"Queued email campaign {campaign.pk} for {len(deliveries)} recipient(s)")
+    return campaign
+
+def campaign_progress(campaign):
+    """Return per-status delivery counts for a campaign."""
+    counts = campaign.deliveries.aggregate(
+        total=Count('id'),
+        sent=Count('id', filter=Q(status=EmailDelivery.STATUS_SENT)),
+        failed=Count('id', filter=Q(status=EmailDelivery.STATUS_FAILED)),
+    )
+    finished = counts['sent'] + counts['failed']
+    return {
+        'status': campaign.get_status_display(),
+        'is_finished': campaign.is_finished,
+        'total': counts['total'],
+        'sent': counts['sent'],
+        'failed': counts['failed'],
+        'pending': counts['total'] - finished,
+        'percent': round(finished * 100 / counts['total']) if counts['total'] else 100,
+    }
+
+def render_delivery(delivery, campaign):
+    """Build the personalised message for one recipient from the custom email template."""
+    body = render_to_string(EMAIL_TEMPLATE, {
+        'candidate_name': delivery.name,
+        'message': campaign.message,
+    })
+    return EmailMessage(
+        subject=campaign.subject,
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[delivery.email],
+    )
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt: exponential backoff with jitter, capped."""
+    delay = min(settings.EMAIL_RETRY_BACKOFF * 2 ** max(attempts - 1, 0), settings.EMAIL_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+def is_connection_error(error):
+    """Return True if `error` means the SMTP session itself is gone (SMTPException subclasses OSError too)."""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+def is_permanent(error):
+    """Return True if retrying `error` cannot succeed (refused recipient, 5xx reply, bad message)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return not is_connection_error(error)
+
+def requeue_stale_deliveries():
+    """Return deliveries abandoned by a crashed worker to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=settings.EMAIL_SEND_TIMEOUT)
+    requeued = EmailDelivery.objects.filter(status=EmailDelivery.STATUS_SENDING, started_at__lt=cutoff).update(
+        status=EmailDelivery.STATUS_PENDING, started_at=None,
+    )
+    if requeued:
+        logger.warning(f"Requeued {requeued} stale email deliver(ies)")
+
+def claim_deliveries(limit):
+    """Claim up to `limit` deliveries that are due for (another) attempt."""
+    now = timezone.now()
+    with transaction.atomic():
+        delivery_ids = list(
+            EmailDelivery.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailDelivery.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not delivery_ids:
+            return []
+        EmailDelivery.objects.filter(pk__in=delivery_ids).update(
+            status=EmailDelivery.STATUS_SENDING,
+            attempts=F('attempts') + 1,
+            started_at=now,
+        )
+    deliveries = list(EmailDelivery.objects.select_related('campaign').filter(pk__in=delivery_ids).order_by('id'))
+    campaign_ids = {delivery.campaign_id for delivery in deliveries}
+    EmailCampaign.objects.filter(pk__in=campaign_ids, status=EmailCampaign.STATUS_QUEUED).update(status=EmailCampaign.STATUS_SENDING)
+    return deliveries
+
+def _record_failure(delivery, error, now):
+    delivery.error = str(error) or error.__class__.__name__
+    if is_permanent(error) or delivery.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        delivery.status = EmailDelivery.STATUS_FAILED
+        metrics.increment('email_failed')
+        logger.error(f"Giving up on email to {delivery.email} after {delivery.attempts} attempt(s): {delivery.error}")
+    else:
+        delivery.status = EmailDelivery.STATUS_PENDING
+        delivery.next_attempt_at = now + timedelta(seconds=retry_delay(delivery.attempts))
+        metrics.increment('email_retried')
+        logger.warning(f"Email to {delivery.email} failed (attempt {delivery.attempts}), retrying at {delivery.next_attempt_at}: {delivery.error}")
+
+def send_deliveries(deliveries):
+    """Send claimed deliveries over one SMTP connection and record each recipient's outcome.
+
+    Messages go through the same open connection one send_messages() call at a time, so a refused
+    recipient only fails its own delivery. A dropped connection is reopened once per message; if the
+    server cannot be reached at all, every remaining delivery is rescheduled with backoff.
+    """
+    if not deliveries:
+        return
+    connection = get_connection(fail_silently=False)
+    pending = list(deliveries)
+    try:
+        connection.open()
+    except Exception as e:
+        # Unreachable server or rejected login: nothing is wrong with the recipients, so always retry
+        logger.error(f"Could not open email connection: {str(e)}")
+        error = e if is_connection_error(e) else smtplib.SMTPConnectError(421, str(e))
+        now = timezone.now()
+        for delivery in pending:
+            _record_failure(delivery, error, now)
+        pending = []
+    unreachable = None
+    try:
+        for delivery in pending:
+            if unreachable is not None:
+                _record_failure(delivery, unreachable, timezone.now())
+                continue
+            for reconnect in (False, True):
+                try:
+                    message = render_delivery(delivery, delivery.campaign)
+                    if reconnect:
+                        connection.close()
+                        connection.open()
+                    sent = connection.send_messages([message])
+                    error = None if sent else smtplib.SMTPRecipientsRefused({delivery.email: (550, b'No message sent')})
+                    break
+                except Exception as e:
+                    error = e
+                    if not is_connection_error(e):
+                        break
+            if error is not None and is_connection_error(error):
+                # Reconnecting failed too; leave the rest of the chunk for a later attempt
+                unreachable = error
+            now = timezone.now()
+            if error is None:
+                delivery.status = EmailDelivery.STATUS_SENT
+                delivery.sent_at = now
+                delivery.error = ''
+                metrics.increment('email_sent')
+            else:
+                _record_failure(delivery, error, now)
+    finally:
+        connection.close()
+    EmailDelivery.objects.bulk_update(deliveries, ['status', 'error', 'next_attempt_at', 'sent_at'])
+
+def finalize_campaigns(campaign_ids):
+    """Mark campaigns completed once none of their deliveries can still be sent."""
+    open_statuses = [EmailDelivery.STATUS_PENDING, EmailDelivery.STATUS_SENDING]
+    finished = (
+        EmailCampaign.objects.filter(pk__in=campaign_ids)
+        .exclude(status=EmailCampaign.STATUS_COMPLETED)
+        .exclude(deliveries__status__in=open_statuses)
+    )
+    for campaign in finished:
+        campaign.status = EmailCampaign.STATUS_COMPLETED
+        campaign.finished_at = timezone.now()
+        campaign.save(update_fields=['status', 'finished_at'])
+        progress = campaign_progress(campaign)
+        logger.info(f"Email campaign {campaign.pk} completed: {progress['sent']} sent, {progress['failed']} failed")
+
+def send_due_emails(chunk_size=None):
+    """Claim and send one chunk of due deliveries; return the number of deliveries handled."""
+    chunk_size = chunk_size or settings.EMAIL_SEND_CHUNK_SIZE
+    requeue_stale_deliveries()
+    deliveries = claim_deliveries(chunk_size)
+    if not deliveries:
+        return 0
+    started = time.monotonic()
+    with metrics.timer('email_chunk_send_seconds'):
+        send_deliveries(deliveries)
+    finalize_campaigns({delivery.campaign_id for delivery in deliveries})
+    sent = sum(delivery.status == EmailDelivery.STATUS_SENT for delivery in deliveries)
+    logger.info(f"Sent {sent}/{len(deliveries)} email(s) in {time.monotonic() - started:.2f}s")
+    return len(deliveries)
+
+def run_email_worker(once=False, poll_interval=None, chunk_size=None):
+    """Drain the email queue; with `once`, exit as soon as nothing is due."""
+    poll_interval = settings.SCREENING_WORKER_POLL_INTERVAL if poll_interval is None else poll_interval
+    logger.info(f"Email worker started (chunk size {chunk_size or settings.EMAIL_SEND_CHUNK_SIZE}, poll interval {poll_interval}s)")
+    try:
+        while True:
+            metrics.flush()
+            if not send_due_emails(chunk_size):
+                if once:
+                    logger.info("Email queue drained, worker exiting")
+                    return
+                time.sleep(poll_interval)
+    finally:
+        metrics.flush(force=True)
@@ -0,0 +1,48 @@
+import importlib.util
+import json
+from django.core.management.base import BaseCommand, CommandError
+from recruitment.loadtest import SERVER_COMMANDS, ServerUploadBenchmark, run_server
+
+
+def _ms(seconds):
+    return f'{seconds * 1000:.0f}' if seconds is not None else '-'
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent inline uploads on one uvicorn (ASGI) worker against one gunicorn (WSGI) worker, on the fake Gemini backend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', choices=sorted(SERVER_COMMANDS), default=['asgi', 'wsgi'], help='Servers to benchmark.')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='Simultaneous uploads per run.')
+        parser.add_argument('--cvs', type=int, default=5, help='CVs per upload.')
+        parser.add_argument('--latency', type=float, default=0.5, help='Fake Gemini seconds per request.')
+        parser.add_argument('--threads', type=int, default=4, help='Request threads of the WSGI worker.')
+        parser.add_argument('--seed', type=int, default=0, help='Seeds the synthetic corpus.')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark batches, candidates and files.')
+        parser.add_argument('--json', action='store_true', help='Print one JSON object per run instead of a table.')
+
+    def handle(self, *args, **options):
+        for kind in options['servers']:
+            module = SERVER_COMMANDS[kind][1]
+            if importlib.util.find_spec(module) is None:
+                raise CommandError(f'{module} is not installed (pip install {module}).')
+        if not options['json']:
+            self.stdout.write(
+                f"{'server':>7} {'uploads':>8} {'cvs':>6} {'errors':>7} {'done':>6} {'upload p50/p95 ms':>18} "
+                f"{'wall s':>8} {'uploads/s':>10} {'cv/s':>7}"
+            )
+        for kind in options['servers']:
+            with run_server(kind, options['latency'], threads=options['threads']) as port:
+                for concurrency in options['concurrency']:
+                    result = ServerUploadBenchmark(concurrency, options['cvs'], seed=options['seed'], keep=options['keep']).run(port)
+                    result['server'] = kind
+                    if options['json']:
+                        self.stdout.write(json.dumps(result))
+                        continue
+                    self.stdout.write(
+                        f"{kind:>7} {result['uploads']:>8} {result['cvs']:>6} {result['errors']:>7} {result['done']:>6} "
+                        f"{_ms(result['upload_p50']) + '/' + _ms(result['upload_p95']):>18} "
+                        f"{result['wall_seconds']:>8.2f} {result['uploads_per_second']:>10.2f} {result['throughput']:>7.1f}"
+                    )
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS('Async upload benchmark complete (fake Gemini backend).'))
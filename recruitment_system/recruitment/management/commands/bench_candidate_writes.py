@@ -0,0 +1,72 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from recruitment.models import Candidate
+from recruitment.screening import save_candidates
+
+
+def save_candidates_one_by_one(entries):
+    # Per-row get_or_create + save, as candidates were persisted before bulk upserts
+    candidates = []
+    for cv_data, match_score, job_title, cv_file in entries:
+        candidate, created = Candidate.objects.get_or_create(
+            email=cv_data['email'],
+            defaults={'name': cv_data['name'], 'match_score': match_score, 'cv_data': cv_data, 'job_title': job_title, 'cv_file': cv_file},
+        )
+        if not created:
+            candidate.name = cv_data['name']
+            candidate.match_score = match_score
+            candidate.cv_data = cv_data
+            candidate.job_title = job_title
+            candidate.cv_file = cv_file
+            candidate.save()
+        candidates.append(candidate)
+    return candidates
+
+
+class Command(BaseCommand):
+    help = 'Compare query counts and wall time of per-row and bulk candidate writes (changes are rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[80, 5000])
+
+    def _entries(self, prefix, size, score):
+        return [
+            ({
+                'name': f'Bench Candidate {i}',
+                'email': f'{prefix}-{i}@bench.invalid',
+                'skills': ['siem', 'python', 'network security'],
+                'experience': ['3 years as security analyst'],
+                'education': ["bachelor's in computer science"],
+                'certifications': ['CISSP'],
+            }, score, 'Benchmark Role', f'cvs/bench-{i}.pdf')
+            for i in range(size)
+        ]
+
+    def _measure(self, func, entries):
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            started = time.perf_counter()
+            with transaction.atomic():
+                func(entries)
+            elapsed = time.perf_counter() - started
+        return len(queries), elapsed
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'size':>6} {'scenario':<8} {'strategy':<10} {'queries':>8} {'seconds':>9}")
+        for size in options['sizes']:
+            with transaction.atomic():
+                for scenario, strategy, func, prefix, score in [
+                    ('insert', 'per-row', save_candidates_one_by_one, 'row', 50.0),
+                    ('insert', 'bulk', save_candidates, 'bulk', 50.0),
+                    ('update', 'per-row', save_candidates_one_by_one, 'row', 75.0),
+                    ('update', 'bulk', save_candidates, 'bulk', 75.0),
+                ]:
+                    count, elapsed = self._measure(func, self._entries(f'{prefix}-{size}', size, score))
+                    self.stdout.write(f"{size:>6} {scenario:<8} {strategy:<10} {count:>8} {elapsed:>9.3f}")
+                transaction.set_rollback(True)
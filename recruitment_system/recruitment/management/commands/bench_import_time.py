@@ -0,0 +1,85 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Commands that should start without importing the Gemini SDK
+TARGETS = {
+    'check': ['check'],
+    'worker': ['process_screening_tasks', '--once'],
+}
+LAZY_MODULES = ('google.generativeai', 'google.api_core')
+
+
+def parse_importtime(stderr):
+    """Return {module: (self us, cumulative us, depth)} from `python -X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(own), int(cumulative), depth)
+    return modules
+
+
+def measure(args):
+    """Run manage.py `args` under -X importtime; return (wall seconds, modules)."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', 'manage.py', *args],
+        cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+    )
+    wall_seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        raise CommandError(f"manage.py {' '.join(args)} failed: {result.stderr[-2000:]}")
+    return wall_seconds, parse_importtime(result.stderr)
+
+
+class Command(BaseCommand):
+    help = 'Measure import time of manage.py check and a worker cold start against a budget (python -X importtime).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--targets', nargs='+', choices=sorted(TARGETS), default=sorted(TARGETS), help='Commands to measure.')
+        parser.add_argument('--runs', type=int, default=3, help='Runs per target; the median is reported.')
+        parser.add_argument('--budget-ms', type=float, default=400.0, help='Maximum total import time per target, in milliseconds.')
+        parser.add_argument('--top', type=int, default=10, help='Number of slowest top-level imports to list.')
+        parser.add_argument('--json', action='store_true', help='Print one JSON object per target instead of a table.')
+
+    def handle(self, *args, **options):
+        over_budget = []
+        for target in options['targets']:
+            runs = [measure(TARGETS[target]) for _ in range(options['runs'])]
+            import_ms = [sum(own for own, _, _ in modules.values()) / 1000 for _, modules in runs]
+            median_run = runs[import_ms.index(statistics.median_low(import_ms))]
+            modules = median_run[1]
+            top = sorted(((cumulative, name) for name, (_, cumulative, depth) in modules.items() if depth == 0), reverse=True)
+            result = {
+                'target': target,
+                'import_ms': statistics.median(import_ms),
+                'wall_ms': statistics.median(wall for wall, _ in runs) * 1000,
+                'modules': len(modules),
+                'lazy_modules_imported': [name for name in LAZY_MODULES if name in modules],
+                'top': [{'module': name, 'cumulative_ms': cumulative / 1000} for cumulative, name in top[:options['top']]],
+            }
+            if result['import_ms'] > options['budget_ms'] or result['lazy_modules_imported']:
+                over_budget.append(target)
+            if options['json']:
+                self.stdout.write(json.dumps(result))
+                continue
+            self.stdout.write(
+                f"{target}: {result['import_ms']:.0f} ms importing {result['modules']} modules "
+                f"(budget {options['budget_ms']:.0f} ms), {result['wall_ms']:.0f} ms wall"
+            )
+            if result['lazy_modules_imported']:
+                self.stdout.write(self.style.WARNING(f"  imported eagerly: {', '.join(result['lazy_modules_imported'])}"))
+            for row in result['top']:
+                self.stdout.write(f"  {row['cumulative_ms']:>8.1f} ms  {row['module']}")
+        if over_budget:
+            raise CommandError(f"Import time over budget or Gemini SDK imported eagerly: {', '.join(over_budget)}")
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS('Import time within budget.'))
@@ -0,0 +1,59 @@
+import json
+from django.core.management.base import BaseCommand
+from recruitment.loadtest import PipelineBenchmark, fake_gemini_backend
+
+
+def _ms(seconds):
+    return f'{seconds * 1000:.0f}' if seconds is not None else '-'
+
+
+def _rpm(rate):
+    return f'{rate:.1f}' if rate is not None else '-'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark upload-to-shortlist screening end to end against the offline fake Gemini backend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 80, 1000], help='Number of synthetic CVs per run.')
+        parser.add_argument('--latency', type=float, default=None, help='Fake Gemini seconds per request (default FAKE_GEMINI_LATENCY).')
+        parser.add_argument('--quota-rate', type=float, default=None, help='Share of requests failing with ResourceExhausted.')
+        parser.add_argument('--error-rate', type=float, default=None, help='Share of requests failing with ServiceUnavailable.')
+        parser.add_argument('--malformed-rate', type=float, default=None, help='Share of responses cut short.')
+        parser.add_argument('--rpm', type=int, default=0, help='Starting and maximum Gemini requests per minute (0 = unpaced until quota errors).')
+        parser.add_argument('--quota-rpm', type=int, default=None, help='Simulated per-minute quota enforced by the fake backend.')
+        parser.add_argument('--claim-size', type=int, default=None, help='CV tasks claimed per worker iteration.')
+        parser.add_argument('--seed', type=int, default=0, help='Seeds both the synthetic corpus and fault injection.')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark batches, candidates and files.')
+        parser.add_argument('--json', action='store_true', help='Print one JSON object per run instead of a table.')
+
+    def handle(self, *args, **options):
+        if not options['json']:
+            self.stdout.write(
+                f"{'cvs':>6} {'done':>6} {'failed':>6} {'upload p50/p95 ms':>18} {'cv p50/p95 ms':>16} "
+                f"{'worker s':>9} {'cv/s':>7} {'api calls':>10} {'calls/cv':>9} {'429s':>5} {'5xx':>5} {'deferred':>9} {'end rpm':>8} {'local %':>8}"
+            )
+        with fake_gemini_backend(
+            latency=options['latency'],
+            quota_rate=options['quota_rate'],
+            error_rate=options['error_rate'],
+            malformed_rate=options['malformed_rate'],
+            requests_per_minute=options['rpm'],
+            seed=options['seed'],
+            quota_rpm=options['quota_rpm'],
+        ):
+            for size in options['sizes']:
+                result = PipelineBenchmark(size, seed=options['seed'], keep=options['keep']).run(claim_size=options['claim_size'])
+                if options['json']:
+                    self.stdout.write(json.dumps(result))
+                    continue
+                self.stdout.write(
+                    f"{result['cvs']:>6} {result['done']:>6} {result['failed']:>6} "
+                    f"{_ms(result['upload_p50']) + '/' + _ms(result['upload_p95']):>18} "
+                    f"{_ms(result['turnaround_p50']) + '/' + _ms(result['turnaround_p95']):>16} "
+                    f"{result['worker_seconds']:>9.2f} {result['throughput']:>7.1f} {result['api_calls']:>10} "
+                    f"{result['api_calls_per_cv']:>9.2f} {result['quota_errors']:>5} {result['server_errors']:>5} "
+                    f"{result['deferred']:>9} {_rpm(result['rate_control']['rate']):>8} {result['llm_avoidance_rate'] * 100:>8.1f}"
+                )
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS('Pipeline benchmark complete (fake Gemini backend).'))
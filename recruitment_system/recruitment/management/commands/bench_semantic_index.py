@@ -0,0 +1,61 @@
+import random
+import statistics
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from recruitment.embeddings import HashedTfidfEmbedder, SYNONYMS
+from recruitment.scoring import JD_SKILLS, RELATED_SKILLS, CYBERSECURITY_ROLES
+from recruitment.semantic_index import VectorIndex
+
+FILLER = [
+    'led', 'team', 'managed', 'incident', 'response', 'reports', 'cloud', 'on-call', 'compliance',
+    'audits', 'automation', 'customers', 'training', 'design', 'reviews', 'threat', 'hunting', 'policy',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark semantic index build and top-k query latency over synthetic candidates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--dim', type=int, default=512)
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Candidates embedded per index write.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _text(self, rng, vocabulary):
+        skills = ', '.join(rng.sample(vocabulary, rng.randint(3, 10)))
+        experience = ' '.join(rng.choice(FILLER) for _ in range(rng.randint(8, 25)))
+        return f"{skills}\n{rng.randint(0, 15)} years {rng.choice(CYBERSECURITY_ROLES)} {experience}\nbachelor's in computer science"
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = JD_SKILLS + RELATED_SKILLS + CYBERSECURITY_ROLES + list(SYNONYMS)
+        embedder = HashedTfidfEmbedder(dim=options['dim'])
+        total = options['candidates']
+        with tempfile.TemporaryDirectory() as path:
+            index = VectorIndex(path, embedder)
+            started = time.perf_counter()
+            for start in range(0, total, options['chunk_size']):
+                ids = range(start + 1, min(total, start + options['chunk_size']) + 1)
+                index.add(list(ids), [self._text(rng, vocabulary) for _ in ids])
+            build = time.perf_counter() - started
+            self.stdout.write(f"Indexed {len(index)} candidates (dim {options['dim']}) in {build:.2f}s "
+                              f"({total / build:.0f}/s), {index.stats()['size_bytes'] / 2 ** 20:.1f} MiB on disk")
+
+            queries = [self._text(rng, vocabulary) for _ in range(options['queries'])]
+            started = time.perf_counter()
+            index.query(queries[0], k=options['top'])
+            self.stdout.write(f"First query (computes row norms): {(time.perf_counter() - started) * 1000:.1f} ms")
+            latencies = []
+            for text in queries:
+                started = time.perf_counter()
+                index.query(text, k=options['top'])
+                latencies.append((time.perf_counter() - started) * 1000)
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(self.style.SUCCESS(
+                f"top-{options['top']} query latency over {len(index)} candidates: "
+                f"p50 {statistics.median(latencies):.1f} ms, p95 {p95:.1f} ms, mean {statistics.fmean(latencies):.1f} ms"
+            ))
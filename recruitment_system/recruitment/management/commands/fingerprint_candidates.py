@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from recruitment.models import CandidateFingerprint
+from recruitment.near_duplicates import backfill_fingerprints
+
+
+class Command(BaseCommand):
+    help = 'Fingerprint the CV text of stored candidates without one, so new uploads can be matched against them as near-duplicates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200, help='Candidates parsed per round.')
+
+    def handle(self, *args, **options):
+        stored = backfill_fingerprints(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Fingerprinted {stored} candidate(s); {CandidateFingerprint.objects.count()} fingerprint(s) stored.'
+        ))
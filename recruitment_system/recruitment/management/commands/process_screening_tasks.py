@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from recruitment.screening import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Run a screening worker that drains queued JD summaries and CV extraction tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty instead of polling forever.')
+        parser.add_argument('--poll-interval', type=float, default=None, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--claim-size', type=int, default=None, help='Number of CV tasks to claim per iteration.')
+
+    def handle(self, *args, **options):
+        try:
+            run_worker(
+                once=options['once'],
+                poll_interval=options['poll_interval'],
+                claim_size=options['claim_size'],
+            )
+        except KeyboardInterrupt:
+            self.stdout.write('Screening worker stopped.')
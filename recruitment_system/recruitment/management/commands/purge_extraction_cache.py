@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from recruitment import extraction_cache
+from recruitment.models import ExtractionCacheEntry
+
+
+class Command(BaseCommand):
+    help = 'Delete cached CV/JD extraction results, e.g. after a prompt change.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prompt-version', help='Only delete entries produced by this prompt version (e.g. cv-v1).')
+        parser.add_argument('--kind', choices=[kind for kind, _ in ExtractionCacheEntry.KIND_CHOICES], help='Only delete CV or JD entries.')
+        parser.add_argument('--all', action='store_true', help='Delete every cached entry.')
+
+    def handle(self, *args, **options):
+        if not options['all'] and not options['prompt_version']:
+            raise CommandError('Pass --prompt-version to purge one prompt version, or --all to clear the cache.')
+        deleted = extraction_cache.purge(prompt_version=options['prompt_version'], kind=options['kind'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} cached extraction(s).'))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from recruitment.models import Application, Candidate, ScreeningBatch
+from recruitment.rescoring import CandidateFeatures
+from recruitment.screening import get_job
+
+
+class Command(BaseCommand):
+    help = 'Rank every stored candidate against a JD summary using their saved CV data (no Gemini calls).'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--summary', help='JD summary text to score against.')
+        source.add_argument('--summary-file', help='Path to a text file containing the JD summary.')
+        source.add_argument('--batch', type=int, help='Reuse the JD summary of a screening batch.')
+        parser.add_argument('--min-score', type=float, default=0.0, help='Only list candidates scoring at least this much.')
+        parser.add_argument('--top', type=int, default=20, help='Number of candidates to list (0 for all).')
+        parser.add_argument('--semantic-weight', type=float, default=None, help='Blend in semantic similarity with this weight (0-1); defaults to SEMANTIC_SCORE_WEIGHT when semantic scoring is enabled.')
+        parser.add_argument('--save', action='store_true', help='Store the new scores on the candidates.')
+        parser.add_argument('--job-title', help='Job title to store with --save.')
+
+    def handle(self, *args, **options):
+        job_title = options['job_title']
+        batch = None
+        if options['summary_file']:
+            try:
+                with open(options['summary_file'], encoding='utf-8') as fh:
+                    summary = fh.read()
+            except OSError as e:
+                raise CommandError(f'Could not read {options["summary_file"]}: {e}')
+        elif options['batch']:
+            batch = ScreeningBatch.objects.filter(pk=options['batch']).first()
+            if batch is None or not batch.jd_data:
+                raise CommandError(f'Batch {options["batch"]} does not exist or has no JD summary yet.')
+            summary = batch.jd_data.get('summary', '')
+            job_title = job_title or batch.job_title
+        else:
+            summary = options['summary']
+
+        features = CandidateFeatures.load()
+        jd_data = {'job_title': job_title or '', 'summary': summary}
+        ranked = features.rank(jd_data, min_score=options['min_score'], semantic_weight=options['semantic_weight'])
+        for candidate in ranked[:options['top'] or None]:
+            self.stdout.write(f"{candidate['match_score']:6.2f}  {candidate['name']} <{candidate['email']}>")
+        self.stdout.write(self.style.SUCCESS(f'{len(ranked)} of {len(features)} candidate(s) scored at least {options["min_score"]:g}.'))
+
+        if options['save']:
+            scored = features.rank(jd_data, semantic_weight=options['semantic_weight'])
+            job = get_job(job_title or 'Unknown', batch.jd_data if batch else jd_data)
+            updates = [Candidate(pk=c['id'], match_score=c['match_score'], job_title=job.title) for c in scored]
+            applications = [Application(candidate_id=c['id'], job=job, batch=batch, match_score=c['match_score']) for c in scored]
+            with transaction.atomic():
+                Candidate.objects.bulk_update(updates, ['match_score', 'job_title'], batch_size=1000)
+                Application.objects.bulk_create(
+                    applications, batch_size=1000, update_conflicts=True,
+                    unique_fields=['candidate', 'job'], update_fields=['match_score', 'updated_at'],
+                )
+            self.stdout.write(self.style.SUCCESS(f'Saved scores for {len(updates)} candidate(s).'))
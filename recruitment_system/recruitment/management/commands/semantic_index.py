@@ -0,0 +1,26 @@
+import json
+from django.core.management.base import BaseCommand
+from recruitment.models import Candidate
+from recruitment.semantic_index import get_index, sync_candidates
+
+
+class Command(BaseCommand):
+    help = 'Build, inspect or query the local semantic index of candidate embeddings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync', action='store_true', help='Embed new or changed candidates and drop deleted ones.')
+        parser.add_argument('--rebuild', action='store_true', help='Discard the index and embed every candidate again.')
+        parser.add_argument('--query', help='JD text to find the nearest candidates for.')
+        parser.add_argument('--top', type=int, default=10, help='Number of candidates returned by --query.')
+
+    def handle(self, *args, **options):
+        if options['sync'] or options['rebuild']:
+            embedded, removed = sync_candidates(rebuild=options['rebuild'])
+            self.stdout.write(self.style.SUCCESS(f'Embedded {embedded} candidate(s), removed {removed}.'))
+        index = get_index()
+        if options['query']:
+            matches = index.query(options['query'], k=options['top'])
+            names = dict(Candidate.objects.filter(pk__in=[cid for cid, _ in matches]).values_list('id', 'name'))
+            for candidate_id, similarity in matches:
+                self.stdout.write(f"{similarity:.4f}  {names.get(candidate_id, '?')} (#{candidate_id})")
+        self.stdout.write(json.dumps(index.stats(), indent=2))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from recruitment.mailing import run_email_worker
+
+
+class Command(BaseCommand):
+    help = 'Run a dedicated worker that sends queued candidate emails (the screening worker also sends them).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no email is due instead of polling forever.')
+        parser.add_argument('--poll-interval', type=float, default=None, help='Seconds to sleep when nothing is due.')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Number of emails sent per SMTP connection.')
+
+    def handle(self, *args, **options):
+        try:
+            run_email_worker(
+                once=options['once'],
+                poll_interval=options['poll_interval'],
+                chunk_size=options['chunk_size'],
+            )
+        except KeyboardInterrupt:
+            self.stdout.write('Email worker stopped.')
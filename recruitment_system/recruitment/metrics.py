@@ -0,0 +1,204 @@
+import inspect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Process-wide counters and histograms for pipeline instrumentation
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_histograms = {}
+_last_flush = 0.0
+
+# Upper bounds (seconds) shared by every duration histogram
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROMETHEUS_PREFIX = 'talentscope_'
+_NAME_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+def increment(name, amount=1):
+    """Add `amount` to the named counter."""
+    with _lock:
+        _counters[name] += amount
+
+def get(name):
+    """Return the current value of the named counter."""
+    with _lock:
+        return _counters.get(name, 0)
+
+def snapshot():
+    """Return a copy of all counters."""
+    with _lock:
+        return dict(_counters)
+
+def observe(name, value):
+    """Record one observation (e.g. a duration in seconds) in the named histogram."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {'buckets': [0] * (len(DEFAULT_BUCKETS) + 1), 'sum': 0.0, 'count': 0}
+        histogram['buckets'][bisect_left(DEFAULT_BUCKETS, value)] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+@contextmanager
+def timer(name):
+    """Observe the wall time of the block in the named histogram, even if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+def timed(name):
+    """Decorator form of `timer`; coroutine functions are timed until they finish, not until they return a coroutine."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timer(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def histograms():
+    """Return a copy of all histograms as {name: {'buckets': [...], 'sum': float, 'count': int}}."""
+    with _lock:
+        return {name: {'buckets': list(h['buckets']), 'sum': h['sum'], 'count': h['count']} for name, h in _histograms.items()}
+
+def totals():
+    """Return counters plus `<histogram>_sum`/`<histogram>_count` in one flat dict, for computing deltas."""
+    values = snapshot()
+    for name, histogram in histograms().items():
+        values[f'{name}_sum'] = histogram['sum']
+        values[f'{name}_count'] = histogram['count']
+    return values
+
+def delta(before, after):
+    """Return the non-zero differences between two `totals()` results."""
+    changes = {}
+    for name, value in after.items():
+        change = value - before.get(name, 0)
+        if change:
+            changes[name] = change
+    return changes
+
+def reset():
+    """Clear all counters and histograms (used by benchmarks)."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+def _metrics_path(pid):
+    return os.path.join(settings.METRICS_DIR, f'{pid}.json')
+
+def flush(force=False):
+    """Write this process's metrics to METRICS_DIR so the /metrics view of another process can export them.
+
+    Writes at most once per METRICS_FLUSH_INTERVAL seconds unless `force` is set.
+    """
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush = now
+    path = _metrics_path(os.getpid())
+    try:
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        with open(f'{path}.tmp', 'w') as fh:
+            json.dump({'counters': snapshot(), 'histograms': histograms()}, fh)
+        os.replace(f'{path}.tmp', path)
+    except OSError as e:
+        logger.warning(f"Could not write metrics snapshot {path}: {str(e)}")
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _live_snapshot(name, path):
+    """Return True if `path` belongs to a running process and was refreshed within METRICS_SNAPSHOT_TTL; otherwise delete it."""
+    pid = name.split('.', 1)[0]
+    try:
+        fresh = time.time() - os.path.getmtime(path) < settings.METRICS_SNAPSHOT_TTL
+        if fresh and pid.isdigit() and _pid_alive(int(pid)):
+            return True
+        os.remove(path)
+        logger.info(f"Removed stale metrics snapshot {path}")
+    except OSError:
+        pass
+    return False
+
+def _collect():
+    """Merge this process's metrics with those flushed by other processes, pruning snapshots of exited or silent ones."""
+    counters = defaultdict(float, snapshot())
+    merged = histograms()
+    own = _metrics_path(os.getpid())
+    try:
+        names = os.listdir(settings.METRICS_DIR)
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        path = os.path.join(settings.METRICS_DIR, name)
+        if path == own or not name.endswith(('.json', '.tmp')):
+            continue
+        # A .tmp left by a crashed write is pruned like a snapshot but never read
+        if not _live_snapshot(name, path) or name.endswith('.tmp'):
+            continue
+        try:
+            with open(path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        for key, value in data.get('counters', {}).items():
+            counters[key] += value
+        for key, histogram in data.get('histograms', {}).items():
+            if len(histogram['buckets']) != len(DEFAULT_BUCKETS) + 1:
+                continue
+            target = merged.setdefault(key, {'buckets': [0] * (len(DEFAULT_BUCKETS) + 1), 'sum': 0.0, 'count': 0})
+            target['buckets'] = [a + b for a, b in zip(target['buckets'], histogram['buckets'])]
+            target['sum'] += histogram['sum']
+            target['count'] += histogram['count']
+    return counters, merged
+
+def _format_value(value):
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def render_prometheus():
+    """Return all metrics from every process in the Prometheus text exposition format."""
+    counters, merged = _collect()
+    lines = []
+    for name in sorted(counters):
+        metric = PROMETHEUS_PREFIX + _NAME_RE.sub('_', name) + '_total'
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric} {_format_value(counters[name])}')
+    for name in sorted(merged):
+        histogram = merged[name]
+        metric = PROMETHEUS_PREFIX + _NAME_RE.sub('_', name)
+        lines.append(f'# TYPE {metric} histogram')
+        cumulative = 0
+        for bound, count in zip(DEFAULT_BUCKETS + (float('inf'),), histogram['buckets']):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f'{metric}_sum {_format_value(histogram["sum"])}')
+        lines.append(f'{metric}_count {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-17 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment', '0004_screening_batches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractionCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('cv', 'CV extraction'), ('jd', 'JD summary')], max_length=10)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('prompt_version', models.CharField(max_length=50)),
+                ('model_name', models.CharField(max_length=100)),
+                ('data', models.JSONField(default=dict)),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='extractioncacheentry',
+            index=models.Index(fields=['prompt_version'], name='extraction_cache_prompt_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='extractioncacheentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'content_hash', 'prompt_version', 'model_name'), name='unique_extraction_cache_key'),
+        ),
+    ]
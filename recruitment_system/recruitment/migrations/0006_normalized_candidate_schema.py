@@ -0,0 +1,88 @@
+# Generated by Django 4.2 on 2026-10-17 04:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+CV_DATA_GIN_INDEX = 'candidate_cv_data_gin_idx'
+
+
+def create_cv_data_gin_index(apps, schema_editor):
+    # GIN indexes are PostgreSQL-only; other backends keep scanning cv_data
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {CV_DATA_GIN_INDEX} ON recruitment_candidate USING gin (cv_data jsonb_path_ops)'
+    )
+
+
+def drop_cv_data_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {CV_DATA_GIN_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment', '0005_extraction_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(db_index=True, max_length=255)),
+                ('jd_hash', models.CharField(max_length=64, unique=True)),
+                ('jd_data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CandidateSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('skill', 'Skill'), ('certification', 'Certification')], default='skill', max_length=20)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidate_skills', to='recruitment.candidate')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidate_skills', to='recruitment.skill')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Application',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_score', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='applications', to='recruitment.screeningbatch')),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='recruitment.candidate')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='recruitment.job')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='screeningbatch',
+            name='job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='batches', to='recruitment.job'),
+        ),
+        migrations.AddConstraint(
+            model_name='candidateskill',
+            constraint=models.UniqueConstraint(fields=('skill', 'candidate'), name='unique_candidate_skill'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', '-match_score'], name='application_job_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='application',
+            constraint=models.UniqueConstraint(fields=('candidate', 'job'), name='unique_candidate_job_application'),
+        ),
+        migrations.RunPython(create_cv_data_gin_index, drop_cv_data_gin_index),
+    ]
@@ -0,0 +1,102 @@
+import hashlib
+import json
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def normalize_skill(name):
+    # Frozen copy of Skill.normalize: migrations must not depend on the current model code
+    return ' '.join(str(name).lower().split())[:100]
+
+
+def content_hash(title, jd_data):
+    # Frozen copy of Job.content_hash
+    payload = json.dumps([title, jd_data or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def candidate_skill_names(cv_data):
+    names = {}
+    if not isinstance(cv_data, dict):
+        return names
+    for source, field in (('skill', 'skills'), ('certification', 'certifications')):
+        entries = cv_data.get(field) or []
+        if not isinstance(entries, list):
+            continue
+        for entry in entries:
+            name = normalize_skill(entry)
+            if name:
+                names.setdefault(name, source)
+    return names
+
+
+def populate(apps, schema_editor):
+    Candidate = apps.get_model('recruitment', 'Candidate')
+    Skill = apps.get_model('recruitment', 'Skill')
+    CandidateSkill = apps.get_model('recruitment', 'CandidateSkill')
+    Job = apps.get_model('recruitment', 'Job')
+    Application = apps.get_model('recruitment', 'Application')
+    ScreeningBatch = apps.get_model('recruitment', 'ScreeningBatch')
+
+    # A job is a title plus JD summary: each summarized batch gets the job of its own JD. Candidates
+    # only stored a title, so they (and unsummarized batches) apply to the title's most recent JD.
+    titles = set(Candidate.objects.values_list('job_title', flat=True)) | set(ScreeningBatch.objects.values_list('job_title', flat=True))
+    titles.discard('')
+    summarized = list(ScreeningBatch.objects.exclude(job_title='').exclude(jd_data={}).order_by('created_at').values_list('id', 'job_title', 'jd_data'))
+    jd_by_title = {title: jd_data for _, title, jd_data in summarized}
+    new_jobs = {content_hash(title, jd_data): (title, jd_data) for _, title, jd_data in summarized}
+    for title in titles:
+        jd_data = jd_by_title.get(title, {})
+        new_jobs.setdefault(content_hash(title, jd_data), (title, jd_data))
+    Job.objects.bulk_create(
+        [Job(title=title, jd_hash=jd_hash, jd_data=jd_data) for jd_hash, (title, jd_data) in new_jobs.items()],
+        ignore_conflicts=True,
+    )
+    job_ids = dict(Job.objects.values_list('jd_hash', 'id'))
+    for batch_id, title, jd_data in summarized:
+        ScreeningBatch.objects.filter(pk=batch_id, job__isnull=True).update(job_id=job_ids[content_hash(title, jd_data)])
+    jobs = {title: job_ids[content_hash(title, jd_by_title.get(title, {}))] for title in titles}
+    for title, job_id in jobs.items():
+        ScreeningBatch.objects.filter(job_title=title, job__isnull=True).update(job_id=job_id)
+
+    skill_ids = dict(Skill.objects.values_list('name', 'id'))
+    rows = Candidate.objects.order_by('id').values_list('id', 'cv_data', 'job_title', 'match_score')
+    chunk = []
+
+    def flush(chunk):
+        names = set()
+        for _, cv_data, _, _ in chunk:
+            names.update(candidate_skill_names(cv_data))
+        missing = [Skill(name=name) for name in names if name not in skill_ids]
+        if missing:
+            Skill.objects.bulk_create(missing, ignore_conflicts=True)
+            skill_ids.update(Skill.objects.filter(name__in=[s.name for s in missing]).values_list('name', 'id'))
+        links = []
+        applications = []
+        for candidate_id, cv_data, job_title, match_score in chunk:
+            for name, source in candidate_skill_names(cv_data).items():
+                links.append(CandidateSkill(candidate_id=candidate_id, skill_id=skill_ids[name], source=source))
+            if job_title in jobs:
+                applications.append(Application(candidate_id=candidate_id, job_id=jobs[job_title], match_score=match_score))
+        CandidateSkill.objects.bulk_create(links, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        Application.objects.bulk_create(applications, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        chunk.append(row)
+        if len(chunk) >= BATCH_SIZE:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment', '0006_normalized_candidate_schema'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
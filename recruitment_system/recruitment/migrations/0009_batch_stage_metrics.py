@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment', '0008_email_campaigns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningbatch',
+            name='stage_metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
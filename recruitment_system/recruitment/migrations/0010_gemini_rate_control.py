@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-17 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment', '0009_batch_stage_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeminiRateState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('rate', models.FloatField(blank=True, null=True)),
+                ('blocked_until', models.DateTimeField(blank=True, null=True)),
+                ('decreased_at', models.DateTimeField(blank=True, null=True)),
+                ('workers', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='screeningbatch',
+            name='deferrals',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='screeningtask',
+            name='deferrals',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
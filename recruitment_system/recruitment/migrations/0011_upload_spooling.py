@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-17 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment', '0010_gemini_rate_control'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningtask',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='screeningtask',
+            name='cv_text',
+            field=models.TextField(blank=True),
+        ),
+    ]
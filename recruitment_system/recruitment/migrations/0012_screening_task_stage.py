@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment', '0011_upload_spooling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningtask',
+            name='stage',
+            field=models.CharField(blank=True, choices=[('parsed', 'Parsed'), ('extracted', 'Extracted'), ('scored', 'Scored')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-17 05:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment', '0012_screening_task_stage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateFingerprint',
+            fields=[
+                ('candidate', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='recruitment.candidate')),
+                ('text_hash', models.CharField(db_index=True, max_length=64)),
+            ],
+        ),
+    ]
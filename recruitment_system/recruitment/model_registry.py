@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from . import metrics
+from .llm_client import llm_client
+
+logger = logging.getLogger(__name__)
+
+PREFERRED_MODEL = 'gemini-2.0-flash'  # Set to desired model
+FALLBACK_MODEL = 'gemini-1.5-flash'   # Fallback if gemini-2.0-flash is unavailable
+
+# Before the registry every document listed models twice: once to validate the key, once to pick a model
+LISTINGS_PER_LOOKUP = 2
+
+class ModelRegistry:
+    """Resolve and validate the Gemini model once per process and share a single GenerativeModel."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._model_name = None
+        self._model = None
+        self._resolved_at = None
+
+    def _is_fresh(self):
+        return self._model is not None and (time.monotonic() - self._resolved_at) < self.ttl
+
+    def _list_generation_models(self):
+        metrics.increment('gemini_model_listing_calls')
+        models = llm_client.list_models()
+        return [m.name.split('/')[-1] for m in models if 'generateContent' in m.supported_generation_methods]
+
+    def _select(self, available_models):
+        logger.debug(f"Available models: {available_models}")
+        if PREFERRED_MODEL in available_models:
+            logger.debug(f"Selected model: {PREFERRED_MODEL}")
+            return PREFERRED_MODEL
+
+        logger.warning(f"Preferred model {PREFERRED_MODEL} not available. Falling back to {FALLBACK_MODEL}")
+        if FALLBACK_MODEL in available_models:
+            logger.debug(f"Selected fallback model: {FALLBACK_MODEL}")
+            return FALLBACK_MODEL
+
+        if available_models:
+            model = available_models[0]
+            logger.debug(f"Fallback to first available model: {model}")
+            return model
+
+        logger.error("No models supporting generateContent found")
+        return None
+
+    def _resolve(self, force_refresh):
+        if not force_refresh and self._is_fresh():
+            metrics.increment('gemini_model_listing_calls_saved', LISTINGS_PER_LOOKUP)
+            return
+        try:
+            available_models = self._list_generation_models()
+        except Exception as e:
+            logger.error(f"Invalid Google API key or connectivity issue: {str(e)}")
+            self._model_name = self._model = self._resolved_at = None
+            raise
+        metrics.increment('gemini_model_listing_calls_saved', LISTINGS_PER_LOOKUP - 1)
+        model_name = self._select(available_models)
+        if model_name != self._model_name or self._model is None:
+            logger.info(f"Resolved Gemini model: {model_name}")
+        self._model_name = model_name
+        self._model = llm_client.GenerativeModel(model_name) if model_name else None
+        self._resolved_at = time.monotonic()
+
+    def get_model_name(self, force_refresh=False):
+        """Return the selected model name, listing models only when the cache is stale or a refresh is forced."""
+        with self._lock:
+            try:
+                self._resolve(force_refresh)
+            except Exception:
+                return None
+            return self._model_name
+
+    def cached_model_name(self):
+        """Return the model name resolved so far, or None, without listing models."""
+        return self._model_name
+
+    def get_model(self, force_refresh=False):
+        """Return the shared GenerativeModel instance, or None if no model is available."""
+        with self._lock:
+            try:
+                self._resolve(force_refresh)
+            except Exception:
+                return None
+            return self._model
+
+    def invalidate(self):
+        """Forget the cached model so the next lookup lists models again."""
+        with self._lock:
+            self._model_name = self._model = self._resolved_at = None
+
+    def stats(self):
+        """Return listing counters and the currently cached model."""
+        with self._lock:
+            age = time.monotonic() - self._resolved_at if self._resolved_at is not None else None
+            return {
+                'model_name': self._model_name,
+                'age_seconds': round(age, 1) if age is not None else None,
+                'listing_calls': int(metrics.get('gemini_model_listing_calls')),
+                'listing_calls_saved': int(metrics.get('gemini_model_listing_calls_saved')),
+            }
+
+model_registry = ModelRegistry(ttl=settings.GEMINI_MODEL_TTL)
@@ -1,5 +1,8 @@
 
+import hashlib
+import json
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 class UserProfile(models.Model):
@@ -25,3 +28,290 @@ class Candidate(models.Model):
     def __str__(self):
         return f"{self.name} ({self.email})"
 
+class CandidateFingerprint(models.Model):
+    """Hash of a candidate's normalized CV text, so a re-uploaded copy of the same CV reuses its CV data."""
+
+    candidate = models.OneToOneField(Candidate, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    text_hash = models.CharField(max_length=64, db_index=True)  # near_duplicates.fingerprint
+
+    def __str__(self):
+        return f"{self.candidate_id}: {self.text_hash[:12]}"
+
+class Skill(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    @staticmethod
+    def normalize(name):
+        """Return the canonical (lower-cased, single-spaced) form of a skill name."""
+        return ' '.join(str(name).lower().split())[:100]
+
+    def __str__(self):
+        return self.name
+
+class CandidateSkill(models.Model):
+    SOURCE_SKILL = 'skill'
+    SOURCE_CERTIFICATION = 'certification'
+    SOURCE_CHOICES = [
+        (SOURCE_SKILL, 'Skill'),
+        (SOURCE_CERTIFICATION, 'Certification'),
+    ]
+
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='candidate_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='candidate_skills')
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default=SOURCE_SKILL)
+
+    class Meta:
+        constraints = [
+            # Skill first, so "candidates with skill X" is a prefix scan of the constraint's index
+            models.UniqueConstraint(fields=['skill', 'candidate'], name='unique_candidate_skill'),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate_id}: {self.skill_id} ({self.source})"
+
+class Job(models.Model):
+    title = models.CharField(max_length=255, db_index=True)
+    jd_hash = models.CharField(max_length=64, unique=True)  # Job.content_hash of the title and JD summary
+    jd_data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    def content_hash(title, jd_data):
+        """Return the SHA-256 identifying a job: different JDs under one title are different jobs, each with its own applications."""
+        payload = json.dumps([title, jd_data or {}], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def __str__(self):
+        return self.title
+
+class ApplicationQuerySet(models.QuerySet):
+    def for_job(self, job_title):
+        return self.filter(job__title=job_title)
+
+    def min_score(self, score):
+        return self.filter(match_score__gte=score)
+
+    def with_skills(self, *skills):
+        """Keep applications whose candidate has every one of `skills` (or certifications)."""
+        queryset = self
+        for skill in skills:
+            queryset = queryset.filter(candidate__candidate_skills__skill__name=Skill.normalize(skill))
+        return queryset
+
+class Application(models.Model):
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='applications')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
+    batch = models.ForeignKey('ScreeningBatch', null=True, blank=True, on_delete=models.SET_NULL, related_name='applications')
+    match_score = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ApplicationQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'job'], name='unique_candidate_job_application'),
+        ]
+        indexes = [
+            models.Index(fields=['job', '-match_score'], name='application_job_score_idx'),
+        ]
+
+    @property
+    def is_shortlisted(self):
+        """Return True if the application's match_score is 70 or higher."""
+        return self.match_score >= 70
+
+    def __str__(self):
+        return f"{self.candidate_id} -> {self.job_id} ({self.match_score})"
+
+
+class ScreeningBatch(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SUMMARIZING = 'summarizing'
+    STATUS_PROCESSING = 'processing'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SUMMARIZING, 'Summarizing job description'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='screening_batches')
+    job = models.ForeignKey(Job, null=True, blank=True, on_delete=models.SET_NULL, related_name='batches')
+    jd_file = models.CharField(max_length=255)
+    jd_data = models.JSONField(default=dict, blank=True)
+    job_title = models.CharField(max_length=255, default='Unknown')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    error = models.TextField(blank=True)
+    stage_metrics = models.JSONField(default=dict, blank=True)  # Per-stage timings and counters accumulated by workers
+    deferrals = models.PositiveIntegerField(default=0)  # Times the JD was requeued because Gemini quota ran out
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def is_finished(self):
+        """Return True once the batch can no longer make progress."""
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+    def __str__(self):
+        return f"Batch {self.pk} - {self.job_title} ({self.status})"
+
+class ScreeningTask(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    # Furthest pipeline step a CV has reached, streamed to the progress page; '' = queued
+    STAGE_PARSED = 'parsed'
+    STAGE_EXTRACTED = 'extracted'
+    STAGE_SCORED = 'scored'
+    STAGE_CHOICES = [
+        (STAGE_PARSED, 'Parsed'),
+        (STAGE_EXTRACTED, 'Extracted'),
+        (STAGE_SCORED, 'Scored'),
+    ]
+
+    batch = models.ForeignKey(ScreeningBatch, on_delete=models.CASCADE, related_name='tasks')
+    file_name = models.CharField(max_length=255)
+    cv_file = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64, blank=True)  # SHA-256 computed while the CV was uploaded
+    cv_text = models.TextField(blank=True)  # Text parsed during upload, cleared once the task finishes; empty = parse in the worker
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    deferrals = models.PositiveIntegerField(default=0)  # Times the CV was requeued because Gemini quota ran out
+    error = models.TextField(blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    candidate = models.ForeignKey(Candidate, null=True, blank=True, on_delete=models.SET_NULL, related_name='screening_tasks')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='screening_task_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
+
+class EmailCampaign(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_SENDING = 'sending'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_COMPLETED, 'Completed'),
+    ]
+
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='email_campaigns')
+    batch = models.ForeignKey(ScreeningBatch, null=True, blank=True, on_delete=models.SET_NULL, related_name='email_campaigns')
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def is_finished(self):
+        """Return True once every recipient has been sent or has failed for good."""
+        return self.status == self.STATUS_COMPLETED
+
+    def __str__(self):
+        return f"Campaign {self.pk} - {self.subject} ({self.status})"
+
+class EmailDelivery(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    campaign = models.ForeignKey(EmailCampaign, on_delete=models.CASCADE, related_name='deliveries')
+    candidate = models.ForeignKey(Candidate, null=True, blank=True, on_delete=models.SET_NULL, related_name='email_deliveries')
+    email = models.EmailField()
+    name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'email'], name='unique_campaign_recipient'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_delivery_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.email} ({self.status})"
+
+class GeminiRateState(models.Model):
+    """Gemini request rate shared by all screening workers (GEMINI_RATE_COORDINATION='db')."""
+
+    key = models.CharField(max_length=50, unique=True)
+    rate = models.FloatField(null=True, blank=True)  # Requests per minute across all workers; null = not yet limited
+    blocked_until = models.DateTimeField(null=True, blank=True)
+    decreased_at = models.DateTimeField(null=True, blank=True)
+    workers = models.JSONField(default=dict, blank=True)  # Worker id -> last heartbeat (Unix time)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.rate or 'unlimited'} requests/minute"
+
+class ExtractionCacheEntry(models.Model):
+    KIND_CV = 'cv'
+    KIND_JD = 'jd'
+    KIND_CHOICES = [
+        (KIND_CV, 'CV extraction'),
+        (KIND_JD, 'JD summary'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    content_hash = models.CharField(max_length=64)
+    prompt_version = models.CharField(max_length=50)
+    model_name = models.CharField(max_length=100)
+    data = models.JSONField(default=dict)
+    size_bytes = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'content_hash', 'prompt_version', 'model_name'], name='unique_extraction_cache_key'),
+        ]
+        indexes = [
+            models.Index(fields=['prompt_version'], name='extraction_cache_prompt_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.content_hash[:12]} ({self.prompt_version}, {self.model_name})"
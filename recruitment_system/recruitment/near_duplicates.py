@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import os
+import re
+from django.conf import settings
+from . import metrics, pdf_text
+from .models import Candidate, CandidateFingerprint
+from .prompt_text import PAGE_BREAK, normalize_text, strip_repeated_lines
+
+logger = logging.getLogger(__name__)
+
+MIN_WORDS = 20  # Distinct words below which a text is too small to identify a CV
+# Words and numbers alike: years of experience change the score, so they must match too
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*')
+_MONTH = r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?'
+# Calendar dates and phone numbers do not change the score, so they are dropped before hashing and a CV
+# that only updates them is still a duplicate. Scoring reads experience from "N years", which none match.
+_MONTH_DATE_RE = re.compile(rf'\b(?:\d{{1,2}}(?:st|nd|rd|th)?\s+)?{_MONTH}\s+(?:\d{{1,2}}(?:st|nd|rd|th)?,?\s+)?\d{{4}}\b')
+_PHONE_RE = re.compile(r'\+?\(?\d(?:[ ().-]{0,3}\d){6,14}\b')
+_NUMERIC_DATE_RE = re.compile(
+    r'\b\d{4}[/.-]\d{1,2}(?:[/.-]\d{1,2})?\b'  # 2021-03-05, 2021/03
+    r'|\b\d{1,2}[/.-](?:\d{1,2}[/.-])?\d{4}\b'  # 05/03/2021, 03/2021
+    r'|\b(?:19|20)\d{2}\b'  # bare years
+)
+
+def normalized_text(text):
+    """Return the words of `text` in order and lower-cased, without page numbers, repeated headers/footers, dates or phone numbers."""
+    lines, _ = strip_repeated_lines(normalize_text(text or ''))
+    text = '\n'.join(lines).lower()
+    # Month-name dates go first so their year is not read as the end of a phone number, and phone numbers
+    # before numeric dates so a number ending in four digits is not read as a year
+    for pattern in (_MONTH_DATE_RE, _PHONE_RE, _NUMERIC_DATE_RE):
+        text = pattern.sub(' ', text)
+    return ' '.join(_TOKEN_RE.findall(text))
+
+def fingerprint(text):
+    """Return the SHA-256 of `text`'s normalized words, or None if the text is too short to fingerprint.
+
+    Layout changes (a re-exported PDF, different spacing, bullets or running headers) and new phone
+    numbers or calendar dates keep the fingerprint; any added, removed or changed word or other
+    number, such as years of experience, gives a new one, so an updated CV is extracted again.
+    """
+    words = normalized_text(text)
+    if len(set(words.split())) < MIN_WORDS:
+        return None
+    return hashlib.sha256(words.encode('utf-8')).hexdigest()
+
+def find_near_duplicates(entries):
+    """Match (fingerprint, email) entries against stored candidates and against each other.
+
+    A match needs the same fingerprint and the same email, so CVs built from one template by
+    different people stay apart. Entries without a fingerprint or email are skipped. Returns
+    (reused, copies): {position: cv_data} for entries matching a stored candidate, whose data can
+    be used as is, and {position: earlier position} for entries matching an earlier entry, which
+    can take that entry's result once it is extracted.
+    """
+    reused, copies = {}, {}
+    if not settings.NEAR_DUPLICATE_DETECTION_ENABLED:
+        return reused, copies
+    with metrics.timer('near_duplicate_lookup_seconds'):
+        keys = [(digest, email.lower()) if digest and email else None for digest, email in entries]
+        stored = {
+            (digest, email.lower()): candidate_id
+            for candidate_id, digest, email in CandidateFingerprint.objects.filter(
+                text_hash__in={key[0] for key in keys if key}
+            ).values_list('candidate_id', 'text_hash', 'candidate__email')
+        }
+        matched = {}
+        first = {}
+        for position, key in enumerate(keys):
+            if key is None:
+                continue
+            if key in stored:
+                matched[position] = stored[key]
+            elif key in first:
+                copies[position] = first[key]
+            else:
+                first[key] = position
+        if matched:
+            cv_data = dict(Candidate.objects.filter(pk__in=set(matched.values())).values_list('id', 'cv_data'))
+            reused = {position: dict(cv_data[candidate_id]) for position, candidate_id in matched.items() if cv_data.get(candidate_id)}
+    metrics.increment('near_duplicates_stored', len(reused))
+    metrics.increment('near_duplicates_in_batch', len(copies))
+    if reused or copies:
+        logger.info(f"Reusing extractions for {len(reused)} duplicate(s) of stored candidates and {len(copies)} within the batch")
+    return reused, copies
+
+def store_fingerprints(pairs):
+    """Create or update the fingerprints of (candidate_id, fingerprint) pairs in one upsert."""
+    rows = {
+        candidate_id: CandidateFingerprint(candidate_id=candidate_id, text_hash=digest)
+        for candidate_id, digest in pairs
+        if candidate_id is not None and digest is not None
+    }
+    if not rows:
+        return
+    CandidateFingerprint.objects.bulk_create(list(rows.values()), update_conflicts=True, unique_fields=['candidate'], update_fields=['text_hash'])
+
+def backfill_fingerprints(chunk_size=200):
+    """Fingerprint stored candidates that have none yet by parsing their CV files; return the number stored."""
+    stored = 0
+    last_id = 0
+    while True:
+        chunk = list(
+            Candidate.objects.filter(pk__gt=last_id, fingerprint__isnull=True).exclude(cv_file='')
+            .order_by('pk').values_list('pk', 'cv_file')[:chunk_size]
+        )
+        if not chunk:
+            return stored
+        last_id = chunk[-1][0]
+        paths = [os.path.join(settings.MEDIA_ROOT, cv_file) for _, cv_file in chunk]
+        texts = pdf_text.extract_texts(paths, max_chars=settings.PROMPT_SOURCE_MAX_CHARS, page_prefix=PAGE_BREAK)
+        pairs = [(candidate_id, fingerprint(text)) for (candidate_id, _), text in zip(chunk, texts) if text]
+        store_fingerprints(pairs)
+        stored += sum(1 for _, digest in pairs if digest is not None)
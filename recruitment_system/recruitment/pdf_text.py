@@ -0,0 +1,155 @@
+import atexit
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import PyPDF2
+from django.conf import settings
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+class PDFLimitExceeded(Exception):
+    pass
+
+def _source_size(source):
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    position = source.tell()
+    source.seek(0, os.SEEK_END)
+    size = source.tell()
+    source.seek(position)
+    return size
+
+@metrics.timed('pdf_parse_seconds')
+def extract_text(source, max_chars=None, max_pages=None, max_bytes=None, time_limit=None, page_prefix=''):
+    """Extract text from a PDF path, file object or bytes, stopping once `max_chars` have been collected.
+
+    Pages are read lazily and joined once, so large documents are never concatenated page by page.
+    Raises PDFLimitExceeded if the file is larger than `max_bytes`; hitting the page or time limit
+    returns the text gathered so far.
+    """
+    if max_bytes and _source_size(source) > max_bytes:
+        raise PDFLimitExceeded(f"PDF is larger than {max_bytes} bytes")
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    deadline = time.monotonic() + time_limit if time_limit else None
+    pdf_reader = PyPDF2.PdfReader(source)
+    parts = []
+    collected = 0
+    for page_number, page in enumerate(pdf_reader.pages):
+        if max_pages and page_number >= max_pages:
+            logger.warning(f"PDF page limit reached: only the first {max_pages} pages were read")
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            logger.warning(f"PDF parse time limit of {time_limit}s reached after {page_number} pages")
+            break
+        extracted = page.extract_text() or ""
+        parts.append(page_prefix + extracted + "\n")
+        collected += len(extracted)
+        if max_chars and collected >= max_chars:
+            break
+    return ''.join(parts)
+
+def default_limits(max_chars=None, page_prefix=''):
+    """Return the keyword limits for extract_text configured in settings."""
+    return {
+        'max_chars': max_chars,
+        'max_pages': settings.PDF_MAX_PAGES,
+        'max_bytes': settings.PDF_MAX_BYTES,
+        'time_limit': settings.PDF_PARSE_TIMEOUT,
+        'page_prefix': page_prefix,
+    }
+
+def _extract_path(path, limits):
+    # Runs in a pool process: return errors as strings so they always pickle
+    try:
+        return extract_text(path, **limits), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {str(e)}"
+
+_pool = None
+_pool_lock = threading.Lock()
+# (deadline, result) of parses a `wait` caller stopped waiting for; one still running past its deadline is hung
+_abandoned = []
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = settings.PDF_PARSE_WORKERS or os.cpu_count() or 1
+            # spawn keeps children independent of the parent's threads and database connections
+            _pool = multiprocessing.get_context('spawn').Pool(processes=workers, maxtasksperchild=100)
+        return _pool
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool = None
+        _abandoned.clear()
+
+def _parse_deadline(started, position, workers):
+    # Files are served `workers` at a time, so later files get proportionally later deadlines
+    return started + settings.PDF_PARSE_TIMEOUT * (position // workers + 1) + 5
+
+def _abandoned_hung():
+    """Forget finished abandoned parses; return True if one is still running past its deadline."""
+    now = time.monotonic()
+    with _pool_lock:
+        _abandoned[:] = [(deadline, result) for deadline, result in _abandoned if not result.ready()]
+        return any(deadline < now for deadline, _ in _abandoned)
+
+# Web processes create the pool too (uploads.parse_accepted); stop it before interpreter teardown
+atexit.register(_reset_pool)
+
+@metrics.timed('pdf_parse_batch_seconds')
+def extract_texts(paths, max_chars=None, page_prefix='', wait=None):
+    """Extract text from many PDF files on a process pool, returning one string (or None on failure) per path in input order.
+
+    Even a single file goes through the pool: only a separate process can be stopped when a
+    parser hangs inside a page. With `wait`, returns after at most that many seconds in total:
+    files not parsed by then come back as None and are left to finish on the pool, which the next
+    call replaces if any of them is still running past its PDF_PARSE_TIMEOUT deadline.
+    """
+    if not paths:
+        return []
+    limits = default_limits(max_chars=max_chars, page_prefix=page_prefix)
+    workers = settings.PDF_PARSE_WORKERS or os.cpu_count() or 1
+    if _abandoned_hung():
+        logger.warning("Terminating PDF parse pool: a parse left running by an earlier call timed out")
+        _reset_pool()
+    pool = _get_pool()
+    started = time.monotonic()
+    pending = [pool.apply_async(_extract_path, (path, limits)) for path in paths]
+    results = []
+    hung = False
+    unfinished = 0
+    for position, (path, async_result) in enumerate(zip(paths, pending)):
+        deadline = started + wait if wait is not None else _parse_deadline(started, position, workers)
+        try:
+            text, error = async_result.get(timeout=max(0.0, deadline - time.monotonic()))
+        except multiprocessing.TimeoutError:
+            if wait is not None:
+                unfinished += 1
+                with _pool_lock:
+                    _abandoned.append((_parse_deadline(started, position, workers), async_result))
+                results.append(None)
+                continue
+            text, error = None, f"timed out after {settings.PDF_PARSE_TIMEOUT}s"
+            hung = True
+        if error:
+            logger.error(f"Error extracting PDF text from {path}: {error}")
+        results.append(text)
+    if unfinished:
+        logger.info(f"{unfinished} of {len(paths)} PDF(s) not parsed within {wait}s")
+    if hung:
+        # A parser stuck inside a single page cannot be interrupted; replace the whole pool
+        logger.warning("Terminating PDF parse pool after a timeout")
+        _reset_pool()
+    return results
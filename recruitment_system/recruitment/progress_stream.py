@@ -0,0 +1,133 @@
+import asyncio
+import json
+import logging
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from .models import ScreeningTask
+from .screening import batch_progress
+from .shortlist import DEFAULT_MIN_SCORE, SHORTLIST_COLUMNS, batch_applications
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_SECONDS = 15
+RECONNECT_MILLISECONDS = 3000
+TASK_COLUMNS = ('id', 'file_name', 'status', 'stage', 'error', 'result', 'candidate_id')
+STAGE_ORDER = [ScreeningTask.STAGE_PARSED, ScreeningTask.STAGE_EXTRACTED, ScreeningTask.STAGE_SCORED]
+
+def format_event(event, data):
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _task_state(task):
+    return 'failed' if task['status'] == ScreeningTask.STATUS_FAILED else task['stage']
+
+def _new_states(previous, state):
+    """Return the states to report when a CV moves from `previous` to `state`, including stages passed between polls."""
+    if previous in STAGE_ORDER and state in STAGE_ORDER:
+        return STAGE_ORDER[STAGE_ORDER.index(previous) + 1:STAGE_ORDER.index(state) + 1]
+    return [state]
+
+def _task_event(task, state):
+    data = {'task_id': task['id'], 'file_name': task['file_name'], 'stage': state}
+    if state == 'failed':
+        data['error'] = task['error']
+    elif state == ScreeningTask.STAGE_SCORED:
+        data['name'] = task['result'].get('name')
+        data['match_score'] = task['result'].get('match_score')
+    return data
+
+class BatchEventStream:
+    """Turn a batch's task rows into Server-Sent Events as the screening worker updates them.
+
+    Each poll reads the batch's tasks (at most 80) and emits one event per CV whose stage changed
+    since the last poll ('parsed', 'extracted', 'scored' or 'failed'), a 'shortlist' event per newly
+    scored candidate at or above `min_score`, a 'progress' event with batch_progress() when anything
+    changed and a final 'done' event. A reconnecting client is sent the current state again.
+    """
+
+    def __init__(self, batch, min_score=DEFAULT_MIN_SCORE):
+        self.batch = batch
+        self.min_score = min_score
+        self._states = {}
+        self._rows = set()
+        self._polled = False
+
+    def poll(self):
+        """Return (encoded events, finished) for changes since the previous poll."""
+        # Read the status first: once the batch is finished, the task rows read below are final
+        self.batch.refresh_from_db(fields=['status', 'job'])
+        finished = self.batch.is_finished
+        events = []
+        scored = []
+        for task in self.batch.tasks.order_by('id').values(*TASK_COLUMNS):
+            state = _task_state(task)
+            previous = self._states.get(task['id'])
+            if state and previous != state:
+                self._states[task['id']] = state
+                events.extend(format_event(new, _task_event(task, new)) for new in _new_states(previous, state))
+                if state == ScreeningTask.STAGE_SCORED and task['candidate_id']:
+                    scored.append(task['candidate_id'])
+        if scored:
+            rows = batch_applications(self.batch).filter(candidate_id__in=scored, match_score__gte=self.min_score)
+            for row in rows.values('id', 'match_score', **SHORTLIST_COLUMNS):
+                if row['id'] not in self._rows:
+                    self._rows.add(row['id'])
+                    row['download_url'] = reverse('recruitment:download_cv', args=[row['cv_file']])
+                    events.append(format_event('shortlist', row))
+        progress = batch_progress(self.batch) if events or not self._polled else None
+        self._polled = True
+        if progress is not None:
+            events.append(format_event('progress', progress))
+        if finished:
+            events.append(format_event('done', progress or batch_progress(self.batch)))
+        return events, finished
+
+    def events(self):
+        """Yield events until the batch finishes or PROGRESS_STREAM_MAX_SECONDS pass (the browser then reconnects)."""
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        started = last_sent = time.monotonic()
+        while True:
+            events, finished = self.poll()
+            if events:
+                last_sent = time.monotonic()
+                yield ''.join(events)
+            if finished or time.monotonic() - started >= settings.PROGRESS_STREAM_MAX_SECONDS:
+                return
+            if time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ': keepalive\n\n'
+            time.sleep(settings.PROGRESS_STREAM_POLL_INTERVAL)
+
+    async def aevents(self):
+        """Async version of events() for ASGI servers, so a waiting stream holds no worker thread."""
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        poll = sync_to_async(self.poll)
+        started = last_sent = time.monotonic()
+        while True:
+            events, finished = await poll()
+            if events:
+                last_sent = time.monotonic()
+                yield ''.join(events)
+            if finished or time.monotonic() - started >= settings.PROGRESS_STREAM_MAX_SECONDS:
+                return
+            if time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ': keepalive\n\n'
+            await asyncio.sleep(settings.PROGRESS_STREAM_POLL_INTERVAL)
+
+def event_stream_response(request, stream):
+    """Serve `stream` as text/event-stream, iterating asynchronously under ASGI and synchronously under WSGI.
+
+    Django buffers a streaming response whose iterator does not match the server, which would hold
+    every event back until the batch finished.
+    """
+    content = stream.aevents() if isinstance(request, ASGIRequest) else stream.events()
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
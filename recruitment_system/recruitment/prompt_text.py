@@ -0,0 +1,184 @@
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter
+from django.conf import settings
+from . import metrics, pdf_text
+from .rate_control import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Pages are extracted with this prefix so headers and footers can be compared across pages
+PAGE_BREAK = '\f'
+
+# Section headings (lowercase, '&' spelled 'and'); a heading is a line holding only the phrase, or the phrase and a colon
+CV_SECTIONS = {
+    'summary': ('summary', 'professional summary', 'profile', 'professional profile', 'objective', 'career objective', 'about me'),
+    'skills': ('skills', 'technical skills', 'key skills', 'core skills', 'required skills', 'core competencies', 'competencies',
+               'technologies', 'tools', 'tools and technologies', 'technical expertise', 'expertise'),
+    'experience': ('experience', 'work experience', 'professional experience', 'relevant experience', 'employment',
+                   'employment history', 'work history', 'career history'),
+    'education': ('education', 'academic background', 'academic qualifications', 'qualifications', 'education and training'),
+    'certifications': ('certifications', 'certification', 'certificates', 'licenses and certifications', 'professional certifications',
+                       'training and certifications'),
+    'projects': ('projects', 'key projects', 'personal projects'),
+}
+JD_SECTIONS = {
+    'requirements': ('requirements', 'required skills', 'skills', 'qualifications', 'minimum qualifications', 'preferred qualifications',
+                     'required qualifications', 'what you bring', 'what we are looking for', 'who you are', 'certifications', 'education'),
+    'responsibilities': ('responsibilities', 'key responsibilities', 'duties', 'what you will do', 'the role', 'role overview'),
+    'about': ('about us', 'about the company', 'company overview', 'who we are', 'benefits', 'what we offer', 'perks'),
+}
+# Sections are packed in this order until the budget runs out; 'header' is the text before the first heading
+CV_PRIORITY = ['header', 'skills', 'certifications', 'education', 'summary', 'experience', 'projects']
+JD_PRIORITY = ['header', 'requirements', 'responsibilities', 'about']
+
+BULLET_RE = re.compile(r'^[\u2022\u25cf\u25aa\u25a0\u25e6\u2023\u2043\u2219\u00b7*]\s*')
+SPACE_RE = re.compile(r'[ \t\u00a0\u2000-\u200b]+')
+HYPHEN_BREAK_RE = re.compile(r'(\w)-\n([a-z])')
+PAGE_NUMBER_RE = re.compile(r'^(page\s*)?\d+(\s*(of|/)\s*\d+)?$', re.I)
+DIGITS_RE = re.compile(r'\d+')
+EDGE_LINES = 2  # Lines at the top and bottom of each page checked for repeated headers/footers
+
+def _heading_re(sections):
+    names = {phrase: name for name, phrases in sections.items() for phrase in phrases}
+    alternatives = '|'.join(re.escape(phrase) for phrase in sorted(names, key=len, reverse=True))
+    return names, re.compile(rf'^({alternatives})\s*(?:(:)\s*(.*))?$', re.I)
+
+CV_HEADINGS = _heading_re(CV_SECTIONS)
+JD_HEADINGS = _heading_re(JD_SECTIONS)
+
+def source_limits():
+    """PDF limits for prompt text: read enough pages to find late sections, keeping page breaks for header/footer detection."""
+    return pdf_text.default_limits(settings.PROMPT_SOURCE_MAX_CHARS, page_prefix=PAGE_BREAK)
+
+def normalize_text(text):
+    """Normalize unicode, bullets and whitespace and rejoin words hyphenated across lines; return each page's non-empty lines."""
+    text = unicodedata.normalize('NFKC', text)
+    text = HYPHEN_BREAK_RE.sub(r'\1\2', text)
+    pages = []
+    for page in text.split(PAGE_BREAK):
+        lines = []
+        for line in page.splitlines():
+            line = SPACE_RE.sub(' ', BULLET_RE.sub('- ', line.strip())).strip()
+            if line:
+                lines.append(line)
+        if lines:
+            pages.append(lines)
+    return pages
+
+def strip_repeated_lines(pages):
+    """Drop page numbers and header/footer lines that repeat (ignoring digits) on most pages.
+
+    The first copy of a repeated line is kept, since running headers often carry the candidate's name.
+    Returns (lines, number of lines removed).
+    """
+    def edges(lines):
+        return set(range(min(EDGE_LINES, len(lines)))) | set(range(max(0, len(lines) - EDGE_LINES), len(lines)))
+
+    counts = Counter()
+    for lines in pages:
+        counts.update({DIGITS_RE.sub('#', lines[i].lower()) for i in edges(lines)})
+    threshold = max(2, math.ceil(len(pages) / 2))
+    repeated = {key for key, count in counts.items() if count >= threshold} if len(pages) > 1 else set()
+    kept, removed, seen = [], 0, set()
+    for lines in pages:
+        edge = edges(lines)
+        for i, line in enumerate(lines):
+            key = DIGITS_RE.sub('#', line.lower())
+            if PAGE_NUMBER_RE.match(line) or (i in edge and key in repeated and key in seen):
+                removed += 1
+                continue
+            if i in edge:
+                seen.add(key)
+            kept.append(line)
+    return kept, removed
+
+def split_sections(lines, headings):
+    """Split lines into [(section name, lines)] in document order, starting with a 'header' section."""
+    names, heading_re = headings
+    sections = [('header', [])]
+    for line in lines:
+        match = heading_re.match(line.replace('&', 'and'))
+        # Long lines that merely start with a heading word ("Experience managing...") are content
+        if match and (match.group(2) or len(line) <= 40):
+            sections.append((names[match.group(1).lower()], [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, section_lines) for name, section_lines in sections if section_lines]
+
+def _fit_line(line, tokens):
+    """Cut `line` at a word boundary to roughly `tokens` tokens."""
+    cut = line[:tokens * 4]
+    return cut.rsplit(' ', 1)[0] if ' ' in cut else cut
+
+def pack_sections(sections, priority, budget):
+    """Keep whole lines of the highest-priority sections within `budget` tokens, in document order.
+
+    Returns (text, truncated) where `truncated` is True if anything was left out.
+    """
+    rank = {name: position for position, name in enumerate(priority)}
+    order = sorted(range(len(sections)), key=lambda i: (rank.get(sections[i][0], len(priority)), i))
+    remaining = budget
+    kept = {}
+    truncated = False
+    for i in order:
+        lines = []
+        for line in sections[i][1]:
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                truncated = True
+                # A long unbroken line (common in PDF text) is cut rather than dropped
+                if remaining >= 16 and not lines:
+                    lines.append(_fit_line(line, remaining - 1))
+                    remaining = 0
+                break
+            lines.append(line)
+            remaining -= cost
+        if len(lines) == 1 and len(sections[i][1]) > 1 and sections[i][0] != 'header':
+            # Only the heading fitted; give its tokens to the next section
+            remaining += estimate_tokens(lines.pop())
+        kept[i] = lines
+    return '\n'.join(line for i in range(len(sections)) for line in kept.get(i, [])), truncated
+
+def _split(text, headings):
+    lines, removed = strip_repeated_lines(normalize_text(text or ''))
+    return split_sections(lines, headings), removed
+
+def split_cv_text(text):
+    """Normalize CV text, drop repeated headers/footers and split it into sections; return (sections, lines removed).
+
+    Pass the result to local_extraction.try_extract and prepare_cv_text so the text is only cleaned once.
+    """
+    return _split(text, CV_HEADINGS)
+
+def _prepare(text, headings, priority, budget, kind, split=None):
+    if not text:
+        return ''
+    sections, removed = split or _split(text, headings)
+    packed, truncated = pack_sections(sections, priority, budget)
+    source_tokens = estimate_tokens(text)
+    sent_tokens = estimate_tokens(packed)
+    metrics.increment(f'prompt_text_documents_{kind}')
+    metrics.increment('prompt_text_tokens_source', source_tokens)
+    metrics.increment('prompt_text_tokens_sent', sent_tokens)
+    metrics.increment('prompt_text_tokens_saved', max(0, source_tokens - sent_tokens))
+    metrics.increment('prompt_text_boilerplate_lines', removed)
+    if truncated:
+        metrics.increment(f'prompt_text_truncated_{kind}')
+    logger.debug(f"Packed {kind.upper()} text from {source_tokens} to {sent_tokens} tokens ({removed} header/footer line(s) removed)")
+    return packed
+
+@metrics.timed('prompt_text_seconds')
+def prepare_cv_text(text, budget=None, split=None):
+    """Return CV text cleaned of boilerplate and packed into CV_PROMPT_TOKEN_BUDGET tokens, most useful sections first.
+
+    `split` is the split_cv_text result for `text`, if already computed.
+    """
+    return _prepare(text, CV_HEADINGS, CV_PRIORITY, budget or settings.CV_PROMPT_TOKEN_BUDGET, 'cv', split)
+
+@metrics.timed('prompt_text_seconds')
+def prepare_jd_text(text, budget=None):
+    """Return JD text cleaned of boilerplate and packed into JD_PROMPT_TOKEN_BUDGET tokens, requirements first."""
+    return _prepare(text, JD_HEADINGS, JD_PRIORITY, budget or settings.JD_PROMPT_TOKEN_BUDGET, 'jd')
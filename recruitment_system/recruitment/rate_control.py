@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from . import metrics
+from .concurrency import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 60.0
+RETRY_IN_RE = re.compile(r'retry in ([\d.]+)\s*s', re.I)
+RETRY_DELAY_RE = re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)', re.I)
+
+def parse_retry_after(error):
+    """Return the server's retry-after hint in seconds for a quota error, or None if it gave none."""
+    for detail in getattr(error, 'details', None) or []:
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None and (delay.seconds or delay.nanos):
+            return delay.seconds + delay.nanos / 1e9
+    response = getattr(error, 'response', None)
+    header = getattr(response, 'headers', {}).get('Retry-After') if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    for pattern in (RETRY_IN_RE, RETRY_DELAY_RE):
+        match = pattern.search(str(error))
+        if match:
+            return float(match.group(1))
+    return None
+
+def estimate_tokens(text):
+    """Rough token count for budgeting before a request is sent (about four characters per token)."""
+    return len(text) // 4 + 1
+
+class AdaptiveRateController:
+    """Process-wide AIMD limiter for Gemini requests, shared by every thread.
+
+    Requests are paced at `rate` per minute (None = unpaced until the first quota error). Each
+    success adds roughly `increase` requests/minute per minute of traffic, up to `max_rate`; a quota
+    error multiplies the rate by `decrease` and pauses every caller for the server's retry-after
+    hint; further errors only decrease it again `cooldown` seconds after that pause, so a burst of
+    errors from calls already in flight counts once. An optional token-per-minute budget is enforced over a sliding window.
+    """
+
+    def __init__(self, max_rate, min_rate=1.0, increase=1.0, decrease=0.5, cooldown=10.0, tokens_per_minute=0, capacity=1, coordinator=None):
+        self.max_rate = float(max_rate)
+        self.min_rate = float(min_rate)
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self.cooldown = float(cooldown)
+        self.tokens_per_minute = int(tokens_per_minute)
+        self.coordinator = coordinator
+        self._bucket = TokenBucket(rate=self.max_rate, period=WINDOW_SECONDS, capacity=capacity)
+        self._lock = threading.Lock()
+        self._requests = deque()
+        self._tokens = deque()
+        self._blocked_until = 0.0
+        self._last_decrease = float('-inf')
+        self.rate = self.max_rate or None
+
+    def _set_rate(self, rate):
+        if rate is not None:
+            rate = max(self.min_rate, rate if not self.max_rate else min(self.max_rate, rate))
+        self.rate = rate
+        self._bucket.rate = rate or 0.0
+
+    def _prune(self, now):
+        cutoff = now - WINDOW_SECONDS
+        while self._requests and self._requests[0] <= cutoff:
+            self._requests.popleft()
+        while self._tokens and self._tokens[0][0] <= cutoff:
+            self._tokens.popleft()
+
+    def _wait_time(self, now, tokens):
+        wait = self._blocked_until - now
+        if wait <= 0 and self.tokens_per_minute and self._tokens:
+            used = sum(count for _, count in self._tokens)
+            if used + tokens > self.tokens_per_minute:
+                # Wait until enough of the window has expired to fit this request
+                for stamp, count in self._tokens:
+                    used -= count
+                    if used + tokens <= self.tokens_per_minute:
+                        return stamp + WINDOW_SECONDS - now
+                return self._tokens[-1][0] + WINDOW_SECONDS - now
+        return wait
+
+    def _window_wait(self, tokens):
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            return self._wait_time(now, tokens)
+
+    def _record_request(self, tokens, waited):
+        with self._lock:
+            now = time.monotonic()
+            self._requests.append(now)
+            if tokens:
+                self._tokens.append((now, tokens))
+        if waited:
+            metrics.increment('gemini_quota_pause_seconds', waited)
+
+    def acquire(self, tokens=0):
+        """Block until a request estimated at `tokens` tokens may be sent."""
+        if self.coordinator is not None:
+            self.coordinator.sync(self)
+        waited = 0.0
+        while True:
+            wait = self._window_wait(tokens)
+            if wait <= 0:
+                break
+            # Sleep in short steps so a quota error reported meanwhile is noticed
+            step = min(wait, 1.0)
+            time.sleep(step)
+            waited += step
+        self._bucket.acquire()
+        self._record_request(tokens, waited)
+
+    async def acquire_async(self, tokens=0):
+        """acquire() for coroutines: waits with asyncio.sleep so the event loop keeps serving other requests."""
+        if self.coordinator is not None:
+            await sync_to_async(self.coordinator.sync)(self)
+        waited = 0.0
+        while True:
+            wait = self._window_wait(tokens)
+            if wait <= 0:
+                # The pacing wait is not a quota pause, so it is not counted in `waited`
+                pacing = self._bucket.reserve()
+                if not pacing:
+                    break
+                await asyncio.sleep(pacing)
+                continue
+            step = min(wait, 1.0)
+            await asyncio.sleep(step)
+            waited += step
+        self._record_request(tokens, waited)
+
+    def record_tokens(self, estimated, actual):
+        """Correct the token window once the real usage of a request is known."""
+        if self.tokens_per_minute and actual is not None and actual != estimated:
+            with self._lock:
+                self._tokens.append((time.monotonic(), actual - estimated))
+
+    def on_success(self):
+        """Additive increase: about `increase` requests/minute more per minute of successful traffic."""
+        with self._lock:
+            if self.rate is None:
+                return
+            step = self.increase / max(self.rate, 1.0)
+            self._set_rate(self.rate + step)
+        if self.coordinator is not None:
+            self.coordinator.add_increase(step)
+
+    def on_quota_error(self, retry_after=None):
+        """Multiplicative decrease and a shared pause after the server reports exhausted quota."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            decreased = now - self._last_decrease >= self.cooldown
+            if decreased:
+                # Without a configured ceiling, start from the rate that just hit the quota
+                base = self.rate if self.rate is not None else max(len(self._requests), self.min_rate)
+                self._set_rate(base * self.decrease)
+                metrics.increment('gemini_rate_decreases')
+                logger.warning(f"Gemini quota exhausted: slowing to {self.rate:.1f} requests/minute")
+            pause = retry_after if retry_after is not None else WINDOW_SECONDS / max(self.rate, 1.0)
+            self._blocked_until = max(self._blocked_until, now + pause)
+            if decreased:
+                # The cooldown runs from the end of the pause, when the new rate is first tried
+                self._last_decrease = self._blocked_until
+            # Burst credit saved up before the error would just hit the quota again
+            self._bucket.drain()
+        if self.coordinator is not None:
+            self.coordinator.report_quota_error(self, pause)
+
+    async def on_quota_error_async(self, retry_after=None):
+        if self.coordinator is not None:
+            # Sharing the error writes to the database
+            await sync_to_async(self.on_quota_error)(retry_after)
+        else:
+            self.on_quota_error(retry_after)
+
+    def adopt(self, rate, blocked_for):
+        """Apply state shared by other workers (called by the coordinator)."""
+        with self._lock:
+            self._set_rate(rate)
+            if blocked_for > 0:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + blocked_for)
+
+    def reset(self, max_rate):
+        """Forget learned state and start again at `max_rate` requests/minute (0 = unpaced)."""
+        with self._lock:
+            self.max_rate = float(max_rate)
+            self._requests.clear()
+            self._tokens.clear()
+            self._blocked_until = 0.0
+            self._last_decrease = float('-inf')
+            self._set_rate(self.max_rate or None)
+
+    def stats(self):
+        """Return the current rate and the requests and tokens sent in the last minute."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            return {
+                'rate': round(self.rate, 2) if self.rate is not None else None,
+                'requests_last_minute': len(self._requests),
+                'tokens_last_minute': sum(count for _, count in self._tokens),
+                'paused_for': round(max(0.0, self._blocked_until - now), 2),
+            }
+
+class DatabaseRateCoordinator:
+    """Share one AIMD rate across worker processes through a GeminiRateState row.
+
+    The row holds the global requests/minute, a shared pause and a heartbeat per worker; each
+    worker paces itself at the global rate divided by the number of live workers.
+    """
+
+    def __init__(self, key='gemini', interval=5.0):
+        self.key = key
+        self.interval = interval
+        self.worker_id = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._last_sync = float('-inf')
+        self._pending_increase = 0.0
+        self._workers = 1
+
+    def add_increase(self, step):
+        with self._lock:
+            self._pending_increase += step * self._workers
+
+    def _update(self, controller, quota_pause=None):
+        from django.db import transaction
+        from .models import GeminiRateState
+        now = timezone.now()
+        with transaction.atomic():
+            state, _ = GeminiRateState.objects.select_for_update().get_or_create(key=self.key)
+            workers = {
+                worker: stamp for worker, stamp in (state.workers or {}).items()
+                if stamp >= (now - timedelta(seconds=self.interval * 3)).timestamp()
+            }
+            workers[self.worker_id] = now.timestamp()
+            with self._lock:
+                increase, self._pending_increase = self._pending_increase, 0.0
+                self._workers = len(workers)
+            rate = state.rate
+            first = rate is None
+            if first:
+                # Start from the configured ceiling, or from this worker's rate after its first quota error
+                rate = controller.max_rate or (controller.rate * len(workers) if controller.rate is not None else None)
+            elif controller.max_rate:
+                rate = min(rate + increase, controller.max_rate)
+            else:
+                rate += increase
+            if quota_pause is not None:
+                cooled = state.decreased_at is None or (now - state.decreased_at).total_seconds() >= controller.cooldown
+                # Without a ceiling the worker's own rate has already been decreased
+                if cooled and rate is not None and not (first and not controller.max_rate):
+                    rate = max(controller.min_rate, rate * controller.decrease)
+                until = now + timedelta(seconds=quota_pause)
+                if state.blocked_until is None or until > state.blocked_until:
+                    state.blocked_until = until
+                if cooled:
+                    state.decreased_at = state.blocked_until
+            state.rate = rate
+            state.workers = workers
+            state.save()
+        blocked_for = (state.blocked_until - now).total_seconds() if state.blocked_until else 0.0
+        controller.adopt(rate / len(workers) if rate is not None else None, blocked_for)
+
+    def sync(self, controller, force=False):
+        """Publish this worker's heartbeat and increases, then adopt the shared rate and pause."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_sync < self.interval:
+                return
+            self._last_sync = now
+        try:
+            self._update(controller)
+        except Exception as e:
+            logger.warning(f"Could not sync Gemini rate state: {str(e)}")
+
+    def report_quota_error(self, controller, pause):
+        try:
+            self._update(controller, quota_pause=pause)
+        except Exception as e:
+            logger.warning(f"Could not share Gemini quota error: {str(e)}")
+
+def build_controller():
+    coordinator = DatabaseRateCoordinator(interval=settings.GEMINI_RATE_SYNC_INTERVAL) if settings.GEMINI_RATE_COORDINATION == 'db' else None
+    return AdaptiveRateController(
+        max_rate=settings.GEMINI_REQUESTS_PER_MINUTE,
+        min_rate=settings.GEMINI_MIN_REQUESTS_PER_MINUTE,
+        increase=settings.GEMINI_AIMD_INCREASE,
+        decrease=settings.GEMINI_AIMD_DECREASE,
+        cooldown=settings.GEMINI_AIMD_COOLDOWN,
+        tokens_per_minute=settings.GEMINI_TOKENS_PER_MINUTE,
+        capacity=settings.GEMINI_MAX_CONCURRENCY,
+        coordinator=coordinator,
+    )
+
+# Shared controller for all Gemini requests made by this process
+gemini_rate_controller = build_controller()
@@ -0,0 +1,186 @@
+import logging
+import numpy as np
+from django.conf import settings
+from .embeddings import jd_text
+from .models import Candidate
+from .semantic_index import get_index
+from .scoring import (
+    JD_SKILLS, RELATED_SKILLS, KEYWORDS, ROLE_KEYWORDS, YEARS_RE, JDRequirements,
+    MANDATORY_SKILL_POINTS, OPTIONAL_SKILL_POINTS, EXPERIENCE_YEARS_POINTS,
+    EXPERIENCE_ROLE_POINTS, EDUCATION_POINTS, EXTRA_SKILLS_BONUS,
+)
+
+logger = logging.getLogger(__name__)
+
+SKILL_VOCABULARY = list(dict.fromkeys(JD_SKILLS + RELATED_SKILLS))
+SKILL_INDEX = {skill: position for position, skill in enumerate(SKILL_VOCABULARY)}
+EDUCATION_SEPARATOR = '\x00'
+
+class CandidateFeatures:
+    """Scoring features for many candidates packed into NumPy arrays.
+
+    Produces the same scores as calculate_match_score for every row, but evaluates a JD
+    against the whole table with array operations instead of per-candidate Python loops.
+    """
+
+    def __init__(self, ids, names, emails, cv_files, valid, education_valid, skills, skill_counts, exp_years, exp_roles, education):
+        self.ids = ids
+        self.names = names
+        self.emails = emails
+        self.cv_files = cv_files
+        self.valid = valid                # bool[n]: False where cv_data would make scoring fail
+        self.education_valid = education_valid  # bool[n]: False where education entries cannot be read
+        self.skills = skills              # bool[n, len(SKILL_VOCABULARY)]
+        self.skill_counts = skill_counts  # int32[n]: number of CV skill entries
+        self.exp_years = exp_years        # int64[n, max_experience]: years in each entry, -1 if none/padding
+        self.exp_roles = exp_roles        # bool[n, max_experience]: entry mentions a cybersecurity role
+        self.education = education        # str[n]: lower-cased education entries joined by NUL
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build features from (id, name, email, cv_file, cv_data) rows."""
+        rows = list(rows)
+        n = len(rows)
+        ids = np.zeros(n, dtype=np.int64)
+        valid = np.zeros(n, dtype=bool)
+        education_valid = np.zeros(n, dtype=bool)
+        skills = np.zeros((n, len(SKILL_VOCABULARY)), dtype=bool)
+        skill_counts = np.zeros(n, dtype=np.int32)
+        experience = []
+        education = []
+        names, emails, cv_files = [], [], []
+        for row, (candidate_id, name, email, cv_file, cv_data) in enumerate(rows):
+            ids[row] = candidate_id
+            names.append(name)
+            emails.append(email)
+            cv_files.append(cv_file)
+            entries = []
+            edu = ''
+            try:
+                if not isinstance(cv_data, dict):
+                    raise TypeError('cv_data is not a dictionary')
+                cv_skills = [s.lower() for s in cv_data.get('skills', [])]
+                cv_experience = [e.lower() for e in cv_data.get('experience', [])]
+                for skill in KEYWORDS.find_any(cv_skills):
+                    position = SKILL_INDEX.get(skill)
+                    if position is not None:
+                        skills[row, position] = True
+                skill_counts[row] = len(cv_skills)
+                for exp in cv_experience:
+                    years_match = YEARS_RE.search(exp)
+                    entries.append((int(years_match.group(1)) if years_match else -1, bool(KEYWORDS.find(exp) & ROLE_KEYWORDS)))
+                valid[row] = True
+            except Exception as e:
+                logger.warning(f"Skipping malformed cv_data for candidate {candidate_id}: {str(e)}")
+                skills[row] = False
+                skill_counts[row] = 0
+                entries = []
+            if valid[row]:
+                # Education is only read when the JD asks for a degree, so malformed entries only fail those JDs
+                try:
+                    edu = EDUCATION_SEPARATOR.join(e.lower() for e in cv_data.get('education', []))
+                    education_valid[row] = True
+                except Exception as e:
+                    logger.warning(f"Malformed education in cv_data for candidate {candidate_id}: {str(e)}")
+            experience.append(entries)
+            education.append(edu)
+        width = max((len(entries) for entries in experience), default=0)
+        exp_years = np.full((n, width), -1, dtype=np.int64)
+        exp_roles = np.zeros((n, width), dtype=bool)
+        for row, entries in enumerate(experience):
+            for column, (years, is_role) in enumerate(entries):
+                exp_years[row, column] = min(years, np.iinfo(np.int64).max)
+                exp_roles[row, column] = is_role
+        return cls(ids, names, emails, cv_files, valid, education_valid, skills, skill_counts, exp_years, exp_roles, np.array(education, dtype=str))
+
+    @classmethod
+    def load(cls, queryset=None):
+        """Load features for every candidate in `queryset` (all candidates by default)."""
+        queryset = Candidate.objects.all() if queryset is None else queryset
+        rows = queryset.order_by('id').values_list('id', 'name', 'email', 'cv_file', 'cv_data').iterator(chunk_size=2000)
+        return cls.from_rows(rows)
+
+    def score(self, jd_data):
+        """Return float64 match scores (unrounded) for every candidate against `jd_data`."""
+        requirements = JDRequirements.from_jd(jd_data)
+        n = len(self)
+        score = np.zeros(n, dtype=np.float64)
+        max_score = 0.0
+
+        mandatory = [SKILL_INDEX[s] for s in requirements.mandatory_skills]
+        optional = [SKILL_INDEX[s] for s in requirements.optional_skills]
+        if mandatory:
+            score += self.skills[:, mandatory].sum(axis=1) * MANDATORY_SKILL_POINTS
+            max_score += MANDATORY_SKILL_POINTS * len(mandatory)
+        if optional:
+            score += self.skills[:, optional].sum(axis=1) * OPTIONAL_SKILL_POINTS
+            max_score += OPTIONAL_SKILL_POINTS * len(optional)
+
+        if requirements.years_required:
+            max_score += EXPERIENCE_YEARS_POINTS
+            width = self.exp_years.shape[1]
+            # argmax fails on an empty axis; with no experience entries at all nobody earns these points
+            if width:
+                meets = self.exp_years >= requirements.years_required
+                has_years = meets.any(axis=1)
+                # Role points only accrue for entries before the first one meeting the years requirement
+                first = np.where(has_years, meets.argmax(axis=1), width)
+                before_first = np.arange(width)[np.newaxis, :] < first[:, np.newaxis]
+                score += has_years * EXPERIENCE_YEARS_POINTS
+                score += (self.exp_roles & before_first).sum(axis=1) * EXPERIENCE_ROLE_POINTS
+
+        if requirements.required_degree:
+            max_score += EDUCATION_POINTS
+            score += (np.char.find(self.education, requirements.required_degree) >= 0) * EDUCATION_POINTS
+            invalid = ~(self.valid & self.education_valid)
+        else:
+            invalid = ~self.valid
+
+        extra = self.skill_counts > requirements.skill_count
+        score += extra * EXTRA_SKILLS_BONUS
+        max_scores = max_score + extra * EXTRA_SKILLS_BONUS
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            final = np.where(max_scores > 0, score / max_scores * 100, 0.0)
+        final[invalid] = 0.0
+        return final
+
+    def blended_score(self, jd_data, semantic_weight):
+        """Return keyword scores blended with semantic similarity; candidates missing from the index keep their keyword score."""
+        scores = self.score(jd_data)
+        if not semantic_weight:
+            return scores
+        similarities = get_index().scores_for(self.ids, jd_text(jd_data)).astype(np.float64)
+        blended = (1.0 - semantic_weight) * scores + semantic_weight * 100.0 * similarities
+        return np.where(np.isnan(similarities), scores, blended)
+
+    def rank(self, jd_data, min_score=0.0, limit=None, semantic_weight=None):
+        """Return candidate rows sorted by score (highest first) with scores rounded like calculate_match_score.
+
+        With SEMANTIC_SCORING_ENABLED (or an explicit `semantic_weight`), scores are blended with
+        similarity from the semantic index.
+        """
+        if semantic_weight is None:
+            semantic_weight = settings.SEMANTIC_SCORE_WEIGHT if settings.SEMANTIC_SCORING_ENABLED else 0.0
+        scores = self.blended_score(jd_data, semantic_weight)
+        order = np.argsort(-scores, kind='stable')
+        selected = order[scores[order] >= min_score]
+        if limit:
+            selected = selected[:limit]
+        return [
+            {
+                'id': int(self.ids[row]),
+                'name': self.names[row],
+                'email': self.emails[row],
+                'cv_file': self.cv_files[row],
+                'match_score': round(float(scores[row]), 2),
+            }
+            for row in selected
+        ]
+
+def rescore_candidates(jd_data, min_score=0.0, limit=None, queryset=None, semantic_weight=None):
+    """Rank stored candidates against a JD summary without re-extracting their CVs."""
+    return CandidateFeatures.load(queryset).rank(jd_data, min_score=min_score, limit=limit, semantic_weight=semantic_weight)
@@ -0,0 +1,207 @@
+import functools
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Keyword lists for matching
+JD_SKILLS = [
+    'siem', 'firewalls', 'intrusion detection', 'network security', 'encryption',
+    'penetration testing', 'vulnerability assessment', 'ethical hacking', 'risk assessment',
+    'security monitoring', 'cryptography', 'security analytics'
+]
+RELATED_SKILLS = [
+    'aws', 'python', 'java', 'docker', 'kubernetes', 'cloud security', 'security tools',
+    'sql', 'networking', 'linux', 'windows', 'scripting'
+]
+CYBERSECURITY_ROLES = [
+    'cybersecurity', 'security analyst', 'penetration tester', 'ethical hacker',
+    'security engineer', 'information security', 'network security'
+]
+
+MANDATORY_SKILL_POINTS = 25.0
+OPTIONAL_SKILL_POINTS = 7.0
+EXPERIENCE_YEARS_POINTS = 10.0
+EXPERIENCE_ROLE_POINTS = 5.0
+EDUCATION_POINTS = 10.0
+EXTRA_SKILLS_BONUS = 10.0
+
+YEARS_RE = re.compile(r'(\d+)\s*(?:year|years)')
+DEGREE_RE = re.compile(r"(?:bachelor\'s|master\'s|b\.s\.|m\.s\.)\s*(?:in)?\s*([\w\s]+)")
+
+def _trie_pattern(keywords):
+    """Build a regex that walks a trie of `keywords`, preferring the longest keyword at each position."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def render(node):
+        terminal = '' in node
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if terminal:
+            return '(?:' + body + ')?'
+        return body
+
+    return render(trie)
+
+class KeywordMatcher:
+    """Find every keyword occurring as a substring of a text in a single compiled scan.
+
+    Equivalent to an Aho-Corasick automaton over the keyword set: the keywords are compiled into one
+    trie-shaped regex tried at every position through a zero-width lookahead, so overlapping keywords
+    are all found, and keywords that are prefixes of a longer match at the same position are added
+    from a precomputed table. Results are memoized per text because skill strings repeat heavily
+    across candidates.
+    """
+
+    SEPARATOR = '\x00'
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._pattern = re.compile('(?=(' + _trie_pattern(self.keywords) + '))')
+        self._implied = {k: frozenset(o for o in self.keywords if k.startswith(o)) for k in self.keywords}
+        self.find = functools.lru_cache(maxsize=65536)(self._find)
+
+    def _find(self, text):
+        """Return the set of keywords that occur in `text`."""
+        found = set()
+        implied = self._implied
+        for match in self._pattern.finditer(text):
+            if match.group(1):
+                found |= implied[match.group(1)]
+        return frozenset(found)
+
+    def find_any(self, texts):
+        """Return the set of keywords that occur in any of `texts`."""
+        found = set()
+        for text in texts:
+            found |= self.find(text)
+        return found
+
+KEYWORDS = KeywordMatcher(JD_SKILLS + RELATED_SKILLS + CYBERSECURITY_ROLES)
+ROLE_KEYWORDS = frozenset(CYBERSECURITY_ROLES)
+
+class JDRequirements:
+    """Scoring requirements parsed once from a JD summary."""
+
+    __slots__ = ('mandatory_skills', 'optional_skills', 'years_required', 'required_degree')
+
+    def __init__(self, mandatory_skills, optional_skills, years_required, required_degree):
+        self.mandatory_skills = mandatory_skills
+        self.optional_skills = optional_skills
+        self.years_required = years_required
+        self.required_degree = required_degree
+
+    @classmethod
+    def from_jd(cls, jd_data):
+        return requirements_for_summary(jd_data.get('summary', '').lower())
+
+    @property
+    def skill_count(self):
+        return len(self.mandatory_skills) + len(self.optional_skills)
+
+    def __repr__(self):
+        return (f"JDRequirements(mandatory={self.mandatory_skills}, optional={self.optional_skills}, "
+                f"years={self.years_required}, degree={self.required_degree!r})")
+
+@functools.lru_cache(maxsize=256)
+def requirements_for_summary(jd_summary):
+    """Parse a lower-cased JD summary into JDRequirements (memoized per summary)."""
+    present = KEYWORDS.find(jd_summary)
+    mandatory_skills = tuple(s for s in JD_SKILLS if s in present) if 'required' in jd_summary else ()
+    optional_skills = tuple(s for s in RELATED_SKILLS if s in present)
+    years_match = YEARS_RE.search(jd_summary)
+    degree_match = DEGREE_RE.search(jd_summary)
+    return JDRequirements(
+        mandatory_skills=mandatory_skills,
+        optional_skills=optional_skills,
+        years_required=int(years_match.group(1)) if years_match else 0,
+        required_degree=degree_match.group(1).strip().lower() if degree_match else None,
+    )
+
+def score_candidate(cv_data, requirements):
+    """Score one CV dict against parsed JD requirements; raises on malformed CV data."""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    score = 0.0
+    max_score = 0.0
+
+    # Points for mandatory (25 each) and optional (7 each) skills
+    cv_skills = [s.lower() for s in cv_data.get('skills', [])]
+    matched_skills = KEYWORDS.find_any(cv_skills)
+    for skill in requirements.mandatory_skills:
+        max_score += MANDATORY_SKILL_POINTS
+        if skill in matched_skills:
+            score += MANDATORY_SKILL_POINTS
+            if debug:
+                logger.debug(f"Matched mandatory skill: {skill}, +25 points")
+    for skill in requirements.optional_skills:
+        max_score += OPTIONAL_SKILL_POINTS
+        if skill in matched_skills:
+            score += OPTIONAL_SKILL_POINTS
+            if debug:
+                logger.debug(f"Matched optional skill: {skill}, +7 points")
+
+    # Points for experience (10 if matches JD years, 5 for roles)
+    cv_experience = [e.lower() for e in cv_data.get('experience', [])]
+    if requirements.years_required:
+        max_score += EXPERIENCE_YEARS_POINTS
+        for exp in cv_experience:
+            years_match = YEARS_RE.search(exp)
+            if years_match and int(years_match.group(1)) >= requirements.years_required:
+                score += EXPERIENCE_YEARS_POINTS
+                if debug:
+                    logger.debug(f"Matched experience years: {years_match.group(0)}, +10 points")
+                break
+            if KEYWORDS.find(exp) & ROLE_KEYWORDS:
+                score += EXPERIENCE_ROLE_POINTS
+                if debug:
+                    logger.debug(f"Matched cybersecurity role: {exp}, +5 points")
+
+    # Points for education (10 if matches JD degree, 0 otherwise)
+    if requirements.required_degree:
+        max_score += EDUCATION_POINTS
+        cv_education = [e.lower() for e in cv_data.get('education', [])]
+        for edu in cv_education:
+            if requirements.required_degree in edu:
+                score += EDUCATION_POINTS
+                if debug:
+                    logger.debug(f"Matched required degree: {edu}, +10 points")
+                break
+
+    # Bonus for exceeding skill requirements
+    if len(cv_skills) > requirements.skill_count:
+        score += EXTRA_SKILLS_BONUS
+        max_score += EXTRA_SKILLS_BONUS
+        if debug:
+            logger.debug(f"Bonus for extra skills: +{EXTRA_SKILLS_BONUS} points")
+
+    if max_score > 0:
+        final_score = (score / max_score) * 100
+    else:
+        final_score = 0.0
+        logger.warning("Max score is 0, no JD requirements identified")
+    if debug:
+        logger.debug(f"Final score: {final_score} (earned {score}/{max_score})")
+    return round(final_score, 2)
+
+def score_candidates(cv_data_list, jd_data):
+    """Score many CV dicts against one JD, parsing the JD once; malformed CVs score 0.0."""
+    try:
+        requirements = JDRequirements.from_jd(jd_data)
+    except Exception as e:
+        logger.error(f"Error parsing JD requirements: {str(e)}")
+        return [0.0 for _ in cv_data_list]
+    scores = []
+    for cv_data in cv_data_list:
+        try:
+            scores.append(score_candidate(cv_data, requirements) if isinstance(cv_data, dict) else 0.0)
+        except Exception as e:
+            logger.error(f"Error calculating match score: {str(e)}")
+            scores.append(0.0)
+    return scores
@@ -0,0 +1,546 @@
+import logging
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from .models import Application, Candidate, CandidateSkill, Job, ScreeningBatch, ScreeningTask, Skill
+from .utils import QuotaExceededError, extract_cvs_concurrently, summarize_jd, calculate_match_score
+from .semantic_index import semantic_score, blend_score, index_candidates
+from .mailing import send_due_emails
+from .near_duplicates import store_fingerprints
+from .uploads import parse_accepted
+from . import extraction_cache, metrics
+
+logger = logging.getLogger(__name__)
+
+# (label, histogram) pairs reported in the per-batch log summary
+STAGE_HISTOGRAMS = [
+    ('jd', 'jd_summary_seconds'),
+    ('pdf', 'pdf_parse_batch_seconds'),
+    ('local', 'local_extraction_seconds'),
+    ('gemini', 'gemini_request_seconds'),
+    ('rate limit wait', 'gemini_rate_limit_wait_seconds'),
+    ('json', 'json_parse_seconds'),
+    ('scoring', 'scoring_seconds'),
+    ('db', 'candidate_save_seconds'),
+]
+SUMMARY_COUNTERS = [
+    ('api calls', 'gemini_api_calls'),
+    ('retries', 'gemini_retries'),
+    ('quota errors', 'gemini_quota_errors'),
+    ('rate decreases', 'gemini_rate_decreases'),
+    ('deferred', 'screening_tasks_deferred'),
+    ('api errors', 'gemini_errors'),
+    ('cache hits', 'extraction_cache_hits_cv'),
+    ('local extractions', 'local_extraction_accepted'),
+    ('near-duplicates reused', 'near_duplicates_stored'),
+    ('near-duplicates in batch', 'near_duplicates_in_batch'),
+    ('batch fallbacks', 'cv_batch_fallbacks'),
+    ('json completed', 'json_parse_completed'),
+    ('json repaired', 'json_parse_repaired'),
+    ('json failed', 'json_parse_failed'),
+    ('tokens in', 'gemini_prompt_tokens'),
+    ('tokens out', 'gemini_output_tokens'),
+    ('text tokens saved', 'prompt_text_tokens_saved'),
+]
+
+# bulk_create arguments for the candidate and application upserts (shared with async_screening)
+CANDIDATE_UPSERT = {
+    'update_conflicts': True,
+    'unique_fields': ['email'],
+    'update_fields': ['name', 'match_score', 'cv_data', 'job_title', 'cv_file'],
+}
+APPLICATION_UPSERT = {
+    'update_conflicts': True,
+    'unique_fields': ['candidate', 'job'],
+    'update_fields': ['match_score', 'batch', 'updated_at'],
+}
+TASK_COMPLETION_FIELDS = ['candidate', 'result', 'status', 'stage', 'cv_text', 'finished_at']
+
+def cv_storage():
+    return FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'cvs'))
+
+def jd_storage():
+    return FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'jds'))
+
+def delete_media_file(relative_path):
+    """Remove an uploaded file from MEDIA_ROOT, ignoring files that are already gone."""
+    file_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    if relative_path and os.path.exists(file_path):
+        os.remove(file_path)
+
+def create_batch(jd_file, cv_files, user=None, claimed=False):
+    """Persist the uploaded JD and CVs and queue one screening task per CV.
+
+    Files spooled by uploads.CVSpoolUploadHandler bring their content hash, and CVs parsed within
+    UPLOAD_PARSE_WAIT keep their text, so the worker does not read them again. A `claimed` batch is created as already taken, for
+    screening inside the request (async_screening); if that request dies, requeue_stale_work
+    hands it to the worker after SCREENING_TASK_TIMEOUT.
+    """
+    jd_filename = jd_storage().save(jd_file.name, jd_file)
+    fs = cv_storage()
+    now = timezone.now()
+    batch_claim = {'status': ScreeningBatch.STATUS_SUMMARIZING, 'started_at': now} if claimed else {}
+    task_claim = {'status': ScreeningTask.STATUS_RUNNING, 'attempts': 1, 'started_at': now} if claimed else {}
+    cv_filenames = [fs.save(cv_file.name, cv_file) for cv_file in cv_files]
+    cv_texts = parse_accepted([fs.path(cv_filename) for cv_filename in cv_filenames])
+    with transaction.atomic():
+        batch = ScreeningBatch.objects.create(created_by=user, jd_file=f'jds/{jd_filename}', **batch_claim)
+        tasks = [
+            ScreeningTask(
+                batch=batch,
+                file_name=cv_file.name,
+                cv_file=f'cvs/{cv_filename}',
+                content_hash=getattr(cv_file, 'content_hash', ''),
+                cv_text=cv_text or '',
+                stage=ScreeningTask.STAGE_PARSED if cv_text else '',
+                **task_claim,
+            )
+            for cv_file, cv_filename, cv_text in zip(cv_files, cv_filenames, cv_texts)
+        ]
+        ScreeningTask.objects.bulk_create(tasks)
+    logger.info(f"Queued screening batch {batch.pk} with {len(tasks)} CV(s)")
+    return batch
+
+def requeue_stale_work():
+    """Return batches and tasks abandoned by a crashed worker to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=settings.SCREENING_TASK_TIMEOUT)
+    batches = ScreeningBatch.objects.filter(
+        status=ScreeningBatch.STATUS_SUMMARIZING, started_at__lt=cutoff
+    ).update(status=ScreeningBatch.STATUS_PENDING, started_at=None)
+    stale_tasks = ScreeningTask.objects.filter(status=ScreeningTask.STATUS_RUNNING, started_at__lt=cutoff)
+    with transaction.atomic():
+        exhausted = list(
+            stale_tasks.filter(attempts__gte=settings.SCREENING_TASK_MAX_ATTEMPTS)
+            .select_for_update(skip_locked=True).only('id', 'batch_id', 'cv_file')
+        )
+        for task in exhausted:
+            fail_task(task, 'Worker timed out processing this CV.')
+    # Exhausted tasks locked by another worker are failed by it, never requeued
+    tasks = stale_tasks.filter(attempts__lt=settings.SCREENING_TASK_MAX_ATTEMPTS).update(
+        status=ScreeningTask.STATUS_PENDING, started_at=None
+    )
+    # Failing a batch's last outstanding tasks finishes it
+    for batch in ScreeningBatch.objects.filter(pk__in={task.batch_id for task in exhausted}):
+        finalize_batch(batch)
+    if batches or tasks or exhausted:
+        logger.warning(f"Requeued {batches} stale batch(es) and {tasks} stale task(s); {len(exhausted)} task(s) exceeded max attempts")
+
+def release_batch(batch):
+    """Hand a batch claimed for in-request screening, and its unfinished tasks, to the queue worker."""
+    batch.tasks.filter(status=ScreeningTask.STATUS_RUNNING).update(status=ScreeningTask.STATUS_PENDING, attempts=0, started_at=None)
+    ScreeningBatch.objects.filter(pk=batch.pk, status=ScreeningBatch.STATUS_SUMMARIZING).update(
+        status=ScreeningBatch.STATUS_PENDING, started_at=None,
+    )
+    logger.info(f"Handed batch {batch.pk} to the screening worker")
+
+def claim_batch():
+    """Claim the oldest pending batch for JD summarization, or return None."""
+    with transaction.atomic():
+        batch = (
+            ScreeningBatch.objects.select_for_update(skip_locked=True)
+            .filter(status=ScreeningBatch.STATUS_PENDING)
+            .order_by('created_at')
+            .first()
+        )
+        if batch is None:
+            return None
+        batch.status = ScreeningBatch.STATUS_SUMMARIZING
+        batch.started_at = timezone.now()
+        batch.save(update_fields=['status', 'started_at'])
+    return batch
+
+def claim_tasks(limit):
+    """Claim up to `limit` pending CV tasks whose JD has already been summarized."""
+    with transaction.atomic():
+        task_ids = list(
+            ScreeningTask.objects.select_for_update(skip_locked=True)
+            .filter(status=ScreeningTask.STATUS_PENDING, batch__status=ScreeningBatch.STATUS_PROCESSING)
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not task_ids:
+            return []
+        ScreeningTask.objects.filter(pk__in=task_ids).update(
+            status=ScreeningTask.STATUS_RUNNING,
+            attempts=F('attempts') + 1,
+            started_at=timezone.now(),
+        )
+    return list(ScreeningTask.objects.select_related('batch').filter(pk__in=task_ids).order_by('id'))
+
+def fail_batch(batch, error):
+    """Mark a batch and all of its unfinished tasks as failed."""
+    now = timezone.now()
+    batch.status = ScreeningBatch.STATUS_FAILED
+    batch.error = error
+    batch.finished_at = now
+    batch.save(update_fields=['status', 'error', 'finished_at'])
+    unfinished = batch.tasks.filter(status__in=[ScreeningTask.STATUS_PENDING, ScreeningTask.STATUS_RUNNING])
+    for cv_file in unfinished.values_list('cv_file', flat=True):
+        delete_media_file(cv_file)
+    unfinished.update(status=ScreeningTask.STATUS_FAILED, error=error, cv_text='', finished_at=now)
+
+def defer_batch(batch, error):
+    """Return a batch whose JD summary ran out of Gemini quota to the queue, or fail it after too many tries."""
+    if batch.deferrals >= settings.GEMINI_QUOTA_MAX_DEFERRALS:
+        logger.error(f"Giving up on batch {batch.pk} after {batch.deferrals} quota deferral(s): {str(error)}")
+        fail_batch(batch, 'Gemini API quota stayed exhausted; please try again later.')
+        return
+    ScreeningBatch.objects.filter(pk=batch.pk).update(
+        status=ScreeningBatch.STATUS_PENDING, started_at=None, deferrals=F('deferrals') + 1,
+    )
+    logger.warning(f"Requeued batch {batch.pk}: {str(error)}")
+
+def defer_tasks(tasks):
+    """Return CV tasks cut short by exhausted Gemini quota to the queue without using up an attempt."""
+    requeue = []
+    for task in tasks:
+        if task.deferrals >= settings.GEMINI_QUOTA_MAX_DEFERRALS:
+            logger.error(f"Giving up on CV {task.file_name} after {task.deferrals} quota deferral(s)")
+            fail_task(task, 'Gemini API quota stayed exhausted; please try again later.')
+        else:
+            requeue.append(task.pk)
+    if requeue:
+        ScreeningTask.objects.filter(pk__in=requeue).update(
+            status=ScreeningTask.STATUS_PENDING,
+            started_at=None,
+            attempts=F('attempts') - 1,
+            deferrals=F('deferrals') + 1,
+        )
+        metrics.increment('screening_tasks_deferred', len(requeue))
+        logger.warning(f"Requeued {len(requeue)} CV(s) until Gemini quota recovers")
+
+def process_batch_jd(batch):
+    """Summarize the batch JD so its CV tasks become claimable."""
+    jd_path = os.path.join(settings.MEDIA_ROOT, batch.jd_file)
+    before = metrics.totals()
+    try:
+        with open(jd_path, 'rb') as jd_f:
+            jd_result = summarize_jd(jd_f)
+    except QuotaExceededError as e:
+        record_batch_metrics({batch.pk: metrics.delta(before, metrics.totals())})
+        defer_batch(batch, e)
+        return
+    except Exception as e:
+        logger.error(f"Error reading JD for batch {batch.pk}: {str(e)}")
+        jd_result = {}
+    record_batch_metrics({batch.pk: metrics.delta(before, metrics.totals())})
+    if not jd_result or 'summary' not in jd_result or not jd_result.get('summary'):
+        logger.warning(f"Empty JD summary for batch {batch.pk}")
+        fail_batch(batch, 'Failed to process job description.')
+        return
+    batch.jd_data = jd_result
+    batch.job_title = jd_result.get('job_title', 'Unknown')
+    batch.job = get_job(batch.job_title, jd_result)
+    batch.status = ScreeningBatch.STATUS_PROCESSING
+    batch.save(update_fields=['jd_data', 'job_title', 'job', 'status'])
+    logger.info(f"Summarized JD for batch {batch.pk}: {batch.job_title}")
+    finalize_batch(batch)
+
+def get_job(title, jd_data=None):
+    """Return the job for `title` and this JD summary; a batch with another JD under the same title gets its own job."""
+    job, _ = Job.objects.get_or_create(jd_hash=Job.content_hash(title, jd_data), defaults={'title': title, 'jd_data': jd_data or {}})
+    return job
+
+def candidate_skill_names(cv_data):
+    """Return {normalized name: source} for the skills and certifications listed in CV data."""
+    names = {}
+    for source, field in ((CandidateSkill.SOURCE_SKILL, 'skills'), (CandidateSkill.SOURCE_CERTIFICATION, 'certifications')):
+        entries = cv_data.get(field) or []
+        if not isinstance(entries, list):
+            continue
+        for entry in entries:
+            name = Skill.normalize(entry)
+            if name:
+                names.setdefault(name, source)
+    return names
+
+def sync_candidate_skills(pairs):
+    """Replace the CandidateSkill rows of each (candidate, cv_data) pair with the skills in that CV data."""
+    names_by_candidate = {candidate.pk: candidate_skill_names(cv_data) for candidate, cv_data in pairs}
+    all_names = set()
+    for names in names_by_candidate.values():
+        all_names.update(names)
+    Skill.objects.bulk_create([Skill(name=name) for name in all_names], ignore_conflicts=True)
+    skill_ids = dict(Skill.objects.filter(name__in=all_names).values_list('name', 'id'))
+    wanted = {
+        (candidate_id, skill_ids[name]): source
+        for candidate_id, names in names_by_candidate.items()
+        for name, source in names.items()
+    }
+    existing = CandidateSkill.objects.filter(candidate_id__in=names_by_candidate).values_list('id', 'candidate_id', 'skill_id')
+    stale = []
+    for link_id, candidate_id, skill_id in existing:
+        if wanted.pop((candidate_id, skill_id), None) is None:
+            stale.append(link_id)
+    if stale:
+        CandidateSkill.objects.filter(pk__in=stale).delete()
+    CandidateSkill.objects.bulk_create(
+        [CandidateSkill(candidate_id=candidate_id, skill_id=skill_id, source=source) for (candidate_id, skill_id), source in wanted.items()],
+        ignore_conflicts=True,
+    )
+
+def record_applications(batch, scored):
+    """Upsert each (candidate, match_score) pair as an Application for the batch's job."""
+    if batch.job_id is None:
+        batch.job = get_job(batch.job_title, batch.jd_data)
+        ScreeningBatch.objects.filter(pk=batch.pk).update(job=batch.job)
+    Application.objects.bulk_create(application_rows(batch, scored), **APPLICATION_UPSERT)
+
+def application_rows(batch, scored):
+    return [Application(candidate=candidate, job_id=batch.job_id, batch=batch, match_score=score) for candidate, score in scored]
+
+def latest_candidates(entries):
+    """Return {email: unsaved Candidate} for save_candidates entries, the last entry per email winning."""
+    latest = {}
+    for cv_data, match_score, job_title, cv_file in entries:
+        latest[cv_data.get('email')] = Candidate(
+            email=cv_data.get('email'),
+            name=cv_data.get('name', 'Unknown'),
+            match_score=match_score,
+            cv_data=cv_data,
+            job_title=job_title,
+            cv_file=cv_file,
+        )
+    return latest
+
+def save_candidates(entries):
+    """Create or update the candidates identified by each CV email in one upsert.
+
+    `entries` are (cv_data, match_score, job_title, cv_file) tuples; returns one Candidate per entry,
+    in order. When an email appears more than once the last entry wins, as with sequential saves.
+    """
+    latest = latest_candidates(entries)
+    Candidate.objects.bulk_create(list(latest.values()), **CANDIDATE_UPSERT)
+    # Upserted rows don't get their primary keys back on every backend
+    ids = dict(Candidate.objects.filter(email__in=latest).values_list('email', 'id'))
+    for email, candidate in latest.items():
+        candidate.pk = ids[email]
+    logger.info(f"Saved {len(latest)} candidate(s)")
+    return [latest[cv_data.get('email')] for cv_data, _, _, _ in entries]
+
+def fail_task(task, error):
+    """Mark a CV task as failed and discard its stored file."""
+    delete_media_file(task.cv_file)
+    task.status = ScreeningTask.STATUS_FAILED
+    task.error = error
+    task.cv_text = ''
+    task.finished_at = timezone.now()
+    task.save(update_fields=['status', 'error', 'cv_text', 'finished_at'])
+
+def score_task(task, cv_data):
+    """Return the match score for a task's extracted CV data, or None after failing the task."""
+    batch = task.batch
+    try:
+        if not cv_data or not cv_data.get('email') or not cv_data.get('name'):
+            logger.warning(f"No valid data extracted from CV: {task.file_name}")
+            fail_task(task, getattr(cv_data, 'error', '') or 'No valid data extracted: missing email, name, or unreadable content.')
+            return None
+        match_score = calculate_match_score(cv_data, batch.jd_data)
+        if settings.SEMANTIC_SCORING_ENABLED:
+            match_score = blend_score(match_score, semantic_score(cv_data, batch.jd_data))
+        return match_score
+    except Exception as e:
+        logger.error(f"Error processing CV {task.file_name}: {str(e)}")
+        fail_task(task, str(e))
+        return None
+
+def complete_tasks(scored):
+    """Persist scored (task, cv_data, match_score) entries of one batch in a single transaction."""
+    if not scored:
+        return
+    batch = scored[0][0].batch
+    finished_at = timezone.now()
+    with metrics.timer('candidate_save_seconds'), transaction.atomic():
+        candidates = save_candidates([(cv_data, score, batch.job_title, task.cv_file) for task, cv_data, score in scored])
+        sync_candidate_skills([(candidate, cv_data) for candidate, (_, cv_data, _) in zip(candidates, scored)])
+        record_applications(batch, [(candidate, score) for candidate, (_, _, score) in zip(candidates, scored)])
+        tasks = [complete_task(task, candidate, cv_data, score, finished_at) for candidate, (task, cv_data, score) in zip(candidates, scored)]
+        ScreeningTask.objects.bulk_update(tasks, TASK_COMPLETION_FIELDS)
+
+def complete_task(task, candidate, cv_data, match_score, finished_at):
+    """Set the fields of a finished task (saved with TASK_COMPLETION_FIELDS) and return it."""
+    task.candidate = candidate
+    task.result = {
+        'name': cv_data.get('name', 'Unknown'),
+        'email': candidate.email,
+        'match_score': match_score,
+        'cv_file': task.cv_file
+    }
+    task.status = ScreeningTask.STATUS_DONE
+    task.stage = ScreeningTask.STAGE_SCORED
+    task.cv_text = ''
+    task.finished_at = finished_at
+    return task
+
+def save_scored(scored):
+    """Persist one batch's scored entries in bulk, falling back to one transaction per CV so a bad row can't fail its neighbours."""
+    try:
+        complete_tasks(scored)
+    except Exception as e:
+        logger.error(f"Bulk save of {len(scored)} CV(s) failed, retrying individually: {str(e)}")
+        for entry in scored:
+            try:
+                complete_tasks([entry])
+            except Exception as e:
+                logger.error(f"Error processing CV {entry[0].file_name}: {str(e)}")
+                fail_task(entry[0], str(e))
+
+def save_fingerprints(tasks, fingerprints):
+    """Store the CV text fingerprints of completed tasks against their candidates for near-duplicate lookups."""
+    try:
+        store_fingerprints([
+            (task.candidate_id, digest) for task, digest in zip(tasks, fingerprints) if task.status == ScreeningTask.STATUS_DONE
+        ])
+    except Exception as e:
+        logger.error(f"Error storing CV fingerprints: {str(e)}")
+
+def process_tasks(tasks):
+    """Extract claimed CVs concurrently, score them, then persist each batch's results in bulk."""
+    before = metrics.totals()
+    cv_paths = [os.path.join(settings.MEDIA_ROOT, task.cv_file) for task in tasks]
+    scored_by_batch = {}
+    deferred = []
+
+    def mark_stage(stage, positions):
+        # Lets the progress stream report CVs as they move through the pipeline
+        ScreeningTask.objects.filter(pk__in=[tasks[position].pk for position in positions]).update(stage=stage)
+
+    fingerprints = [None] * len(tasks)
+    extracted = extract_cvs_concurrently(
+        cv_paths,
+        digests=[task.content_hash for task in tasks],
+        texts=[task.cv_text for task in tasks],
+        progress=mark_stage,
+        fingerprints=fingerprints,
+    )
+    for task, cv_data in zip(tasks, extracted):
+        if cv_data is None:
+            deferred.append(task)
+            continue
+        match_score = score_task(task, cv_data)
+        if match_score is not None:
+            scored_by_batch.setdefault(task.batch_id, []).append((task, cv_data, match_score))
+    indexed = []
+    for scored in scored_by_batch.values():
+        save_scored(scored)
+        indexed.extend((task.candidate_id, cv_data) for task, cv_data, _ in scored if task.status == ScreeningTask.STATUS_DONE)
+    defer_tasks(deferred)
+    save_fingerprints(tasks, fingerprints)
+    if settings.SEMANTIC_SCORING_ENABLED and indexed:
+        try:
+            index_candidates(indexed)
+        except Exception as e:
+            logger.error(f"Error updating semantic index: {str(e)}")
+    # Claims can span batches; split the work between them by task count
+    change = metrics.delta(before, metrics.totals())
+    task_counts = Counter(task.batch_id for task in tasks)
+    record_batch_metrics({
+        batch_id: {name: value * count / len(tasks) for name, value in change.items()}
+        for batch_id, count in task_counts.items()
+    })
+
+def record_batch_metrics(changes):
+    """Add {batch_id: metrics delta} to each batch's accumulated stage metrics."""
+    changes = {batch_id: change for batch_id, change in changes.items() if change}
+    if not changes:
+        return
+    try:
+        with transaction.atomic():
+            for batch in ScreeningBatch.objects.select_for_update().filter(pk__in=changes).only('stage_metrics'):
+                totals = batch.stage_metrics or {}
+                for name, value in changes[batch.pk].items():
+                    totals[name] = totals.get(name, 0) + value
+                batch.stage_metrics = totals
+                batch.save(update_fields=['stage_metrics'])
+    except Exception as e:
+        logger.error(f"Error recording batch metrics: {str(e)}")
+
+def format_stage_summary(stage_metrics):
+    """Render a batch's stage metrics as one log-friendly line."""
+    stages = []
+    for label, name in STAGE_HISTOGRAMS:
+        count = stage_metrics.get(f'{name}_count', 0)
+        if count:
+            stages.append(f"{label} {stage_metrics.get(f'{name}_sum', 0):.2f}s/{round(count)}")
+    counters = [f"{label} {round(stage_metrics[name])}" for label, name in SUMMARY_COUNTERS if stage_metrics.get(name)]
+    return f"stages (seconds summed over calls): {', '.join(stages) or 'none'}; {', '.join(counters) or 'no API activity'}"
+
+def finalize_batch(batch):
+    """Complete a processing batch once none of its tasks are outstanding."""
+    outstanding = batch.tasks.filter(status__in=[ScreeningTask.STATUS_PENDING, ScreeningTask.STATUS_RUNNING]).exists()
+    if outstanding:
+        return False
+    updated = ScreeningBatch.objects.filter(pk=batch.pk, status=ScreeningBatch.STATUS_PROCESSING).update(
+        status=ScreeningBatch.STATUS_COMPLETED, finished_at=timezone.now()
+    )
+    if updated:
+        progress = batch_progress(batch)
+        batch.refresh_from_db(fields=['created_at', 'finished_at', 'stage_metrics'])
+        elapsed = (batch.finished_at - batch.created_at).total_seconds()
+        logger.info(f"Completed batch {batch.pk}: {progress['done']} processed, {progress['failed']} failed in {elapsed:.1f}s")
+        logger.info(f"Batch {batch.pk} {format_stage_summary(batch.stage_metrics)}")
+    return bool(updated)
+
+def batch_progress(batch):
+    """Summarize task counts for a batch as a JSON-serializable dict."""
+    counts = {status: 0 for status, _ in ScreeningTask.STATUS_CHOICES}
+    for row in batch.tasks.order_by().values('status').annotate(total=Count('id')):
+        counts[row['status']] = row['total']
+    total = sum(counts.values())
+    finished = counts[ScreeningTask.STATUS_DONE] + counts[ScreeningTask.STATUS_FAILED]
+    batch.refresh_from_db(fields=['status', 'job_title', 'error'])
+    return {
+        'batch_id': batch.pk,
+        'status': batch.status,
+        'job_title': batch.job_title,
+        'error': batch.error,
+        'total': total,
+        'pending': counts[ScreeningTask.STATUS_PENDING],
+        'running': counts[ScreeningTask.STATUS_RUNNING],
+        'done': counts[ScreeningTask.STATUS_DONE],
+        'failed': counts[ScreeningTask.STATUS_FAILED],
+        'percent': round(finished / total * 100, 1) if total else 100.0,
+        'failed_cvs': list(batch.tasks.filter(status=ScreeningTask.STATUS_FAILED).values_list('file_name', flat=True)),
+        'is_finished': batch.is_finished,
+    }
+
+def run_worker(once=False, poll_interval=None, claim_size=None):
+    """Drain the screening queue; with `once`, exit as soon as no work is left."""
+    poll_interval = settings.SCREENING_WORKER_POLL_INTERVAL if poll_interval is None else poll_interval
+    claim_size = settings.SCREENING_CLAIM_SIZE if claim_size is None else claim_size
+    logger.info(f"Screening worker started (claim size {claim_size}, poll interval {poll_interval}s)")
+    try:
+        _worker_loop(once, poll_interval, claim_size)
+    finally:
+        extraction_cache.flush_hits()
+        metrics.flush(force=True)
+
+def _worker_loop(once, poll_interval, claim_size):
+    while True:
+        extraction_cache.flush_hits()
+        metrics.flush()
+        requeue_stale_work()
+        did_work = False
+        batch = claim_batch()
+        if batch is not None:
+            process_batch_jd(batch)
+            did_work = True
+        tasks = claim_tasks(claim_size)
+        if tasks:
+            process_tasks(tasks)
+        for batch in {task.batch_id: task.batch for task in tasks}.values():
+            finalize_batch(batch)
+        did_work = did_work or bool(tasks)
+        # Queued candidate emails share the worker so a single process is enough to run the app
+        did_work = bool(send_due_emails()) or did_work
+        if not did_work:
+            if once:
+                logger.info("Screening queue drained, worker exiting")
+                return
+            time.sleep(poll_interval)
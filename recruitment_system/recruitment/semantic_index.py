@@ -0,0 +1,393 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from django.conf import settings
+from . import metrics
+from .embeddings import get_embedder, candidate_text, jd_text, text_digest
+
+logger = logging.getLogger(__name__)
+
+META_FILE = 'meta.json'
+VECTORS_FILE = 'vectors.f32'
+IDS_FILE = 'ids.npy'
+DIGESTS_FILE = 'digests.npy'
+DF_FILE = 'df.npy'
+LOCK_FILE = 'index.lock'
+
+INITIAL_CAPACITY = 1024
+NORM_CHUNK_ROWS = 8192
+LOCK_TIMEOUT = 30.0  # Seconds to wait for another process writing the index
+LOCK_STALE_AFTER = 300.0  # Seconds after which a leftover lock file is assumed abandoned
+SYNC_CHUNK_SIZE = 2000
+
+class IndexLockTimeout(Exception):
+    pass
+
+class _FileLock:
+    """Cross-process exclusive lock based on creating a lock file, usable on any platform."""
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = Path(path)
+        self.timeout = timeout
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - self.path.stat().st_mtime > LOCK_STALE_AFTER:
+                        logger.warning(f"Removing stale semantic index lock {self.path}")
+                        self.path.unlink()
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise IndexLockTimeout(f"Timed out waiting for {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc_info):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+def _atomic_save(path, array):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as fh:
+        np.save(fh, array)
+    os.replace(tmp, path)
+
+class VectorIndex:
+    """Persisted candidate vector index: a memory-mapped float32 matrix plus candidate ids.
+
+    Rows are appended as candidates are indexed and overwritten in place when a candidate's
+    text changes; removed candidates leave a tombstone row until the index is rebuilt. Writers
+    from any process serialize on a lock file, and readers reload when the metadata version
+    changes, so the web process always queries what the worker last wrote.
+    """
+
+    def __init__(self, path, embedder):
+        self.path = Path(path)
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self._lock = threading.RLock()
+        self._meta_stamp = None
+        self._clear()
+        self._load()
+
+    def _clear(self):
+        self.version = 0
+        self.count = 0
+        self.capacity = 0
+        self._vectors = None
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._digests = np.zeros(0, dtype=np.int64)
+        self._df = np.zeros(self.dim, dtype=np.float64)
+        self._rows = {}
+        self._norms = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _file(self, name):
+        return self.path / name
+
+    def _stamp(self):
+        try:
+            stat = self._file(META_FILE).stat()
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        stamp = self._stamp()
+        self._meta_stamp = stamp
+        self._clear()
+        if stamp is None:
+            return
+        with open(self._file(META_FILE), encoding='utf-8') as fh:
+            meta = json.load(fh)
+        if meta.get('dim') != self.dim or meta.get('embedder') != self.embedder.name:
+            logger.warning(
+                f"Semantic index at {self.path} was built with {meta.get('embedder')} (dim {meta.get('dim')}); "
+                f"run 'manage.py semantic_index --rebuild' to use {self.embedder.name} (dim {self.dim})"
+            )
+            self.version = meta.get('version', 0)
+            return
+        self.version = meta['version']
+        self.count = meta['count']
+        self.capacity = meta['capacity']
+        if self.capacity:
+            self._vectors = np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode='r+', shape=(self.capacity, self.dim))
+        self._ids = np.full(self.capacity, -1, dtype=np.int64)
+        self._digests = np.zeros(self.capacity, dtype=np.int64)
+        self._ids[:self.count] = np.load(self._file(IDS_FILE))
+        self._digests[:self.count] = np.load(self._file(DIGESTS_FILE))
+        self._df = np.load(self._file(DF_FILE))
+        self._rows = {int(cid): row for row, cid in enumerate(self._ids[:self.count]) if cid >= 0}
+
+    def refresh(self):
+        """Reload the index if another process has written it since it was loaded."""
+        with self._lock:
+            if self._stamp() != self._meta_stamp:
+                self._load()
+
+    def _ensure_capacity(self, rows):
+        if rows <= self.capacity:
+            return
+        capacity = max(INITIAL_CAPACITY, self.capacity)
+        while capacity < rows:
+            capacity *= 2
+        self.path.mkdir(parents=True, exist_ok=True)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        # An empty index starts a fresh file rather than extending one left by an incompatible build
+        with open(self._file(VECTORS_FILE), 'ab' if self.capacity else 'wb') as fh:
+            fh.truncate(capacity * self.dim * np.dtype(np.float32).itemsize)
+        self._vectors = np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+        self._ids = np.concatenate([self._ids, np.full(capacity - self.capacity, -1, dtype=np.int64)])
+        self._digests = np.concatenate([self._digests, np.zeros(capacity - self.capacity, dtype=np.int64)])
+        self.capacity = capacity
+
+    def _flush(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        if self._vectors is not None:
+            self._vectors.flush()
+        _atomic_save(self._file(IDS_FILE), self._ids[:self.count])
+        _atomic_save(self._file(DIGESTS_FILE), self._digests[:self.count])
+        _atomic_save(self._file(DF_FILE), self._df)
+        self.version += 1
+        meta = {
+            'version': self.version,
+            'embedder': self.embedder.name,
+            'dim': self.dim,
+            'count': self.count,
+            'capacity': self.capacity,
+        }
+        tmp = self._file(META_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, self._file(META_FILE))
+        self._meta_stamp = self._stamp()
+        self._norms = None
+
+    def _write_lock(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        return _FileLock(self._file(LOCK_FILE))
+
+    def add(self, candidate_ids, texts):
+        """Index or re-index candidates; texts whose digest is unchanged are not re-embedded. Return the number embedded."""
+        digests = [text_digest(text) for text in texts]
+        with self._lock, self._write_lock():
+            self.refresh()
+            changed = []
+            for cid, text, digest in zip(candidate_ids, texts, digests):
+                row = self._rows.get(int(cid))
+                if row is None or self._digests[row] != digest:
+                    changed.append((int(cid), text, digest))
+            if not changed:
+                return 0
+            vectors = self.embedder.embed([text for _, text, _ in changed])
+            self._ensure_capacity(self.count + len(changed))
+            for (cid, _, digest), vector in zip(changed, vectors):
+                row = self._rows.get(cid)
+                if row is None:
+                    row = self.count
+                    self.count += 1
+                    self._rows[cid] = row
+                    self._ids[row] = cid
+                else:
+                    self._df -= self._vectors[row] > 0
+                self._vectors[row] = vector
+                self._digests[row] = digest
+                self._df += vector > 0
+            self._flush()
+        metrics.increment('semantic_index_embedded', len(changed))
+        return len(changed)
+
+    def remove(self, candidate_ids):
+        """Tombstone the rows of candidates that no longer exist; return the number removed."""
+        with self._lock, self._write_lock():
+            self.refresh()
+            removed = 0
+            for cid in candidate_ids:
+                row = self._rows.pop(int(cid), None)
+                if row is None:
+                    continue
+                self._df -= self._vectors[row] > 0
+                self._vectors[row] = 0.0
+                self._ids[row] = -1
+                self._digests[row] = 0
+                removed += 1
+            if removed:
+                self._flush()
+            return removed
+
+    def reset(self):
+        """Delete every row so the index can be rebuilt from scratch."""
+        with self._lock, self._write_lock():
+            self.refresh()
+            version = self.version
+            self._clear()
+            self.version = version
+            for name in (VECTORS_FILE, IDS_FILE, DIGESTS_FILE, DF_FILE):
+                try:
+                    self._file(name).unlink()
+                except FileNotFoundError:
+                    pass
+            self._flush()
+
+    def candidate_ids(self):
+        return set(self._rows)
+
+    def _idf(self):
+        if not getattr(self.embedder, 'uses_idf', False):
+            return np.ones(self.dim, dtype=np.float32)
+        documents = len(self._rows)
+        return (np.log((1.0 + documents) / (1.0 + np.maximum(self._df, 0.0))) + 1.0).astype(np.float32)
+
+    def _weighted_norms(self, idf):
+        # Row norms under the current IDF weights, computed in chunks so the memmap is never copied whole
+        if self._norms is None:
+            norms = np.zeros(self.count, dtype=np.float32)
+            for start in range(0, self.count, NORM_CHUNK_ROWS):
+                block = self._vectors[start:min(start + NORM_CHUNK_ROWS, self.count)] * idf
+                norms[start:start + len(block)] = np.sqrt(np.einsum('ij,ij->i', block, block))
+            self._norms = norms
+        return self._norms
+
+    def _weighted_query(self, text, idf):
+        query = self.embedder.embed([text])[0] * idf
+        norm = float(np.linalg.norm(query))
+        return query, norm
+
+    def similarities(self, text):
+        """Return (candidate_ids, cosine similarities) for every row; tombstones have id -1."""
+        with self._lock:
+            ids = self._ids[:self.count]
+            if not self.count:
+                return ids, np.zeros(0, dtype=np.float32)
+            idf = self._idf()
+            query, query_norm = self._weighted_query(text, idf)
+            if query_norm == 0:
+                return ids, np.zeros(self.count, dtype=np.float32)
+            norms = self._weighted_norms(idf)
+            dots = self._vectors[:self.count] @ (query * idf)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                sims = np.where(norms > 0, dots / (norms * query_norm), 0.0).astype(np.float32)
+        metrics.increment('semantic_index_queries')
+        return ids, sims
+
+    def query(self, text, k=10):
+        """Return the `k` most similar candidates as (candidate_id, similarity) pairs, best first."""
+        ids, sims = self.similarities(text)
+        sims = np.where(ids >= 0, sims, -np.inf)
+        k = min(k, len(self._rows))
+        if k <= 0:
+            return []
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind='stable')]
+        return [(int(ids[row]), float(sims[row])) for row in top]
+
+    def scores_for(self, candidate_ids, text):
+        """Return similarities aligned with `candidate_ids`, NaN for candidates not in the index."""
+        ids, sims = self.similarities(text)
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        result = np.full(len(candidate_ids), np.nan, dtype=np.float32)
+        if not len(ids):
+            return result
+        order = np.argsort(ids, kind='stable')
+        positions = np.searchsorted(ids, candidate_ids, sorter=order)
+        positions = np.minimum(positions, len(ids) - 1)
+        rows = order[positions]
+        found = ids[rows] == candidate_ids
+        result[found] = sims[rows[found]]
+        return result
+
+    def similarity(self, text_a, text_b):
+        """Return the cosine similarity of two texts under the index's current IDF weights."""
+        with self._lock:
+            idf = self._idf()
+        a, norm_a = self._weighted_query(text_a, idf)
+        b, norm_b = self._weighted_query(text_b, idf)
+        if norm_a == 0 or norm_b == 0:
+            return 0.0
+        return float(a @ b) / (norm_a * norm_b)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'path': str(self.path),
+                'embedder': self.embedder.name,
+                'dim': self.dim,
+                'candidates': len(self._rows),
+                'rows': self.count,
+                'tombstones': self.count - len(self._rows),
+                'capacity': self.capacity,
+                'size_bytes': self.capacity * self.dim * np.dtype(np.float32).itemsize,
+                'version': self.version,
+            }
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """Return the process-wide candidate index, reloaded if another process has updated it."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VectorIndex(settings.SEMANTIC_INDEX_DIR, get_embedder())
+    _index.refresh()
+    return _index
+
+def index_candidates(rows):
+    """Index (candidate_id, cv_data) rows; return the number of candidates (re-)embedded."""
+    rows = list(rows)
+    if not rows:
+        return 0
+    return get_index().add([cid for cid, _ in rows], [candidate_text(cv_data) for _, cv_data in rows])
+
+def sync_candidates(rebuild=False):
+    """Bring the index in line with the Candidate table; return (embedded, removed)."""
+    from .models import Candidate
+    index = get_index()
+    if rebuild:
+        index.reset()
+    embedded = 0
+    seen = set()
+    chunk = []
+    for candidate_id, cv_data in Candidate.objects.order_by('id').values_list('id', 'cv_data').iterator(chunk_size=SYNC_CHUNK_SIZE):
+        seen.add(candidate_id)
+        chunk.append((candidate_id, cv_data))
+        if len(chunk) >= SYNC_CHUNK_SIZE:
+            embedded += index_candidates(chunk)
+            chunk = []
+    embedded += index_candidates(chunk)
+    removed = index.remove(index.candidate_ids() - seen)
+    logger.info(f"Semantic index synced: {embedded} embedded, {removed} removed, {len(index)} indexed")
+    return embedded, removed
+
+def semantic_score(cv_data, jd_data):
+    """Return the 0-100 semantic similarity of a CV and a JD, or None if it cannot be computed."""
+    try:
+        return round(100.0 * get_index().similarity(candidate_text(cv_data), jd_text(jd_data)), 2)
+    except Exception as e:
+        logger.error(f"Error calculating semantic score: {str(e)}")
+        return None
+
+def blend_score(keyword_score, semantic, weight=None):
+    """Blend a keyword match score with a semantic score using SEMANTIC_SCORE_WEIGHT."""
+    weight = settings.SEMANTIC_SCORE_WEIGHT if weight is None else weight
+    if semantic is None or not weight:
+        return keyword_score
+    return round((1.0 - weight) * keyword_score + weight * semantic, 2)
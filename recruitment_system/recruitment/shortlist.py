@@ -0,0 +1,83 @@
+import base64
+import json
+import logging
+from django.conf import settings
+from django.db.models import F, Q
+from .models import Application, ScreeningTask
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_SCORE = 70.0
+SORT_SCORE_DESC = 'score'
+SORT_SCORE_ASC = 'score_asc'
+SORT_NAME = 'name'
+SORT_CHOICES = [
+    (SORT_SCORE_DESC, 'Highest score first'),
+    (SORT_SCORE_ASC, 'Lowest score first'),
+    (SORT_NAME, 'Name'),
+]
+# Ordering and the field compared by the keyset cursor for each sort; `id` breaks ties
+SORT_ORDERING = {
+    SORT_SCORE_DESC: (('-match_score', '-id'), 'match_score'),
+    SORT_SCORE_ASC: (('match_score', 'id'), 'match_score'),
+    SORT_NAME: (('candidate__name', 'id'), 'candidate__name'),
+}
+# Only the columns the shortlist template renders
+SHORTLIST_COLUMNS = {
+    'name': F('candidate__name'),
+    'email': F('candidate__email'),
+    'cv_file': F('candidate__cv_file'),
+}
+
+def encode_cursor(row, sort):
+    """Return an opaque cursor pointing just after `row` for the given sort."""
+    value = row['name'] if sort == SORT_NAME else row['match_score']
+    return base64.urlsafe_b64encode(json.dumps([value, row['id']]).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Return (value, id) from a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        logger.warning(f"Ignoring malformed shortlist cursor: {cursor!r}")
+        return None
+
+def batch_applications(batch):
+    """Return the batch job's applications for candidates screened in this batch."""
+    candidate_ids = batch.tasks.filter(status=ScreeningTask.STATUS_DONE).values('candidate_id')
+    return Application.objects.filter(job_id=batch.job_id, candidate_id__in=candidate_ids)
+
+def shortlist_page(batch, min_score=DEFAULT_MIN_SCORE, sort=SORT_SCORE_DESC, cursor=None, page_size=None):
+    """Return one keyset-paginated page of a batch's shortlist.
+
+    The result holds `candidates` (dicts with id, name, email, match_score and cv_file), `total`
+    (matching candidates across all pages) and `next_cursor` (None on the last page).
+    """
+    page_size = page_size or settings.SHORTLIST_PAGE_SIZE
+    ordering, key = SORT_ORDERING.get(sort, SORT_ORDERING[SORT_SCORE_DESC])
+    queryset = batch_applications(batch).filter(match_score__gte=min_score)
+    total = queryset.count()
+    position = decode_cursor(cursor)
+    if position is not None:
+        value, row_id = position
+        if ordering[0].startswith('-'):
+            queryset = queryset.filter(Q(**{f'{key}__lt': value}) | Q(**{key: value, 'id__lt': row_id}))
+        else:
+            queryset = queryset.filter(Q(**{f'{key}__gt': value}) | Q(**{key: value, 'id__gt': row_id}))
+    rows = list(queryset.order_by(*ordering).values('id', 'match_score', **SHORTLIST_COLUMNS)[:page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    return {
+        'candidates': rows,
+        'total': total,
+        'next_cursor': encode_cursor(rows[-1], sort) if has_next else None,
+    }
+
+def shortlist_rows(batch, min_score=DEFAULT_MIN_SCORE, sort=SORT_SCORE_DESC):
+    """Iterate over every shortlisted row of a batch (same columns as shortlist_page) without paging."""
+    ordering, _ = SORT_ORDERING.get(sort, SORT_ORDERING[SORT_SCORE_DESC])
+    queryset = batch_applications(batch).filter(match_score__gte=min_score).order_by(*ordering)
+    return queryset.values('id', 'match_score', **SHORTLIST_COLUMNS).iterator(chunk_size=500)
@@ -0,0 +1,86 @@
+import os
+import random
+import shutil
+import tempfile
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from recruitment import pdf_text, utils
+from recruitment.async_screening import screen_batch_async
+from recruitment.loadtest import fake_gemini_backend, synthetic_cv, synthetic_jd, synthetic_pdf
+from recruitment.models import ScreeningBatch, ScreeningTask
+from recruitment.screening import create_batch
+from .test_local_extraction import STRUCTURED_CV
+
+@override_settings(EXTRACTION_CACHE_ENABLED=False, NEAR_DUPLICATE_DETECTION_ENABLED=False, LOCAL_EXTRACTION_MODE='only')
+class ExtractCvsAsyncTests(TestCase):
+    def setUp(self):
+        self.parsed = []
+        extract_texts = pdf_text.extract_texts
+
+        def spy(paths, **kwargs):
+            self.parsed.append(list(paths))
+            return extract_texts(paths, **kwargs)
+
+        patcher = mock.patch('recruitment.utils.pdf_text.extract_texts', side_effect=spy)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def cv(self, email):
+        return synthetic_pdf(STRUCTURED_CV.replace('jane@example.com', email).splitlines())
+
+    def test_cvs_without_text_are_parsed_in_one_pool_call(self):
+        entries = [
+            (self.cv('a@example.com'), 'a' * 64, None),
+            (self.cv('b@example.com'), 'b' * 64, STRUCTURED_CV.replace('jane@', 'b2@')),
+            (self.cv('c@example.com'), 'c' * 64, None),
+            (b'not a pdf', 'd' * 64, None),
+        ]
+        with mock.patch('recruitment.utils._resolve_model', side_effect=AssertionError('model resolved')):
+            results = async_to_sync(utils.extract_cvs_async)(entries)
+        self.assertEqual([result.get('email') for result in results[:3]], ['a@example.com', 'b2@example.com', 'c@example.com'])
+        # The unreadable CV is not parsed a second time
+        self.assertEqual(results[3], {})
+        self.assertEqual(len(self.parsed), 1)
+        self.assertEqual(len(self.parsed[0]), 3)
+        # Bytes are parsed from temporary files that are removed afterwards
+        self.assertFalse(any(os.path.exists(path) for path in self.parsed[0]))
+
+    def test_single_cv_and_jd_go_through_the_pool(self):
+        data = async_to_sync(utils.extract_cv_data_async)(self.cv('a@example.com'), digest='a' * 64)
+        self.assertEqual(data['email'], 'a@example.com')
+        with fake_gemini_backend(latency=0):
+            jd = async_to_sync(utils.summarize_jd_async)(synthetic_jd())
+        self.assertEqual(jd['job_title'], 'Security Analyst')
+        self.assertEqual(len(self.parsed), 2)
+
+@override_settings(UPLOAD_PARSE_WAIT=0, EXTRACTION_CACHE_ENABLED=False, NEAR_DUPLICATE_DETECTION_ENABLED=False, SEMANTIC_SCORING_ENABLED=False)
+class ScreenBatchAsyncTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_screens_in_the_request_and_records_stage_metrics(self):
+        rng = random.Random(0)
+        cvs = [SimpleUploadedFile(f'{number}.pdf', synthetic_cv(number, 'async', rng)[1], 'application/pdf') for number in range(3)]
+        batch = create_batch(SimpleUploadedFile('jd.pdf', synthetic_jd(), 'application/pdf'), cvs, claimed=True)
+        with fake_gemini_backend(latency=0, quota_rate=0, error_rate=0, malformed_rate=0, quota_rpm=0):
+            async_to_sync(screen_batch_async)(batch)
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, ScreeningBatch.STATUS_COMPLETED)
+        self.assertEqual(batch.tasks.filter(status=ScreeningTask.STATUS_DONE).count(), 3)
+        self.assertEqual(batch.stage_metrics['jd_summary_seconds_count'], 1)
+        self.assertEqual(batch.stage_metrics['cv_extraction_seconds_count'], 3)
+        # The JD, then the three CVs in one call
+        self.assertEqual(batch.stage_metrics['pdf_parse_batch_seconds_count'], 2)
+
+    def test_metrics_are_recorded_when_the_jd_fails(self):
+        batch = create_batch(SimpleUploadedFile('jd.pdf', b'not a pdf', 'application/pdf'), [], claimed=True)
+        async_to_sync(screen_batch_async)(batch)
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, ScreeningBatch.STATUS_FAILED)
+        self.assertEqual(batch.stage_metrics['jd_summary_seconds_count'], 1)
@@ -0,0 +1,93 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from recruitment.models import Application, Candidate, CandidateSkill, Job, ScreeningBatch
+from recruitment.screening import get_job, record_applications, sync_candidate_skills
+
+JD_A = {'job_title': 'Security Analyst', 'summary': 'SIEM required'}
+JD_B = {'job_title': 'Security Analyst', 'summary': 'Penetration testing required'}
+
+class JobTests(TestCase):
+    def test_same_title_with_another_jd_is_another_job(self):
+        first = get_job('Security Analyst', JD_A)
+        self.assertEqual(get_job('Security Analyst', dict(reversed(JD_A.items()))), first)
+        self.assertNotEqual(get_job('Security Analyst', JD_B), first)
+        self.assertEqual(Job.objects.filter(title='Security Analyst').count(), 2)
+
+    def test_same_title_batches_keep_their_own_scores(self):
+        candidate = Candidate.objects.create(name='Jane', email='jane@example.com')
+        for jd_data, score in ((JD_A, 90.0), (JD_B, 40.0)):
+            batch = ScreeningBatch.objects.create(jd_file='jd.pdf', job_title=jd_data['job_title'], jd_data=jd_data)
+            record_applications(batch, [(candidate, score)])
+        scores = dict(Application.objects.values_list('job__jd_data__summary', 'match_score'))
+        self.assertEqual(scores, {'SIEM required': 90.0, 'Penetration testing required': 40.0})
+
+class CandidateSkillTests(TestCase):
+    def test_sync_replaces_skills_and_queries_by_skill(self):
+        candidate = Candidate.objects.create(name='Jane', email='jane@example.com')
+        sync_candidate_skills([(candidate, {'skills': ['SIEM', ' Python  ', 'siem'], 'certifications': ['CISSP']})])
+        self.assertEqual(
+            set(candidate.candidate_skills.values_list('skill__name', 'source')),
+            {('siem', 'skill'), ('python', 'skill'), ('cissp', 'certification')},
+        )
+        sync_candidate_skills([(candidate, {'skills': ['AWS', 'siem']})])
+        self.assertEqual(set(candidate.candidate_skills.values_list('skill__name', flat=True)), {'aws', 'siem'})
+        job = get_job('Security Analyst', JD_A)
+        Application.objects.create(candidate=candidate, job=job, match_score=80.0)
+        applications = Application.objects.for_job('Security Analyst').min_score(70)
+        self.assertEqual(applications.with_skills('SIEM', 'aws').count(), 1)
+        self.assertEqual(applications.with_skills('SIEM', 'python').count(), 0)
+
+class PopulateNormalizedSchemaMigrationTests(TransactionTestCase):
+    migrate_from = ('recruitment', '0005_extraction_cache')
+    migrate_to = ('recruitment', '0007_populate_normalized_candidate_schema')
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes('recruitment')
+        executor.migrate([self.migrate_from])
+        self.addCleanup(self.migrate_latest)
+        old_apps = executor.loader.project_state([self.migrate_from]).apps
+        Candidate = old_apps.get_model('recruitment', 'Candidate')
+        ScreeningBatch = old_apps.get_model('recruitment', 'ScreeningBatch')
+        ScreeningBatch.objects.create(jd_file='a.pdf', job_title='Security Analyst', jd_data=JD_A)
+        ScreeningBatch.objects.create(jd_file='b.pdf', job_title='Security Analyst', jd_data=JD_B)
+        ScreeningBatch.objects.create(jd_file='c.pdf', job_title='Security Analyst')
+        Candidate.objects.create(
+            name='Jane', email='jane@example.com', job_title='Security Analyst', match_score=75.0,
+            cv_data={'skills': ['SIEM', 'Python'], 'certifications': ['CISSP', 'siem']},
+        )
+        Candidate.objects.create(name='John', email='john@example.com', job_title='Developer', match_score=20.0, cv_data='junk')
+
+    def migrate_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.latest)
+
+    def test_populates_jobs_skills_and_applications(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([self.migrate_to])
+        new_apps = executor.loader.project_state([self.migrate_to]).apps
+        ScreeningBatch = new_apps.get_model('recruitment', 'ScreeningBatch')
+        Application = new_apps.get_model('recruitment', 'Application')
+        CandidateSkill = new_apps.get_model('recruitment', 'CandidateSkill')
+
+        jobs = {(job.title, job.jd_data.get('summary')): job for job in new_apps.get_model('recruitment', 'Job').objects.all()}
+        self.assertEqual(set(jobs), {
+            ('Security Analyst', 'SIEM required'),
+            ('Security Analyst', 'Penetration testing required'),
+            ('Developer', None),
+        })
+        for job in jobs.values():
+            self.assertEqual(job.jd_hash, Job.content_hash(job.title, job.jd_data))
+        batch_jobs = dict(ScreeningBatch.objects.values_list('jd_file', 'job__jd_data__summary'))
+        # The unsummarized batch applies to the title's most recent JD
+        self.assertEqual(batch_jobs, {'a.pdf': 'SIEM required', 'b.pdf': 'Penetration testing required', 'c.pdf': 'Penetration testing required'})
+        applications = set(Application.objects.values_list('candidate__email', 'job__title', 'job__jd_data__summary', 'match_score'))
+        self.assertEqual(applications, {
+            ('jane@example.com', 'Security Analyst', 'Penetration testing required', 75.0),
+            ('john@example.com', 'Developer', None, 20.0),
+        })
+        self.assertEqual(
+            set(CandidateSkill.objects.values_list('candidate__email', 'skill__name', 'source')),
+            {('jane@example.com', 'siem', 'skill'), ('jane@example.com', 'python', 'skill'), ('jane@example.com', 'cissp', 'certification')},
+        )
@@ -0,0 +1,76 @@
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from recruitment import screening
+from recruitment.models import Application, Candidate, ScreeningBatch, ScreeningTask
+from recruitment.screening import get_job, save_candidates, save_scored
+
+def cv(email, name, skills=()):
+    return {'email': email, 'name': name, 'skills': list(skills)}
+
+class SaveCandidatesTests(TestCase):
+    def test_upserts_by_email_and_last_entry_wins(self):
+        existing = Candidate.objects.create(name='Old name', email='jane@example.com', match_score=10.0)
+        saved = save_candidates([
+            (cv('jane@example.com', 'Jane'), 50.0, 'Analyst', 'cvs/a.pdf'),
+            (cv('john@example.com', 'John'), 60.0, 'Analyst', 'cvs/b.pdf'),
+            (cv('jane@example.com', 'Jane Doe'), 70.0, 'Analyst', 'cvs/c.pdf'),
+        ])
+        self.assertEqual([candidate.email for candidate in saved], ['jane@example.com', 'john@example.com', 'jane@example.com'])
+        self.assertEqual(saved[0].pk, existing.pk)
+        self.assertIs(saved[0], saved[2])
+        self.assertEqual(Candidate.objects.count(), 2)
+        existing.refresh_from_db()
+        self.assertEqual((existing.name, existing.match_score, existing.cv_file), ('Jane Doe', 70.0, 'cvs/c.pdf'))
+
+class SaveScoredTests(TestCase):
+    def setUp(self):
+        self.batch = ScreeningBatch.objects.create(
+            jd_file='jd.pdf', job_title='Analyst', jd_data={'summary': 'SIEM required'}, status=ScreeningBatch.STATUS_PROCESSING,
+        )
+
+    def scored(self, *entries):
+        return [
+            (ScreeningTask.objects.create(batch=self.batch, file_name=f'{number}.pdf', cv_file=f'cvs/{number}.pdf', status=ScreeningTask.STATUS_RUNNING), cv_data, score)
+            for number, (cv_data, score) in enumerate(entries)
+        ]
+
+    def test_saves_candidates_skills_applications_and_tasks(self):
+        scored = self.scored((cv('a@example.com', 'A', ['SIEM']), 90.0), (cv('b@example.com', 'B'), 30.0))
+        save_scored(scored)
+        tasks = ScreeningTask.objects.order_by('id')
+        self.assertEqual([task.status for task in tasks], [ScreeningTask.STATUS_DONE] * 2)
+        self.assertEqual(tasks[0].result, {'name': 'A', 'email': 'a@example.com', 'match_score': 90.0, 'cv_file': 'cvs/0.pdf'})
+        self.assertEqual(
+            set(Application.objects.values_list('candidate__email', 'job__title', 'batch', 'match_score')),
+            {('a@example.com', 'Analyst', self.batch.pk, 90.0), ('b@example.com', 'Analyst', self.batch.pk, 30.0)},
+        )
+        self.assertEqual(list(Candidate.objects.get(email='a@example.com').candidate_skills.values_list('skill__name', flat=True)), ['siem'])
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        self.batch.job = get_job(self.batch.job_title, self.batch.jd_data)
+        self.batch.save(update_fields=['job'])
+        counts = []
+        for size in (2, 8):
+            scored = self.scored(*[(cv(f'{size}-{n}@example.com', f'C{n}', ['SIEM', f'skill {n}']), 50.0) for n in range(size)])
+            with CaptureQueriesContext(connection) as queries:
+                save_scored(scored)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_a_failing_row_does_not_fail_its_neighbours(self):
+        record_applications = screening.record_applications
+
+        def fail_on_bad_score(batch, scored):
+            if any(score < 0 for _, score in scored):
+                raise ValueError('bad row')
+            return record_applications(batch, scored)
+
+        scored = self.scored((cv('a@example.com', 'A'), 90.0), (cv('b@example.com', 'B'), -1.0), (cv('c@example.com', 'C'), 50.0))
+        with mock.patch('recruitment.screening.record_applications', side_effect=fail_on_bad_score):
+            save_scored(scored)
+        statuses = list(ScreeningTask.objects.order_by('id').values_list('status', 'error'))
+        self.assertEqual(statuses, [(ScreeningTask.STATUS_DONE, ''), (ScreeningTask.STATUS_FAILED, 'bad row'), (ScreeningTask.STATUS_DONE, '')])
+        # The failed row's transaction was rolled back
+        self.assertEqual(set(Candidate.objects.values_list('email', flat=True)), {'a@example.com', 'c@example.com'})
@@ -0,0 +1,69 @@
+import threading
+from unittest import mock
+from django.test import SimpleTestCase
+from recruitment.concurrency import TokenBucket, map_bounded
+
+class MapBoundedTests(SimpleTestCase):
+    def test_results_keep_input_order(self):
+        self.assertEqual(map_bounded(lambda n: n * 2, range(20), max_workers=4), [(n * 2, None) for n in range(20)])
+        self.assertEqual(map_bounded(lambda n: n, [], max_workers=4), [])
+
+    def test_one_failure_keeps_the_other_results(self):
+        def halve(n):
+            if n == 3:
+                raise ValueError('odd one out')
+            return n / 2
+
+        results = map_bounded(halve, [2, 3, 4], max_workers=3)
+        self.assertEqual([result for result, _ in results], [1.0, None, 2.0])
+        self.assertIsInstance(results[1][1], ValueError)
+        self.assertIsNone(results[0][1])
+        self.assertIsNone(results[2][1])
+
+    def test_runs_no_more_than_max_workers_at_once(self):
+        lock = threading.Lock()
+        running = []
+        peak = []
+        barrier = threading.Barrier(3, timeout=5)
+
+        def work(n):
+            with lock:
+                running.append(n)
+                peak.append(len(running))
+            if n < 3:
+                barrier.wait()
+            with lock:
+                running.remove(n)
+
+        map_bounded(work, range(9), max_workers=3)
+        self.assertEqual(max(peak), 3)
+
+    def test_single_worker_runs_inline(self):
+        thread_names = map_bounded(lambda _: threading.current_thread().name, range(3), max_workers=1)
+        self.assertEqual({name for name, _ in thread_names}, {threading.current_thread().name})
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_wait_for_refill(self):
+        with mock.patch('recruitment.concurrency.time.monotonic', return_value=100.0):
+            bucket = TokenBucket(rate=60, period=60.0, capacity=2)
+            self.assertEqual(bucket.reserve(), 0.0)
+            self.assertEqual(bucket.reserve(), 0.0)
+            self.assertAlmostEqual(bucket.reserve(), 1.0)
+        with mock.patch('recruitment.concurrency.time.monotonic', return_value=101.0):
+            self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_drain_discards_saved_burst(self):
+        with mock.patch('recruitment.concurrency.time.monotonic', return_value=100.0):
+            bucket = TokenBucket(rate=30, period=60.0, capacity=5)
+            bucket.drain()
+            self.assertAlmostEqual(bucket.reserve(), 2.0)
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0)
+        self.assertFalse(bucket.enabled)
+        self.assertTrue(all(bucket.reserve() == 0.0 for _ in range(100)))
+
+    def test_acquire_times_out(self):
+        bucket = TokenBucket(rate=1, period=60.0, capacity=1)
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertFalse(bucket.acquire(timeout=0))
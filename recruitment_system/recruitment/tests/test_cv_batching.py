@@ -0,0 +1,58 @@
+import json
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase
+from recruitment.utils import QuotaExceededError, _extract_cv_texts_batch, _parse_cv_batch_result
+
+def response(data):
+    return SimpleNamespace(text=json.dumps(data), usage_metadata=None)
+
+def cv(number):
+    return {'name': f'Candidate {number}', 'email': f'c{number}@example.com', 'skills': ['SIEM']}
+
+class ParseBatchResultTests(SimpleTestCase):
+    def test_entries_are_placed_by_index(self):
+        result = json.dumps([dict(cv(2), index=2), dict(cv(1), index=1), dict(cv(3), index=3)])
+        self.assertEqual(_parse_cv_batch_result(result, 3), [cv(1), cv(2), cv(3)])
+
+    def test_unusable_entries_are_none(self):
+        result = json.dumps([dict(cv(1), index=1), dict(cv(9), index=1), dict(cv(9), index=7), 'junk', dict(cv(3), index='3')])
+        self.assertEqual(_parse_cv_batch_result(result, 3), [cv(1), None, None])
+
+    def test_missing_index_falls_back_to_position(self):
+        self.assertEqual(_parse_cv_batch_result(json.dumps([cv(1), cv(2)]), 2), [cv(1), cv(2)])
+
+    def test_unparseable_response_gives_no_entries(self):
+        self.assertEqual(_parse_cv_batch_result('not json at all', 2), [None, None])
+
+class ExtractBatchTests(SimpleTestCase):
+    entries = [('CV one text', 'c1@example.com'), ('CV two text', 'c2@example.com'), ('CV three text', None)]
+
+    def test_one_request_for_the_whole_batch(self):
+        batch = response([dict(cv(n), index=n) for n in (1, 2, 3)])
+        with mock.patch('recruitment.utils.make_api_call', return_value=batch) as call:
+            self.assertEqual(_extract_cv_texts_batch(self.entries, model=None), [cv(1), cv(2), cv(3)])
+        self.assertEqual(call.call_count, 1)
+        prompt = call.call_args.args[1]
+        self.assertIn('CV 1:\nCV one text', prompt)
+        self.assertIn('CV 3:\nCV three text', prompt)
+
+    def test_unusable_entries_are_retried_alone(self):
+        # Entry 2 is missing and entry 3 has no name; both are retried with a single-CV prompt
+        batch = response([dict(cv(1), index=1), {'email': 'c3@example.com', 'index': 3}])
+        calls = [batch, response(cv(2)), QuotaExceededError('quota')]
+        with mock.patch('recruitment.utils.make_api_call', side_effect=calls) as call:
+            results = _extract_cv_texts_batch(self.entries, model=None)
+        self.assertEqual(results, [cv(1), cv(2), None])
+        self.assertEqual(call.call_count, 3)
+        self.assertIn('CV: CV two text', call.call_args_list[1].args[1])
+
+    def test_batch_quota_error_propagates(self):
+        with mock.patch('recruitment.utils.make_api_call', side_effect=QuotaExceededError('quota')):
+            with self.assertRaises(QuotaExceededError):
+                _extract_cv_texts_batch(self.entries, model=None)
+
+    def test_failed_batch_request_retries_each_cv(self):
+        calls = [RuntimeError('server error'), response(cv(1)), response(cv(2)), response(cv(3))]
+        with mock.patch('recruitment.utils.make_api_call', side_effect=calls):
+            self.assertEqual(_extract_cv_texts_batch(self.entries, model=None), [cv(1), cv(2), cv(3)])
@@ -0,0 +1,118 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import http_date
+from recruitment import downloads
+
+CONTENT = bytes(range(256)) * 4
+
+class DownloadTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, CV_DOWNLOAD_OFFLOAD='')
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(self.media_root, downloads.CV_DIRECTORY))
+        self.path = self.store('jane.pdf', CONTENT)
+        self.factory = RequestFactory()
+
+    def store(self, name, content):
+        path = os.path.join(self.media_root, downloads.CV_DIRECTORY, name)
+        with open(path, 'wb') as fh:
+            fh.write(content)
+        return os.path.realpath(path)
+
+    def get(self, **headers):
+        return downloads.file_response(self.factory.get('/download-cv/cvs/jane.pdf/', **headers), self.path)
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_resolve_cv_path_stays_inside_the_cv_directory(self):
+        self.assertEqual(downloads.resolve_cv_path('cvs/jane.pdf'), self.path)
+        self.assertIsNone(downloads.resolve_cv_path('cvs/missing.pdf'))
+        self.assertIsNone(downloads.resolve_cv_path('cvs/../../etc/passwd'))
+        with open(os.path.join(self.media_root, 'secret.pdf'), 'wb') as fh:
+            fh.write(b'secret')
+        self.assertIsNone(downloads.resolve_cv_path('cvs/../secret.pdf'))
+
+    def test_full_download_advertises_ranges_and_validators(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+    def test_single_byte_ranges(self):
+        for header, start, end in (('bytes=0-9', 0, 9), ('bytes=1000-', 1000, 1023), ('bytes=-5', 1019, 1023), ('bytes=10-5000', 10, 1023)):
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(self.body(response), CONTENT[start:end + 1])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{len(CONTENT)}')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+
+    def test_unsatisfiable_range_is_416(self):
+        for header in ('bytes=1024-', 'bytes=-0', 'bytes=9-3'):
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_malformed_or_multiple_ranges_serve_the_whole_file(self):
+        for header in ('bytes=0-1,5-6', 'bytes=-', 'items=0-1'):
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.body(response), CONTENT)
+
+    def test_if_range_only_honours_the_current_version(self):
+        etag = self.get()['ETag']
+        last_modified = int(os.stat(self.path).st_mtime)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag).status_code, 206)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=http_date(last_modified)).status_code, 206)
+        stale = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"0-0"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.body(stale), CONTENT)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=http_date(last_modified - 60)).status_code, 200)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_offload_leaves_the_body_to_the_proxy(self):
+        with override_settings(CV_DOWNLOAD_OFFLOAD=downloads.OFFLOAD_X_ACCEL_REDIRECT, CV_DOWNLOAD_ACCEL_PREFIX='/protected-media/'):
+            response = self.get(HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/cvs/jane.pdf')
+        self.assertNotIn('Content-Type', response)
+        with override_settings(CV_DOWNLOAD_OFFLOAD=downloads.OFFLOAD_X_SENDFILE):
+            self.assertEqual(self.get()['X-Sendfile'], self.path)
+
+    def test_stream_zip_archives_existing_cvs(self):
+        self.store('john.pdf', b'%PDF john')
+        rows = [
+            {'name': 'Jane Doe', 'match_score': 91.5, 'cv_file': 'cvs/jane.pdf'},
+            {'name': 'Jane Doe', 'match_score': 91.5, 'cv_file': 'cvs/john.pdf'},
+            {'name': '???', 'match_score': 75.0, 'cv_file': 'cvs/john.pdf'},
+            {'name': 'Gone', 'match_score': 70.0, 'cv_file': 'cvs/missing.pdf'},
+            {'name': 'Nobody', 'match_score': 70.0, 'cv_file': ''},
+        ]
+        with self.assertLogs('recruitment.downloads', 'WARNING'):
+            chunks = list(downloads.stream_zip(rows))
+        self.assertGreater(len(chunks), 1)
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertEqual(archive.namelist(), ['091.5_Jane_Doe.pdf', '091.5_Jane_Doe_2.pdf', '075.0_candidate.pdf'])
+            self.assertEqual(archive.read('091.5_Jane_Doe.pdf'), CONTENT)
+            self.assertEqual(archive.read('075.0_candidate.pdf'), b'%PDF john')
+            self.assertIsNone(archive.testzip())
+
+    def test_stream_zip_of_nothing_is_an_empty_archive(self):
+        with zipfile.ZipFile(io.BytesIO(b''.join(downloads.stream_zip([])))) as archive:
+            self.assertEqual(archive.namelist(), [])
@@ -0,0 +1,68 @@
+import io
+import time
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from recruitment import extraction_cache
+from recruitment.models import ExtractionCacheEntry
+from recruitment.utils import CV_PROMPT_VERSION, JD_PROMPT_VERSION, extract_cvs_concurrently, summarize_jd
+
+@override_settings(EXTRACTION_CACHE_ENABLED=True)
+class ExtractionCacheTests(TestCase):
+    def setUp(self):
+        extraction_cache._pending_hits.clear()
+        extraction_cache._last_hit_flush = time.monotonic()
+        extraction_cache._approx_bytes = None
+        extraction_cache._writes_since_count = 0
+
+    def test_hit_returns_stored_data_and_counts_hits(self):
+        extraction_cache.put('cv', 'a' * 64, 'cv-v3', 'gemini-a', {'name': 'Jane'})
+        self.assertEqual(extraction_cache.get('cv', 'a' * 64, 'cv-v3', 'gemini-a'), {'name': 'Jane'})
+        # Without a resolved model any model's entry is a hit
+        self.assertEqual(extraction_cache.get('cv', 'a' * 64, 'cv-v3'), {'name': 'Jane'})
+        self.assertIsNone(extraction_cache.get('cv', 'a' * 64, 'cv-v3', 'gemini-b'))
+        self.assertIsNone(extraction_cache.get('cv', 'a' * 64, 'cv-v2', 'gemini-a'))
+        self.assertIsNone(extraction_cache.get('jd', 'a' * 64, 'cv-v3', 'gemini-a'))
+        self.assertEqual(ExtractionCacheEntry.objects.get().hits, 0)
+        extraction_cache.flush_hits()
+        self.assertEqual(ExtractionCacheEntry.objects.get().hits, 2)
+
+    def test_disabled_cache_stores_nothing(self):
+        with override_settings(EXTRACTION_CACHE_ENABLED=False):
+            extraction_cache.put('cv', 'a' * 64, 'cv-v3', 'gemini-a', {'name': 'Jane'})
+            self.assertIsNone(extraction_cache.get('cv', 'a' * 64, 'cv-v3', 'gemini-a'))
+        self.assertFalse(ExtractionCacheEntry.objects.exists())
+
+    def test_evict_removes_least_recently_used_down_to_low_water(self):
+        for index in range(5):
+            extraction_cache.put('cv', f'{index}' * 64, 'cv-v3', 'gemini-a', {'text': 'x' * 90})
+        now = timezone.now()
+        for index, entry in enumerate(ExtractionCacheEntry.objects.order_by('content_hash')):
+            ExtractionCacheEntry.objects.filter(pk=entry.pk).update(last_accessed_at=now - timedelta(minutes=10 - index))
+        size = ExtractionCacheEntry.objects.first().size_bytes
+        # Reading the oldest entry makes it the most recently used
+        self.assertIsNotNone(extraction_cache.get('cv', '0' * 64, 'cv-v3', 'gemini-a'))
+        self.assertEqual(extraction_cache.evict(max_bytes=size * 5), 0)
+        self.assertEqual(extraction_cache.evict(max_bytes=size * 4), 2)
+        remaining = set(ExtractionCacheEntry.objects.values_list('content_hash', flat=True))
+        self.assertEqual(remaining, {'0' * 64, '3' * 64, '4' * 64})
+
+    def test_store_over_budget_evicts(self):
+        extraction_cache.put('cv', '0' * 64, 'cv-v3', 'gemini-a', {'text': 'x' * 90})
+        size = ExtractionCacheEntry.objects.get().size_bytes
+        with override_settings(EXTRACTION_CACHE_MAX_BYTES=size * 3):
+            for index in range(1, 6):
+                extraction_cache.put('cv', f'{index}' * 64, 'cv-v3', 'gemini-a', {'text': 'x' * 90})
+        total = sum(ExtractionCacheEntry.objects.values_list('size_bytes', flat=True))
+        self.assertLessEqual(total, size * 3)
+        self.assertTrue(ExtractionCacheEntry.objects.filter(content_hash='5' * 64).exists())
+
+    def test_hits_need_no_model(self):
+        jd = io.BytesIO(b'%PDF-1.4 job description')
+        summary = {'job_title': 'Security Analyst', 'summary': 'SIEM required'}
+        extraction_cache.put('jd', extraction_cache.content_hash(jd), JD_PROMPT_VERSION, 'gemini-a', summary)
+        extraction_cache.put('cv', 'c' * 64, CV_PROMPT_VERSION, 'gemini-a', {'name': 'Jane'})
+        with mock.patch('recruitment.utils._resolve_model', side_effect=AssertionError('model resolved')):
+            self.assertEqual(summarize_jd(jd), summary)
+            self.assertEqual(extract_cvs_concurrently(['/nonexistent.pdf'], digests=['c' * 64]), [{'name': 'Jane'}])
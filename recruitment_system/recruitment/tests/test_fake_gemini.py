@@ -0,0 +1,81 @@
+import json
+from django.test import SimpleTestCase, override_settings
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+from recruitment import fake_gemini
+from recruitment.loadtest import percentile
+
+CV_TEXT = 'Jane Doe\njane@example.com\nSecurity analyst, 5 years with SIEM and Python\nBachelor of Science degree\nCISSP'
+
+@override_settings(
+    FAKE_GEMINI_LATENCY=0, FAKE_GEMINI_LATENCY_JITTER=0, FAKE_GEMINI_QUOTA_RATE=0, FAKE_GEMINI_ERROR_RATE=0,
+    FAKE_GEMINI_MALFORMED_RATE=0, FAKE_GEMINI_QUOTA_RPM=0,
+)
+class FakeGeminiTests(SimpleTestCase):
+    def setUp(self):
+        fake_gemini.reseed(0)
+        self.model = fake_gemini.GenerativeModel('gemini-2.0-flash')
+
+    def test_lists_models_like_the_sdk(self):
+        models = fake_gemini.list_models()
+        self.assertEqual([model.name for model in models], [f'models/{name}' for name in fake_gemini.MODEL_NAMES])
+        self.assertTrue(all('generateContent' in model.supported_generation_methods for model in models))
+
+    def test_answers_single_cv_batch_and_jd_prompts(self):
+        cv = json.loads(self.model.generate_content(f'Extract the CV.\nCV:\n{CV_TEXT}').text)
+        self.assertEqual(cv['name'], 'Jane Doe')
+        self.assertEqual(cv['email'], 'jane@example.com')
+        self.assertEqual(cv['skills'], ['siem', 'python'])
+        self.assertEqual(cv['certifications'], ['CISSP'])
+        batch = json.loads(fake_gemini.respond(f'Extract each CV.\n\nCV 0:\n{CV_TEXT}\n\nCV 1:\nJohn Roe\njohn@example.com'))
+        self.assertEqual([(entry['index'], entry['email']) for entry in batch], [(0, 'jane@example.com'), (1, 'john@example.com')])
+        jd = json.loads(fake_gemini.respond('Summarize.\nJob description:\nSecurity Analyst\nSIEM required, 3+ years'))
+        self.assertEqual(jd['job_title'], 'Security Analyst')
+        self.assertEqual(jd['summary'], 'Skills: siem; Experience: 3 years')
+
+    def test_reports_usage(self):
+        usage = self.model.generate_content(f'CV:\n{CV_TEXT}').usage_metadata
+        self.assertGreater(usage.prompt_token_count, 0)
+        self.assertGreater(usage.candidates_token_count, 0)
+
+    def test_injected_faults(self):
+        with override_settings(FAKE_GEMINI_QUOTA_RATE=1):
+            self.assertRaises(ResourceExhausted, self.model.generate_content, CV_TEXT)
+        with override_settings(FAKE_GEMINI_ERROR_RATE=1):
+            self.assertRaises(ServiceUnavailable, self.model.generate_content, CV_TEXT)
+        with override_settings(FAKE_GEMINI_MALFORMED_RATE=1):
+            with self.assertRaises(json.JSONDecodeError):
+                json.loads(self.model.generate_content(f'CV:\n{CV_TEXT}').text)
+
+    def test_per_minute_quota_suggests_a_retry_delay(self):
+        with override_settings(FAKE_GEMINI_QUOTA_RPM=2):
+            self.model.generate_content(CV_TEXT)
+            self.model.generate_content(CV_TEXT)
+            with self.assertRaisesRegex(ResourceExhausted, r'retry in \d+\.\ds'):
+                self.model.generate_content(CV_TEXT)
+            fake_gemini.reseed(0)
+            self.model.generate_content(CV_TEXT)
+
+    def test_reseed_repeats_the_fault_sequence(self):
+        with override_settings(FAKE_GEMINI_ERROR_RATE=0.5):
+            def outcomes():
+                fake_gemini.reseed(7)
+                results = []
+                for _ in range(20):
+                    try:
+                        self.model.generate_content(CV_TEXT)
+                        results.append(True)
+                    except ServiceUnavailable:
+                        results.append(False)
+                return results
+            first = outcomes()
+            self.assertEqual(outcomes(), first)
+            self.assertIn(True, first)
+            self.assertIn(False, first)
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 95), 5)
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertIsNone(percentile([], 50))
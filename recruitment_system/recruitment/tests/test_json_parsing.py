@@ -0,0 +1,59 @@
+from django.test import SimpleTestCase, override_settings
+from recruitment import metrics
+from recruitment.utils import CV_RESPONSE_SCHEMA, parse_json_response, structured_output_config
+
+TIERS = ('direct', 'completed', 'repaired', 'failed')
+
+class ParseJsonResponseTests(SimpleTestCase):
+    def parse(self, text, expected_type=dict):
+        """Return (value, tier) for one parse."""
+        before = {tier: metrics.get(f'json_parse_{tier}') for tier in TIERS}
+        value = parse_json_response(text, expected_type)
+        tiers = [tier for tier in TIERS if metrics.get(f'json_parse_{tier}') > before[tier]]
+        self.assertEqual(len(tiers), 1)
+        return value, tiers[0]
+
+    def test_valid_json_parses_directly(self):
+        self.assertEqual(self.parse('{"name": "Jane", "skills": ["SIEM"]}'), ({'name': 'Jane', 'skills': ['SIEM']}, 'direct'))
+
+    def test_markdown_wrapper_and_prose_are_skipped(self):
+        self.assertEqual(self.parse('Here you go:\n```json\n{"name": "Jane"}\n```'), ({'name': 'Jane'}, 'direct'))
+
+    def test_truncated_output_is_completed(self):
+        self.assertEqual(
+            self.parse('{"name": "Jane", "skills": ["SIEM", "Pyth'),
+            ({'name': 'Jane', 'skills': ['SIEM', 'Pyth']}, 'completed'),
+        )
+        self.assertEqual(self.parse('{"name": "Jane", "skills": ["SIEM"],'), ({'name': 'Jane', 'skills': ['SIEM']}, 'completed'))
+
+    def test_truncated_list_drops_the_partial_member(self):
+        value, tier = self.parse('[{"index": 1, "name": "Jane"}, {"index": 2, "na', expected_type=list)
+        self.assertEqual(tier, 'completed')
+        self.assertEqual(value[0], {'index': 1, 'name': 'Jane'})
+
+    def test_invalid_escapes_fall_back_to_the_regex_repair(self):
+        value, tier = self.parse("{\"education\": [\"Bachelor\\'s in IT\"], \"name\": \"Jane\",}")
+        self.assertEqual(tier, 'repaired')
+        self.assertEqual(value, {'education': ["Bachelor's in IT"], 'name': 'Jane'})
+
+    def test_unparseable_text_returns_none(self):
+        self.assertEqual(self.parse('the model refused'), (None, 'failed'))
+        self.assertEqual(self.parse(''), (None, 'failed'))
+        self.assertEqual(self.parse('{"name": "Jane"}', expected_type=list), (None, 'failed'))
+
+    def test_summary_object_becomes_a_string(self):
+        value, _ = self.parse('{"summary": {"Skills": "SIEM", "Experience": "3 years"}}')
+        self.assertEqual(value['summary'], 'Skills: SIEM; Experience: 3 years')
+
+class StructuredOutputConfigTests(SimpleTestCase):
+    @override_settings(GEMINI_STRUCTURED_OUTPUT=True)
+    def test_requests_json_matching_the_schema(self):
+        self.assertEqual(
+            structured_output_config(CV_RESPONSE_SCHEMA),
+            {'response_mime_type': 'application/json', 'response_schema': CV_RESPONSE_SCHEMA},
+        )
+        self.assertIsNone(structured_output_config(None))
+
+    @override_settings(GEMINI_STRUCTURED_OUTPUT=False)
+    def test_disabled(self):
+        self.assertIsNone(structured_output_config(CV_RESPONSE_SCHEMA))
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from unittest import mock
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from recruitment import fake_gemini
+from recruitment.llm_client import LLMClient
+
+class LLMClientTests(SimpleTestCase):
+    def test_importing_the_app_does_not_import_the_sdk(self):
+        code = (
+            'import sys, django; django.setup(); '
+            'import recruitment.utils, recruitment.screening, recruitment.views; '
+            "print('google.generativeai' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    @override_settings(GEMINI_BACKEND='fake')
+    def test_backend_is_loaded_once_on_first_use(self):
+        client = LLMClient()
+        self.assertFalse(client.is_loaded())
+        with mock.patch.object(client, '_load', wraps=client._load) as load:
+            self.assertIs(client.backend(), fake_gemini)
+            client.list_models()
+            client.GenerativeModel('gemini-2.0-flash')
+        self.assertEqual(load.call_count, 1)
+        self.assertTrue(client.is_loaded())
+
+    @override_settings(GEMINI_BACKEND='google', GOOGLE_API_KEY='')
+    def test_missing_api_key_is_reported_on_first_use(self):
+        client = LLMClient()
+        with self.assertRaisesMessage(ImproperlyConfigured, 'GOOGLE_API_KEY is not set'):
+            client.list_models()
+        self.assertFalse(client.is_loaded())
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase, override_settings
+from recruitment import local_extraction, utils
+from recruitment.loadtest import synthetic_pdf
+
+STRUCTURED_CV = '\n'.join([
+    'Jane Doe',
+    'jane@example.com | +1 555 0100',
+    'Skills: SIEM, Python, Firewalls, Linux',
+    'Experience',
+    '5 years as security analyst at Example Bank',
+    'Education',
+    "Bachelor's in Computer Science",
+    'Certifications: CISSP, CEH',
+])
+PROSE_CV = (
+    'Profile of john roe, reachable at john@example.com. Worked on many things over the years '
+    'and enjoys solving problems with colleagues.'
+)
+NO_EMAIL_CV = STRUCTURED_CV.replace('jane@example.com | ', '')
+
+class ExtractTests(SimpleTestCase):
+    def test_structured_cv_is_extracted_with_high_confidence(self):
+        data, confidence = local_extraction.extract(STRUCTURED_CV)
+        self.assertEqual(confidence, 1.0)
+        self.assertEqual(data['name'], 'Jane Doe')
+        self.assertEqual(data['email'], 'jane@example.com')
+        self.assertEqual(data['skills'][:4], ['SIEM', 'Python', 'Firewalls', 'Linux'])
+        self.assertEqual(data['experience'], ['5 years as security analyst at Example Bank'])
+        self.assertEqual(data['education'], ["Bachelor's in Computer Science"])
+        self.assertEqual(data['certifications'], ['CISSP', 'CEH'])
+        self.assertIn('Experience: 5 years', data['summary'])
+
+    def test_confidence_is_the_weighted_share_of_fields_found(self):
+        _, confidence = local_extraction.extract('Jane Doe\njane@example.com\nSkills: SIEM, Python')
+        self.assertEqual(confidence, 0.7)
+        _, confidence = local_extraction.extract(NO_EMAIL_CV)
+        self.assertEqual(confidence, 0.0)
+
+class TryExtractTests(SimpleTestCase):
+    def test_auto_mode_gates_on_confidence(self):
+        with override_settings(LOCAL_EXTRACTION_MODE='auto', LOCAL_EXTRACTION_MIN_CONFIDENCE=0.85):
+            self.assertIsInstance(local_extraction.try_extract(STRUCTURED_CV), local_extraction.LocalExtraction)
+            self.assertIsNone(local_extraction.try_extract(PROSE_CV))
+            self.assertIsNone(local_extraction.try_extract('Jane Doe\njane@example.com\nSkills: SIEM, Python'))
+        with override_settings(LOCAL_EXTRACTION_MODE='auto', LOCAL_EXTRACTION_MIN_CONFIDENCE=0.7):
+            self.assertIsNotNone(local_extraction.try_extract('Jane Doe\njane@example.com\nSkills: SIEM, Python'))
+
+    def test_only_mode_accepts_any_cv_with_a_name_and_email(self):
+        with override_settings(LOCAL_EXTRACTION_MODE='only'):
+            data = local_extraction.try_extract('Jane Doe\njane@example.com')
+            self.assertEqual(data['email'], 'jane@example.com')
+            rejected = local_extraction.try_extract(PROSE_CV)
+            self.assertEqual(rejected, {})
+            self.assertEqual(rejected.error, local_extraction.ONLY_MODE_REJECTED)
+
+    def test_off_mode_always_defers_to_gemini(self):
+        with override_settings(LOCAL_EXTRACTION_MODE='off'):
+            self.assertIsNone(local_extraction.try_extract(STRUCTURED_CV))
+
+    def test_avoidance_rate(self):
+        self.assertEqual(local_extraction.avoidance_rate({'local_extraction_attempts': 4, 'local_extraction_accepted': 3}), 0.75)
+        self.assertEqual(local_extraction.avoidance_rate({}), 0.0)
+
+@override_settings(EXTRACTION_CACHE_ENABLED=False, NEAR_DUPLICATE_DETECTION_ENABLED=False, LOCAL_EXTRACTION_MIN_CONFIDENCE=0.85)
+class LocalFirstPipelineTests(TestCase):
+    """Local extraction runs before a model is resolved, so CVs it handles need no API key or model listing."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def extract_file(self, lines):
+        path = os.path.join(self.directory, 'cv.pdf')
+        with open(path, 'wb') as fh:
+            fh.write(synthetic_pdf(lines))
+        with open(path, 'rb') as fh:
+            return utils.extract_cv_data(fh)
+
+    def extract(self, texts):
+        paths = [os.path.join(self.directory, f'{position}.pdf') for position in range(len(texts))]
+        digests = [f'{position}' * 64 for position in range(len(texts))]
+        return utils.extract_cvs_concurrently(paths, digests=digests, texts=texts)
+
+    @override_settings(LOCAL_EXTRACTION_MODE='only')
+    def test_only_mode_needs_no_model(self):
+        with mock.patch('recruitment.utils._resolve_model', side_effect=AssertionError('model resolved')):
+            results = self.extract([STRUCTURED_CV, PROSE_CV])
+            self.assertEqual(self.extract_file(STRUCTURED_CV.splitlines())['email'], 'jane@example.com')
+        self.assertEqual(results[0]['email'], 'jane@example.com')
+        self.assertEqual(results[1].error, local_extraction.ONLY_MODE_REJECTED)
+
+    @override_settings(LOCAL_EXTRACTION_MODE='only')
+    def test_async_extraction_needs_no_model(self):
+        with mock.patch('recruitment.utils._resolve_model', side_effect=AssertionError('model resolved')):
+            data = async_to_sync(utils.extract_cv_data_async)(synthetic_pdf(STRUCTURED_CV.splitlines()), digest='a' * 64)
+        self.assertEqual(data['email'], 'jane@example.com')
+
+    @override_settings(LOCAL_EXTRACTION_MODE='auto')
+    def test_auto_mode_lists_no_models_for_confident_cvs(self):
+        with mock.patch('recruitment.utils._resolve_model', side_effect=AssertionError('model resolved')):
+            results = self.extract([STRUCTURED_CV, STRUCTURED_CV.replace('jane@', 'janet@')])
+        self.assertEqual([result['email'] for result in results], ['jane@example.com', 'janet@example.com'])
+
+    @override_settings(LOCAL_EXTRACTION_MODE='auto')
+    def test_auto_mode_resolves_a_model_once_for_the_rest(self):
+        with mock.patch('recruitment.utils._resolve_model', return_value=(None, None)) as resolve:
+            results = self.extract([STRUCTURED_CV, PROSE_CV, PROSE_CV.replace('john@', 'jo@')])
+            self.assertEqual(self.extract_file([PROSE_CV]), {})
+        self.assertEqual(resolve.call_count, 2)
+        # Without a model the CVs left to Gemini stay empty while the local result is kept
+        self.assertEqual(results[0]['email'], 'jane@example.com')
+        self.assertEqual(results[1:], [{}, {}])
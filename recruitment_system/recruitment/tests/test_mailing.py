@@ -0,0 +1,127 @@
+import smtplib
+from unittest import mock
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from recruitment import mailing
+from recruitment.models import EmailCampaign, EmailDelivery
+
+class FakeConnection:
+    """SMTP connection stand-in whose send_messages() raises the error mapped to each recipient."""
+
+    def __init__(self, errors=None, open_error=None):
+        self.errors = dict(errors or {})
+        self.open_error = open_error
+        self.sent = []
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+        if self.open_error is not None:
+            raise self.open_error
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        for message in messages:
+            error = self.errors.get(message.to[0])
+            if error is not None:
+                raise error
+            self.sent.append(message)
+        return len(messages)
+
+@override_settings(EMAIL_MAX_ATTEMPTS=3, EMAIL_RETRY_BACKOFF=30, EMAIL_RETRY_BACKOFF_MAX=3600)
+class SendDueEmailsTests(TestCase):
+    def setUp(self):
+        self.campaign = mailing.create_campaign(None, 'Interview', 'Please pick a slot.', [
+            {'name': 'Ann', 'email': 'ann@example.com'},
+            {'name': 'Bob', 'email': 'bob@example.com'},
+            {'name': 'Ann again', 'email': 'ANN@example.com'},
+            {'name': '', 'email': ' '},
+        ])
+
+    def send(self, connection):
+        with mock.patch('recruitment.mailing.get_connection', return_value=connection):
+            return mailing.send_due_emails()
+
+    def statuses(self):
+        return dict(EmailDelivery.objects.values_list('email', 'status'))
+
+    def make_due(self):
+        EmailDelivery.objects.filter(status=EmailDelivery.STATUS_PENDING).update(next_attempt_at=timezone.now())
+
+    def test_create_campaign_skips_duplicate_and_blank_addresses(self):
+        self.assertEqual(self.campaign.deliveries.count(), 2)
+        self.assertEqual(mailing.campaign_progress(self.campaign)['pending'], 2)
+
+    def test_sends_personalised_messages_and_completes_the_campaign(self):
+        self.assertEqual(mailing.send_due_emails(), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('Ann', mail.outbox[0].body)
+        self.assertIn('Please pick a slot.', mail.outbox[0].body)
+        self.assertEqual(set(self.statuses().values()), {EmailDelivery.STATUS_SENT})
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, EmailCampaign.STATUS_COMPLETED)
+        self.assertEqual(mailing.send_due_emails(), 0)
+
+    def test_refused_recipient_fails_permanently_without_affecting_others(self):
+        connection = FakeConnection({'ann@example.com': smtplib.SMTPRecipientsRefused({'ann@example.com': (550, b'No such user')})})
+        self.send(connection)
+        self.assertEqual(self.statuses(), {'ann@example.com': EmailDelivery.STATUS_FAILED, 'bob@example.com': EmailDelivery.STATUS_SENT})
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, EmailCampaign.STATUS_COMPLETED)
+
+    def test_transient_reply_is_retried_with_backoff_until_max_attempts(self):
+        busy = smtplib.SMTPResponseException(451, b'Try again later')
+        connection = FakeConnection({'ann@example.com': busy})
+        self.send(connection)
+        ann = EmailDelivery.objects.get(email='ann@example.com')
+        self.assertEqual(ann.status, EmailDelivery.STATUS_PENDING)
+        self.assertEqual(ann.attempts, 1)
+        self.assertGreater(ann.next_attempt_at, timezone.now())
+        # Not due yet, so nothing is claimed
+        self.assertEqual(self.send(connection), 0)
+        for _ in range(2):
+            self.make_due()
+            self.send(connection)
+        ann.refresh_from_db()
+        self.assertEqual(ann.status, EmailDelivery.STATUS_FAILED)
+        self.assertEqual(ann.attempts, 3)
+        self.assertIn('Try again later', ann.error)
+
+    def test_dropped_connection_is_reopened_once(self):
+        connection = FakeConnection()
+        dropped = [smtplib.SMTPServerDisconnected('Connection unexpectedly closed')]
+        send_messages = connection.send_messages
+
+        def flaky_send(messages):
+            if dropped:
+                raise dropped.pop()
+            return send_messages(messages)
+
+        connection.send_messages = flaky_send
+        self.send(connection)
+        self.assertEqual(set(self.statuses().values()), {EmailDelivery.STATUS_SENT})
+        self.assertEqual(connection.opened, 2)
+
+    def test_unreachable_server_reschedules_every_delivery(self):
+        self.send(FakeConnection(open_error=smtplib.SMTPAuthenticationError(535, b'Bad credentials')))
+        for delivery in EmailDelivery.objects.all():
+            self.assertEqual(delivery.status, EmailDelivery.STATUS_PENDING)
+            self.assertEqual(delivery.attempts, 1)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, EmailCampaign.STATUS_SENDING)
+
+    def test_error_classification(self):
+        self.assertTrue(mailing.is_permanent(smtplib.SMTPResponseException(550, b'Mailbox unavailable')))
+        self.assertFalse(mailing.is_permanent(smtplib.SMTPResponseException(421, b'Service not available')))
+        self.assertFalse(mailing.is_permanent(ConnectionResetError()))
+        self.assertTrue(mailing.is_permanent(ValueError('bad header')))
+        self.assertTrue(mailing.is_connection_error(smtplib.SMTPServerDisconnected()))
+        self.assertFalse(mailing.is_connection_error(smtplib.SMTPDataError(554, b'Rejected')))
+
+    def test_retry_delay_grows_and_is_capped(self):
+        with mock.patch('recruitment.mailing.random.uniform', return_value=1.0):
+            self.assertEqual([mailing.retry_delay(attempts) for attempts in (1, 2, 3)], [30, 60, 120])
+            self.assertEqual(mailing.retry_delay(20), 3600)
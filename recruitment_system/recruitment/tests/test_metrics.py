@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from recruitment import metrics
+
+def other_snapshot(counters=None, histograms=None):
+    return {'counters': counters or {}, 'histograms': histograms or {}}
+
+class MetricsTestMixin:
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        override = override_settings(METRICS_DIR=self.metrics_dir, METRICS_SNAPSHOT_TTL=600.0)
+        override.enable()
+        self.addCleanup(override.disable)
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def write_snapshot(self, pid, data, age=0.0):
+        path = os.path.join(self.metrics_dir, f'{pid}.json')
+        with open(path, 'w') as fh:
+            json.dump(data, fh)
+        if age:
+            mtime = time.time() - age
+            os.utime(path, (mtime, mtime))
+        return path
+
+class CollectorTests(MetricsTestMixin, SimpleTestCase):
+    def test_counters_histograms_and_deltas(self):
+        before = metrics.totals()
+        metrics.increment('cv_parsed')
+        metrics.increment('cv_parsed', 2)
+        metrics.observe('stage_seconds', 0.003)
+        metrics.observe('stage_seconds', 100)
+        self.assertEqual(metrics.get('cv_parsed'), 3)
+        histogram = metrics.histograms()['stage_seconds']
+        self.assertEqual(histogram['count'], 2)
+        self.assertEqual(histogram['buckets'][1], 1)
+        self.assertEqual(histogram['buckets'][-1], 1)
+        self.assertEqual(metrics.delta(before, metrics.totals()), {'cv_parsed': 3, 'stage_seconds_sum': 100.003, 'stage_seconds_count': 2})
+
+    def test_timed_covers_sync_async_and_failing_calls(self):
+        @metrics.timed('sync_seconds')
+        def work(fail=False):
+            if fail:
+                raise ValueError('boom')
+            return 'done'
+
+        @metrics.timed('async_seconds')
+        async def async_work():
+            await asyncio.sleep(0.01)
+            return 'done'
+
+        self.assertEqual(work(), 'done')
+        self.assertRaises(ValueError, work, fail=True)
+        self.assertEqual(asyncio.run(async_work()), 'done')
+        histograms = metrics.histograms()
+        self.assertEqual(histograms['sync_seconds']['count'], 2)
+        self.assertEqual(histograms['async_seconds']['count'], 1)
+        self.assertGreaterEqual(histograms['async_seconds']['sum'], 0.01)
+
+    def test_render_prometheus(self):
+        metrics.increment('json_parse.direct', 2)
+        metrics.observe('stage_seconds', 0.003)
+        metrics.observe('stage_seconds', 0.5)
+        text = metrics.render_prometheus()
+        self.assertIn('# TYPE talentscope_json_parse_direct_total counter\ntalentscope_json_parse_direct_total 2\n', text)
+        self.assertIn('# TYPE talentscope_stage_seconds histogram\n', text)
+        self.assertIn('talentscope_stage_seconds_bucket{le="0.001"} 0\n', text)
+        self.assertIn('talentscope_stage_seconds_bucket{le="0.005"} 1\n', text)
+        self.assertIn('talentscope_stage_seconds_bucket{le="0.5"} 2\n', text)
+        self.assertIn('talentscope_stage_seconds_bucket{le="+Inf"} 2\n', text)
+        self.assertIn('talentscope_stage_seconds_sum 0.503\n', text)
+        self.assertIn('talentscope_stage_seconds_count 2\n', text)
+
+    def test_flush_writes_a_snapshot_at_most_once_per_interval(self):
+        path = os.path.join(self.metrics_dir, f'{os.getpid()}.json')
+        metrics.increment('cv_parsed')
+        with override_settings(METRICS_FLUSH_INTERVAL=3600):
+            metrics.flush(force=True)
+            metrics.increment('cv_parsed')
+            metrics.flush()
+        with open(path) as fh:
+            self.assertEqual(json.load(fh)['counters'], {'cv_parsed': 1})
+        metrics.flush(force=True)
+        with open(path) as fh:
+            self.assertEqual(json.load(fh)['counters'], {'cv_parsed': 2})
+
+    def test_merges_snapshots_of_other_live_processes(self):
+        metrics.increment('cv_parsed')
+        metrics.observe('stage_seconds', 0.003)
+        buckets = [0] * (len(metrics.DEFAULT_BUCKETS) + 1)
+        buckets[1] = 2
+        self.write_snapshot(os.getppid(), other_snapshot({'cv_parsed': 4}, {'stage_seconds': {'buckets': buckets, 'sum': 0.008, 'count': 2}}))
+        # Snapshots with a different bucket layout are skipped rather than misaligned
+        self.write_snapshot(1, other_snapshot(histograms={'stage_seconds': {'buckets': [1], 'sum': 1.0, 'count': 1}}))
+        counters, merged = metrics._collect()
+        self.assertEqual(counters['cv_parsed'], 5)
+        self.assertEqual(merged['stage_seconds']['count'], 3)
+        self.assertEqual(merged['stage_seconds']['buckets'][1], 3)
+        # Merging never changes this process's own metrics
+        self.assertEqual(metrics.get('cv_parsed'), 1)
+
+    def test_prunes_snapshots_of_exited_or_silent_processes(self):
+        exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True, check=True)
+        dead = self.write_snapshot(int(exited.stdout), other_snapshot({'cv_parsed': 10}))
+        silent = self.write_snapshot(os.getppid(), other_snapshot({'cv_parsed': 20}), age=3600)
+        leftover = os.path.join(self.metrics_dir, f'{os.getppid()}.json.tmp')
+        with open(leftover, 'w') as fh:
+            fh.write('{"counters": {"cv_parsed": 40}}')
+        os.utime(leftover, (time.time() - 3600, time.time() - 3600))
+        counters, _ = metrics._collect()
+        self.assertEqual(counters.get('cv_parsed', 0), 0)
+        for path in (dead, silent, leftover):
+            self.assertFalse(os.path.exists(path))
+
+class MetricsEndpointTests(MetricsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.increment('cv_parsed')
+        self.url = reverse('recruitment:metrics')
+
+    def test_requires_token_or_staff(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        user = User.objects.create_user('recruiter', password='secret')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        user.is_staff = True
+        user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn(b'talentscope_cv_parsed_total 1\n', response.content)
+
+    def test_bearer_token(self):
+        with override_settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+            self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        # An empty token never matches an empty or bare "Bearer" header
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer ').status_code, 401)
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase
+from recruitment.model_registry import FALLBACK_MODEL, PREFERRED_MODEL, ModelRegistry
+
+def listed(*names, methods=('generateContent',)):
+    return [SimpleNamespace(name=f'models/{name}', supported_generation_methods=list(methods)) for name in names]
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('recruitment.model_registry.llm_client')
+        self.client = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.list_models.return_value = listed(FALLBACK_MODEL, PREFERRED_MODEL)
+        self.registry = ModelRegistry(ttl=3600)
+
+    def test_lists_models_once_while_fresh(self):
+        self.assertEqual(self.registry.get_model_name(), PREFERRED_MODEL)
+        model = self.registry.get_model()
+        self.assertIs(self.registry.get_model(), model)
+        self.assertEqual(self.client.list_models.call_count, 1)
+        self.client.GenerativeModel.assert_called_once_with(PREFERRED_MODEL)
+
+    def test_refreshes_after_ttl_or_when_forced(self):
+        registry = ModelRegistry(ttl=0)
+        registry.get_model_name()
+        registry.get_model_name()
+        self.assertEqual(self.client.list_models.call_count, 2)
+        self.registry.get_model_name()
+        self.registry.get_model_name(force_refresh=True)
+        self.assertEqual(self.client.list_models.call_count, 4)
+
+    def test_falls_back_to_another_generation_model(self):
+        self.client.list_models.return_value = listed(FALLBACK_MODEL, 'gemini-other')
+        self.assertEqual(self.registry.get_model_name(), FALLBACK_MODEL)
+        self.client.list_models.return_value = listed('embedding-001', methods=['embedContent']) + listed('gemini-other')
+        self.assertEqual(self.registry.get_model_name(force_refresh=True), 'gemini-other')
+        self.client.list_models.return_value = listed('embedding-001', methods=['embedContent'])
+        self.assertIsNone(self.registry.get_model_name(force_refresh=True))
+        self.assertIsNone(self.registry.get_model())
+
+    def test_listing_failure_forgets_the_model(self):
+        self.assertEqual(self.registry.get_model_name(), PREFERRED_MODEL)
+        self.client.list_models.side_effect = RuntimeError('invalid key')
+        self.assertIsNone(self.registry.get_model_name(force_refresh=True))
+        self.assertIsNone(self.registry.cached_model_name())
+
+    def test_invalidate_lists_again(self):
+        self.registry.get_model_name()
+        self.registry.invalidate()
+        self.assertIsNone(self.registry.cached_model_name())
+        self.assertEqual(self.registry.get_model_name(), PREFERRED_MODEL)
+        self.assertEqual(self.client.list_models.call_count, 2)
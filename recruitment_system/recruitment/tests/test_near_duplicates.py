@@ -0,0 +1,84 @@
+from django.test import TestCase, override_settings
+from recruitment import near_duplicates
+from recruitment.models import Candidate, CandidateFingerprint
+
+CV_TEXT = """Jane Doe
+jane.doe@example.com | +1 555 010 2030 | Boston, MA
+Summary
+Security analyst with 3 years of experience in security operations, incident response and threat hunting.
+Experience
+Security Analyst, Acme Bank, Jan 2021 - Present
+Tuned Splunk correlation searches and reduced false positives by forty percent.
+Monitored IDS and firewall alerts and performed vulnerability scans with Nessus.
+Education
+Bachelor of Science in Computer Science, Northeastern University, 2020
+Skills
+SIEM, Splunk, incident response, threat hunting, Python, network security"""
+
+@override_settings(NEAR_DUPLICATE_DETECTION_ENABLED=True)
+class NearDuplicateTests(TestCase):
+    def test_layout_changes_keep_the_fingerprint(self):
+        digest = near_duplicates.fingerprint(CV_TEXT)
+        self.assertIsNotNone(digest)
+        for edited in (
+            CV_TEXT.replace('\n', '\n\n'),
+            CV_TEXT.replace('\n', '\n  • '),
+            CV_TEXT.replace(', ', ',   ').upper(),
+        ):
+            self.assertEqual(near_duplicates.fingerprint(edited), digest)
+
+    def test_phone_numbers_and_dates_are_masked(self):
+        digest = near_duplicates.fingerprint(CV_TEXT)
+        for label, edited in (
+            ('phone', CV_TEXT.replace('+1 555 010 2030', '(617) 555-0199')),
+            ('month date', CV_TEXT.replace('Jan 2021 - Present', 'March 5, 2022 - Present')),
+            ('numeric date', CV_TEXT.replace('Jan 2021', '2021-01-04')),
+            ('year', CV_TEXT.replace('University, 2020', 'University, 2019')),
+        ):
+            with self.subTest(edit=label):
+                self.assertEqual(near_duplicates.fingerprint(edited), digest)
+        self.assertNotIn('2030', near_duplicates.normalized_text(CV_TEXT))
+        self.assertIn('with 3 years of experience', near_duplicates.normalized_text(CV_TEXT))
+
+    def test_content_edits_change_the_fingerprint(self):
+        digest = near_duplicates.fingerprint(CV_TEXT)
+        for label, edited in (
+            ('pentest', CV_TEXT + '\nPenetration testing'),
+            ('years', CV_TEXT.replace('3 years', '8 years')),
+            ('fractional years', CV_TEXT.replace('3 years', '3.5 years')),
+            ('aws docker', CV_TEXT + '\nAWS Docker'),
+            ('removed skill', CV_TEXT.replace(', Python', '')),
+        ):
+            with self.subTest(edit=label):
+                self.assertNotEqual(near_duplicates.fingerprint(edited), digest)
+
+    def test_short_text_has_no_fingerprint(self):
+        self.assertIsNone(near_duplicates.fingerprint('Jane Doe\njane.doe@example.com\nPython'))
+        self.assertIsNone(near_duplicates.fingerprint(''))
+
+    def test_reuse_requires_the_same_fingerprint_and_email(self):
+        cv_data = {'name': 'Jane Doe', 'email': 'jane.doe@example.com', 'skills': ['SIEM']}
+        candidate = Candidate.objects.create(name='Jane Doe', email='jane.doe@example.com', cv_data=cv_data)
+        digest = near_duplicates.fingerprint(CV_TEXT)
+        near_duplicates.store_fingerprints([(candidate.pk, digest)])
+        edited = near_duplicates.fingerprint(CV_TEXT.replace('3 years', '8 years'))
+        reused, copies = near_duplicates.find_near_duplicates([
+            (digest, 'Jane.Doe@example.com'),
+            (digest, 'someone.else@example.com'),
+            (edited, 'jane.doe@example.com'),
+            (digest, None),
+            (edited, 'jane.doe@example.com'),
+            (digest, 'someone.else@example.com'),
+        ])
+        self.assertEqual(reused, {0: cv_data})
+        self.assertEqual(copies, {4: 2, 5: 1})
+
+    def test_store_fingerprints_updates_existing_rows(self):
+        candidate = Candidate.objects.create(name='Jane Doe', email='jane.doe@example.com')
+        near_duplicates.store_fingerprints([(candidate.pk, 'a' * 64)])
+        near_duplicates.store_fingerprints([(candidate.pk, 'b' * 64), (None, 'c' * 64), (candidate.pk, None)])
+        self.assertEqual(list(CandidateFingerprint.objects.values_list('text_hash', flat=True)), ['b' * 64])
+
+    def test_disabled_detection_reuses_nothing(self):
+        with override_settings(NEAR_DUPLICATE_DETECTION_ENABLED=False):
+            self.assertEqual(near_duplicates.find_near_duplicates([('a' * 64, 'x@example.com')] * 2), ({}, {}))
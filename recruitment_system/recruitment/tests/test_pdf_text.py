@@ -0,0 +1,88 @@
+import io
+import os
+import shutil
+import tempfile
+import PyPDF2
+from django.test import SimpleTestCase, override_settings
+from recruitment import pdf_text
+from recruitment.loadtest import synthetic_pdf
+
+def multi_page_pdf(pages):
+    """Return the bytes of a PDF with one page per list of lines in `pages`."""
+    writer = PyPDF2.PdfWriter()
+    for lines in pages:
+        writer.add_page(PyPDF2.PdfReader(io.BytesIO(synthetic_pdf(lines))).pages[0])
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+PAGES = [[f'Page {number} line {line}' for line in range(3)] for number in range(1, 5)]
+
+class ExtractTextTests(SimpleTestCase):
+    def setUp(self):
+        self.pdf = multi_page_pdf(PAGES)
+
+    def test_reads_bytes_file_objects_and_paths(self):
+        text = pdf_text.extract_text(self.pdf)
+        self.assertIn('Page 1 line 0', text)
+        self.assertIn('Page 4 line 2', text)
+        self.assertEqual(pdf_text.extract_text(io.BytesIO(self.pdf)), text)
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as pdf_file:
+            pdf_file.write(self.pdf)
+            pdf_file.flush()
+            self.assertEqual(pdf_text.extract_text(pdf_file.name), text)
+
+    def test_page_limit(self):
+        text = pdf_text.extract_text(self.pdf, max_pages=2)
+        self.assertIn('Page 2', text)
+        self.assertNotIn('Page 3', text)
+
+    def test_stops_once_enough_characters_are_collected(self):
+        text = pdf_text.extract_text(self.pdf, max_chars=10)
+        self.assertIn('Page 1', text)
+        self.assertNotIn('Page 2', text)
+
+    def test_page_prefix_marks_every_page(self):
+        self.assertEqual(pdf_text.extract_text(self.pdf, page_prefix='\f').count('\f'), 4)
+
+    def test_byte_limit_rejects_large_files(self):
+        with self.assertRaises(pdf_text.PDFLimitExceeded):
+            pdf_text.extract_text(self.pdf, max_bytes=len(self.pdf) - 1)
+        self.assertTrue(pdf_text.extract_text(self.pdf, max_bytes=len(self.pdf)))
+
+class ExtractTextsTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_results_keep_input_order_and_failures_are_none(self):
+        paths = [
+            self.write('a.pdf', synthetic_pdf(['Alice'])),
+            self.write('broken.pdf', b'not a pdf'),
+            self.write('b.pdf', synthetic_pdf(['Bob'])),
+        ]
+        texts = pdf_text.extract_texts(paths)
+        self.assertIn('Alice', texts[0])
+        self.assertIsNone(texts[1])
+        self.assertIn('Bob', texts[2])
+        self.assertEqual(pdf_text.extract_texts([]), [])
+
+    @override_settings(PDF_MAX_BYTES=100)
+    def test_limits_apply_in_the_pool(self):
+        self.assertEqual(pdf_text.extract_texts([self.write('a.pdf', synthetic_pdf(['Alice']))]), [None])
+
+    @override_settings(PDF_PARSE_TIMEOUT=1)
+    def test_hung_parse_times_out_and_replaces_the_pool(self):
+        # Opening a FIFO with no writer blocks forever, like a parser stuck inside a page
+        fifo = os.path.join(self.tmp, 'hung.pdf')
+        os.mkfifo(fifo)
+        pool = pdf_text._get_pool()
+        with self.assertLogs('recruitment.pdf_text', 'WARNING'):
+            self.assertEqual(pdf_text.extract_texts([fifo]), [None])
+        self.assertIsNot(pdf_text._get_pool(), pool)
@@ -0,0 +1,110 @@
+import json
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from recruitment.models import Application, Candidate, ScreeningBatch, ScreeningTask
+from recruitment.progress_stream import BatchEventStream, format_event
+from recruitment.screening import get_job
+from .test_scoring import JDS
+
+def parse_events(chunks):
+    """Return (event, data) pairs from encoded Server-Sent Events, skipping retry and comment lines."""
+    parsed = []
+    for block in ''.join(chunks).split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith((':', 'retry')))
+        if 'event' in fields:
+            parsed.append((fields['event'], json.loads(fields['data'])))
+    return parsed
+
+class BatchEventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('recruiter', password='secret')
+        self.job = get_job('Security Analyst', JDS['full'])
+        self.batch = ScreeningBatch.objects.create(jd_file='jd.pdf', job=self.job, created_by=self.user, status=ScreeningBatch.STATUS_PROCESSING)
+        self.tasks = [
+            ScreeningTask.objects.create(batch=self.batch, file_name=f'{index}.pdf', cv_file=f'cvs/{index}.pdf')
+            for index in range(3)
+        ]
+
+    def score(self, task, score):
+        candidate = Candidate.objects.create(name=f'Candidate {task.pk}', email=f'c{task.pk}@example.com', cv_file=task.cv_file, match_score=score)
+        Application.objects.create(candidate=candidate, job=self.job, batch=self.batch, match_score=score)
+        task.status, task.stage, task.candidate = ScreeningTask.STATUS_DONE, ScreeningTask.STAGE_SCORED, candidate
+        task.result = {'name': candidate.name, 'match_score': score}
+        task.save()
+
+    def test_first_poll_reports_current_state_and_progress(self):
+        self.tasks[0].stage = ScreeningTask.STAGE_PARSED
+        self.tasks[0].save()
+        stream = BatchEventStream(self.batch)
+        events, finished = stream.poll()
+        self.assertFalse(finished)
+        self.assertEqual([name for name, _ in parse_events(events)], ['parsed', 'progress'])
+        self.assertEqual(parse_events(events)[1][1]['pending'], 3)
+        # Nothing changed: nothing is sent, not even progress
+        self.assertEqual(stream.poll(), ([], False))
+
+    def test_stages_passed_between_polls_are_all_reported(self):
+        stream = BatchEventStream(self.batch)
+        stream.poll()
+        self.tasks[0].stage = ScreeningTask.STAGE_PARSED
+        self.tasks[0].save()
+        stream.poll()
+        self.score(self.tasks[0], 90.0)
+        self.score(self.tasks[1], 40.0)
+        events = parse_events(stream.poll()[0])
+        self.assertEqual(
+            [(name, data.get('task_id')) for name, data in events],
+            [('extracted', self.tasks[0].pk), ('scored', self.tasks[0].pk), ('scored', self.tasks[1].pk), ('shortlist', None), ('progress', None)],
+        )
+        self.assertEqual(events[1][1]['match_score'], 90.0)
+        # Only candidates at or above min_score become shortlist rows, each sent once
+        shortlist = events[3][1]
+        self.assertEqual((shortlist['name'], shortlist['match_score']), (f'Candidate {self.tasks[0].pk}', 90.0))
+        self.assertEqual(shortlist['download_url'], reverse('recruitment:download_cv', args=['cvs/0.pdf']))
+        self.assertEqual(stream.poll(), ([], False))
+
+    def test_failed_cv_and_finished_batch(self):
+        stream = BatchEventStream(self.batch)
+        stream.poll()
+        ScreeningTask.objects.filter(pk=self.tasks[2].pk).update(status=ScreeningTask.STATUS_FAILED, error='Unreadable PDF')
+        ScreeningBatch.objects.filter(pk=self.batch.pk).update(status=ScreeningBatch.STATUS_COMPLETED)
+        events, finished = stream.poll()
+        self.assertTrue(finished)
+        events = parse_events(events)
+        self.assertEqual([name for name, _ in events], ['failed', 'progress', 'done'])
+        self.assertEqual(events[0][1]['error'], 'Unreadable PDF')
+        self.assertEqual(events[2][1]['failed_cvs'], ['2.pdf'])
+
+    def test_reconnecting_client_is_sent_the_current_state_again(self):
+        self.score(self.tasks[0], 90.0)
+        first = parse_events(BatchEventStream(self.batch).poll()[0])
+        second = parse_events(BatchEventStream(self.batch).poll()[0])
+        self.assertEqual(first, second)
+        # Stages before the current one are not replayed to a new client
+        self.assertEqual([name for name, _ in first], ['scored', 'shortlist', 'progress'])
+
+    @override_settings(PROGRESS_STREAM_POLL_INTERVAL=0, PROGRESS_STREAM_MAX_SECONDS=0)
+    def test_events_ends_at_the_time_limit_so_the_browser_reconnects(self):
+        chunks = list(BatchEventStream(self.batch).events())
+        self.assertEqual(chunks[0], 'retry: 3000\n\n')
+        self.assertEqual([name for name, _ in parse_events(chunks)], ['progress'])
+
+    @override_settings(PROGRESS_STREAM_POLL_INTERVAL=0)
+    def test_view_streams_until_done(self):
+        self.client.force_login(self.user)
+        ScreeningBatch.objects.filter(pk=self.batch.pk).update(status=ScreeningBatch.STATUS_COMPLETED)
+        self.score(self.tasks[0], 75.0)
+        url = reverse('recruitment:batch_events', args=[self.batch.pk])
+        response = self.client.get(url, {'min_score': 80})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(response['X-Accel-Buffering'], 'no')
+        events = parse_events(chunk.decode() for chunk in response.streaming_content)
+        self.assertEqual([name for name, _ in events], ['scored', 'progress', 'done'])
+        # Another recruiter's batch is not found
+        self.client.force_login(User.objects.create_user('other', password='secret'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_format_event(self):
+        self.assertEqual(format_event('progress', {'percent': 50.0}), 'event: progress\ndata: {"percent": 50.0}\n\n')
@@ -0,0 +1,96 @@
+from django.test import SimpleTestCase
+from recruitment import metrics, prompt_text
+from recruitment.prompt_text import PAGE_BREAK
+from recruitment.rate_control import estimate_tokens
+
+EXPERIENCE = [f'- Role {number}: monitored SIEM alerts and triaged incidents for a regional bank' for number in range(40)]
+CV = '\n'.join([
+    'Jane Doe',
+    'jane@example.com',
+    'Professional Summary',
+    'Security analyst focused on detection engineering.',
+    'Work Experience',
+    *EXPERIENCE,
+    'Technical Skills:',
+    '• SIEM, Python, Firewalls',
+    'Education',
+    "Bachelor's in Computer Science",
+    'Certifications',
+    'CISSP',
+])
+
+class NormalizeTests(SimpleTestCase):
+    def test_normalizes_bullets_whitespace_and_hyphenation(self):
+        pages = prompt_text.normalize_text('•  Network  secu-\nrity\n\nＳIEM' + PAGE_BREAK + '   ' + PAGE_BREAK + 'Page two')
+        self.assertEqual(pages, [['- Network security', 'SIEM'], ['Page two']])
+
+    def test_strips_page_numbers_and_repeated_headers_keeping_the_first(self):
+        pages = [
+            ['Jane Doe - CV', 'Skills', 'SIEM', 'Page 1 of 3'],
+            ['Jane Doe - CV', 'Experience', '5 years', 'Page 2 of 3'],
+            ['Jane Doe - CV', 'Education', 'BSc', '3'],
+        ]
+        lines, removed = prompt_text.strip_repeated_lines(pages)
+        self.assertEqual(lines, ['Jane Doe - CV', 'Skills', 'SIEM', 'Experience', '5 years', 'Education', 'BSc'])
+        self.assertEqual(removed, 5)
+
+    def test_splits_sections_on_heading_lines_only(self):
+        sections = prompt_text.split_sections(
+            ['Jane Doe', 'Tools & Technologies', 'SIEM', 'Experience managing SOC teams across three continents for years', 'Education: BSc'],
+            prompt_text.CV_HEADINGS,
+        )
+        self.assertEqual([name for name, _ in sections], ['header', 'skills', 'education'])
+        self.assertEqual(sections[1][1], ['Tools & Technologies', 'SIEM', 'Experience managing SOC teams across three continents for years'])
+
+class PackSectionsTests(SimpleTestCase):
+    def setUp(self):
+        self.sections, _ = prompt_text.split_cv_text(CV)
+
+    def test_everything_fits_in_a_large_budget(self):
+        text, truncated = prompt_text.pack_sections(self.sections, prompt_text.CV_PRIORITY, 10000)
+        self.assertFalse(truncated)
+        self.assertEqual(text.splitlines()[0], 'Jane Doe')
+        self.assertIn(EXPERIENCE[-1], text)
+
+    def test_small_budget_keeps_priority_sections_in_document_order(self):
+        text, truncated = prompt_text.pack_sections(self.sections, prompt_text.CV_PRIORITY, 120)
+        self.assertTrue(truncated)
+        self.assertLessEqual(estimate_tokens(text), 120 + len(text.splitlines()))
+        for kept in ('Jane Doe', 'SIEM, Python, Firewalls', "Bachelor's in Computer Science", 'CISSP', 'detection engineering'):
+            self.assertIn(kept, text)
+        self.assertNotIn(EXPERIENCE[-1], text)
+        lines = text.splitlines()
+        # Experience comes before skills in the CV, so whatever fitted of it stays there
+        self.assertLess(lines.index('Work Experience'), lines.index('Technical Skills:'))
+
+    def test_a_section_whose_heading_alone_fits_is_dropped(self):
+        sections = [('header', ['Jane Doe']), ('skills', ['Skills', 'x' * 400]), ('education', ['Education', 'BSc'])]
+        text, truncated = prompt_text.pack_sections(sections, prompt_text.CV_PRIORITY, 20)
+        self.assertTrue(truncated)
+        self.assertEqual(text, 'Jane Doe\nEducation\nBSc')
+
+    def test_a_long_unbroken_line_is_cut_at_a_word(self):
+        line = ' '.join(['penetration'] * 200)
+        text, truncated = prompt_text.pack_sections([('header', [line])], prompt_text.CV_PRIORITY, 50)
+        self.assertTrue(truncated)
+        self.assertTrue(line.startswith(text))
+        self.assertTrue(text.endswith('penetration'))
+        self.assertLessEqual(estimate_tokens(text), 50)
+
+class PrepareTextTests(SimpleTestCase):
+    def test_prepare_cv_text_records_token_savings(self):
+        before = metrics.totals()
+        text = prompt_text.prepare_cv_text(CV, budget=120)
+        changes = metrics.delta(before, metrics.totals())
+        self.assertEqual(changes['prompt_text_documents_cv'], 1)
+        self.assertEqual(changes['prompt_text_truncated_cv'], 1)
+        self.assertEqual(changes['prompt_text_tokens_sent'], estimate_tokens(text))
+        self.assertGreater(changes['prompt_text_tokens_saved'], 0)
+        self.assertEqual(prompt_text.prepare_cv_text(CV, budget=120, split=prompt_text.split_cv_text(CV)), text)
+
+    def test_prepare_jd_text_puts_requirements_first(self):
+        jd = '\n'.join(['Security Analyst', 'About us', *(['We are a large and friendly company.'] * 30), 'Requirements', 'SIEM required, 3 years'])
+        text = prompt_text.prepare_jd_text(jd, budget=40)
+        self.assertIn('SIEM required, 3 years', text)
+        self.assertTrue(text.startswith('Security Analyst'))
+        self.assertEqual(prompt_text.prepare_jd_text(''), '')
@@ -0,0 +1,161 @@
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from recruitment import metrics
+from recruitment.models import GeminiRateState
+from recruitment.rate_control import AdaptiveRateController, DatabaseRateCoordinator, parse_retry_after
+
+class FakeClock:
+    """Stand-in for the time module whose sleep() advances monotonic() instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+class AdaptiveRateControllerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        fake_time = SimpleNamespace(monotonic=self.clock.monotonic, sleep=self.clock.sleep)
+        for target in ('recruitment.rate_control.time', 'recruitment.concurrency.time'):
+            patcher = mock.patch(target, fake_time)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def controller(self, max_rate=60, **kwargs):
+        kwargs.setdefault('cooldown', 10.0)
+        return AdaptiveRateController(max_rate=max_rate, **kwargs)
+
+    def test_additive_increase_up_to_the_ceiling(self):
+        controller = self.controller()
+        controller.on_quota_error(retry_after=0)
+        self.assertEqual(controller.rate, 30)
+        # About one request/minute more per minute of traffic: 30 successes at 30/minute
+        for _ in range(30):
+            controller.on_success()
+        self.assertAlmostEqual(controller.rate, 31, delta=0.05)
+        for _ in range(5000):
+            controller.on_success()
+        self.assertEqual(controller.rate, 60)
+
+    def test_multiplicative_decrease_with_cooldown(self):
+        controller = self.controller(min_rate=5)
+        decreases = metrics.get('gemini_rate_decreases')
+        controller.on_quota_error(retry_after=5)
+        self.assertEqual(controller.rate, 30)
+        self.assertEqual(controller.stats()['paused_for'], 5)
+        # Errors from calls already in flight do not decrease the rate again
+        controller.on_quota_error(retry_after=5)
+        self.clock.now += 14
+        controller.on_quota_error(retry_after=5)
+        self.assertEqual(controller.rate, 30)
+        # The cooldown runs from the end of the first pause
+        self.clock.now += 1
+        controller.on_quota_error(retry_after=5)
+        self.assertEqual(controller.rate, 15)
+        for _ in range(5):
+            self.clock.now += 20
+            controller.on_quota_error(retry_after=0)
+        self.assertEqual(controller.rate, 5)
+        self.assertEqual(metrics.get('gemini_rate_decreases') - decreases, 7)
+
+    def test_unpaced_controller_learns_its_rate_from_the_first_error(self):
+        controller = self.controller(max_rate=0)
+        self.assertIsNone(controller.rate)
+        controller.on_success()
+        self.assertIsNone(controller.rate)
+        for _ in range(20):
+            controller.acquire()
+        controller.on_quota_error(retry_after=0)
+        self.assertEqual(controller.rate, 10)
+        self.assertEqual(controller.stats()['requests_last_minute'], 20)
+
+    def test_acquire_waits_out_the_pause(self):
+        controller = self.controller(max_rate=0)
+        controller.acquire()
+        controller.on_quota_error(retry_after=3)
+        paused = metrics.get('gemini_quota_pause_seconds')
+        controller.acquire()
+        self.assertGreaterEqual(self.clock.slept, 3)
+        self.assertEqual(metrics.get('gemini_quota_pause_seconds') - paused, 3)
+        self.assertEqual(controller.stats()['paused_for'], 0)
+
+    def test_token_budget_over_a_sliding_window(self):
+        controller = self.controller(max_rate=0, tokens_per_minute=100)
+        controller.acquire(tokens=60)
+        self.assertEqual(controller._window_wait(50), 60)
+        self.clock.now += 30
+        self.assertEqual(controller._window_wait(50), 30)
+        self.assertLessEqual(controller._window_wait(40), 0)
+        # Actual usage below the estimate frees room in the window
+        controller.record_tokens(60, 20)
+        self.assertEqual(controller.stats()['tokens_last_minute'], 20)
+        self.assertLessEqual(controller._window_wait(50), 0)
+
+    def test_reset_forgets_learned_state(self):
+        controller = self.controller()
+        controller.on_quota_error(retry_after=30)
+        controller.reset(20)
+        self.assertEqual(controller.stats(), {'rate': 20, 'requests_last_minute': 0, 'tokens_last_minute': 0, 'paused_for': 0})
+
+class ParseRetryAfterTests(SimpleTestCase):
+    def test_hint_sources(self):
+        detail = SimpleNamespace(retry_delay=SimpleNamespace(seconds=7, nanos=500000000))
+        self.assertEqual(parse_retry_after(SimpleNamespace(details=[detail])), 7.5)
+        error = Exception('quota')
+        error.response = SimpleNamespace(headers={'Retry-After': '12'})
+        self.assertEqual(parse_retry_after(error), 12)
+        self.assertEqual(parse_retry_after(Exception('Please retry in 3.5s.')), 3.5)
+        self.assertEqual(parse_retry_after(Exception('retry_delay { seconds: 41 }')), 41)
+        self.assertIsNone(parse_retry_after(Exception('quota exceeded')))
+
+class DatabaseRateCoordinatorTests(TestCase):
+    def worker(self):
+        return AdaptiveRateController(max_rate=60, min_rate=1, cooldown=10.0, coordinator=DatabaseRateCoordinator(interval=5.0))
+
+    def test_live_workers_split_the_shared_rate(self):
+        first, second = self.worker(), self.worker()
+        first.coordinator.sync(first, force=True)
+        self.assertEqual(first.rate, 60)
+        second.coordinator.sync(second, force=True)
+        first.coordinator.sync(first, force=True)
+        self.assertEqual((first.rate, second.rate), (30, 30))
+        state = GeminiRateState.objects.get(key='gemini')
+        self.assertEqual(state.rate, 60)
+        self.assertEqual(len(state.workers), 2)
+        # Syncs within the interval are skipped
+        GeminiRateState.objects.update(rate=10)
+        first.coordinator.sync(first)
+        self.assertEqual(first.rate, 30)
+
+    def test_quota_error_is_shared_once_per_cooldown(self):
+        first, second = self.worker(), self.worker()
+        first.coordinator.sync(first, force=True)
+        second.coordinator.sync(second, force=True)
+        first.on_quota_error(retry_after=5)
+        self.assertEqual(GeminiRateState.objects.get().rate, 30)
+        self.assertEqual(first.rate, 15)
+        second.coordinator.sync(second, force=True)
+        self.assertEqual(second.rate, 15)
+        self.assertGreater(second.stats()['paused_for'], 4)
+        second.on_quota_error(retry_after=5)
+        self.assertEqual(GeminiRateState.objects.get().rate, 30)
+
+    def test_successes_raise_the_shared_rate(self):
+        first, second = self.worker(), self.worker()
+        first.coordinator.sync(first, force=True)
+        second.coordinator.sync(second, force=True)
+        first.on_quota_error(retry_after=0)
+        second.coordinator.sync(second, force=True)
+        for _ in range(15):
+            second.on_success()
+        second.coordinator.sync(second, force=True)
+        # Each success counts for every live worker: 15 successes at 15/minute, times two workers
+        self.assertAlmostEqual(GeminiRateState.objects.get().rate, 32, delta=0.1)
+        self.assertAlmostEqual(second.rate, 16, delta=0.05)
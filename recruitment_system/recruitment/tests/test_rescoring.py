@@ -0,0 +1,50 @@
+from django.test import SimpleTestCase, TestCase
+from recruitment.models import Candidate
+from recruitment.rescoring import CandidateFeatures, rescore_candidates
+from recruitment.utils import calculate_match_score
+from .test_scoring import CVS, JDS
+
+MALFORMED = {
+    'not a dict': 'skills: SIEM',
+    'skill not a string': {'skills': ['SIEM', 3]},
+    'bad education': {'skills': ['SIEM'], 'education': [None]},
+    'many entries': {'skills': ['siem'] * 20, 'experience': ['security analyst'] * 5 + ['10 years network security']},
+}
+
+def rows(cvs):
+    return [(number, name, f'{number}@example.com', f'cvs/{number}.pdf', cv_data) for number, (name, cv_data) in enumerate(cvs.items(), 1)]
+
+class CandidateFeaturesTests(SimpleTestCase):
+    def test_scores_match_calculate_match_score(self):
+        cvs = dict(CVS, **MALFORMED)
+        features = CandidateFeatures.from_rows(rows(cvs))
+        for jd, jd_data in JDS.items():
+            scores = features.score(jd_data)
+            for row, (name, cv_data) in enumerate(cvs.items()):
+                with self.subTest(jd=jd, cv=name):
+                    self.assertEqual(round(float(scores[row]), 2), calculate_match_score(cv_data, jd_data))
+
+    def test_rank_sorts_filters_and_limits(self):
+        features = CandidateFeatures.from_rows(rows(CVS))
+        ranked = features.rank(JDS['optional'], semantic_weight=0.0)
+        self.assertEqual([row['name'] for row in ranked], ['extra', 'strong', 'partial', 'empty'])
+        self.assertEqual(ranked[0], {'id': 4, 'name': 'extra', 'email': '4@example.com', 'cv_file': 'cvs/4.pdf', 'match_score': 63.16})
+        self.assertEqual([row['name'] for row in features.rank(JDS['optional'], min_score=30, semantic_weight=0.0)], ['extra', 'strong'])
+        self.assertEqual(len(features.rank(JDS['optional'], limit=1, semantic_weight=0.0)), 1)
+
+    def test_no_candidates(self):
+        self.assertEqual(CandidateFeatures.from_rows([]).rank(JDS['full'], semantic_weight=0.0), [])
+
+    def test_no_experience_entries(self):
+        cvs = {'skills only': {'skills': ['SIEM']}, 'empty': CVS['empty']}
+        ranked = CandidateFeatures.from_rows(rows(cvs)).rank(JDS['full'], semantic_weight=0.0)
+        self.assertEqual([row['match_score'] for row in ranked], [calculate_match_score(cv_data, JDS['full']) for cv_data in cvs.values()])
+
+class RescoreCandidatesTests(TestCase):
+    def test_ranks_stored_candidates(self):
+        for name, cv_data in CVS.items():
+            Candidate.objects.create(name=name, email=f'{name}@example.com', cv_data=cv_data)
+        ranked = rescore_candidates(JDS['full'], min_score=1, semantic_weight=0.0)
+        self.assertEqual([(row['name'], row['match_score']) for row in ranked], [('strong', 100.0), ('partial', 29.79)])
+        only_partial = Candidate.objects.filter(name='partial')
+        self.assertEqual([row['name'] for row in rescore_candidates(JDS['full'], queryset=only_partial, semantic_weight=0.0)], ['partial'])
@@ -0,0 +1,64 @@
+from django.test import SimpleTestCase
+from recruitment.scoring import KeywordMatcher, score_candidates
+from recruitment.utils import calculate_match_score
+
+JDS = {
+    'full': {'summary': "Required: SIEM, firewalls, penetration testing and network security. Nice to have AWS, Python, Docker. 3 years of experience. Bachelor's in computer science."},
+    'optional': {'summary': 'Looking for python and linux scripting skills, sql a plus.'},
+    'none': {'summary': 'A friendly team player.'},
+    'degree': {'summary': 'Required encryption. M.S. in Information Security, 5 years'},
+}
+CVS = {
+    'strong': {
+        'skills': ['SIEM tools', 'Firewalls', 'Penetration Testing', 'Network Security', 'AWS', 'Python', 'Docker', 'Go'],
+        'experience': ['4 years as Security Analyst'],
+        'education': ["Bachelor's in Computer Science"],
+    },
+    'partial': {
+        'skills': ['Python', 'SIEM'],
+        'experience': ['Security engineer at Acme', 'Network security intern', '2 years support'],
+        'education': ['BA History'],
+    },
+    'empty': {},
+    'extra': {
+        'skills': ['linux', 'sql', 'bash', 'git', 'vim'],
+        'experience': ['1 year'],
+        'education': ['M.S. in Information Security'],
+    },
+}
+# Scores the original calculate_match_score gave each (JD, CV) pair, before keyword matching was compiled
+BASELINE_SCORES = {
+    ('full', 'strong'): 100.0, ('full', 'partial'): 29.79, ('full', 'empty'): 0.0, ('full', 'extra'): 0.0,
+    ('optional', 'strong'): 44.74, ('optional', 'partial'): 25.0, ('optional', 'empty'): 0.0, ('optional', 'extra'): 63.16,
+    ('none', 'strong'): 100.0, ('none', 'partial'): 100.0, ('none', 'empty'): 0.0, ('none', 'extra'): 100.0,
+    ('degree', 'strong'): 27.27, ('degree', 'partial'): 36.36, ('degree', 'empty'): 0.0, ('degree', 'extra'): 36.36,
+}
+
+class ScoringParityTests(SimpleTestCase):
+    def test_scores_match_baseline(self):
+        for (jd, cv), expected in BASELINE_SCORES.items():
+            with self.subTest(jd=jd, cv=cv):
+                self.assertEqual(calculate_match_score(CVS[cv], JDS[jd]), expected)
+
+    def test_batch_scores_match_single_scores(self):
+        for jd, jd_data in JDS.items():
+            with self.subTest(jd=jd):
+                self.assertEqual(
+                    score_candidates(list(CVS.values()), jd_data),
+                    [BASELINE_SCORES[(jd, cv)] for cv in CVS],
+                )
+
+    def test_malformed_input_scores_zero(self):
+        self.assertEqual(calculate_match_score(None, JDS['full']), 0.0)
+        self.assertEqual(score_candidates(['not a dict', CVS['strong']], JDS['full']), [0.0, 100.0])
+
+class KeywordMatcherTests(SimpleTestCase):
+    def test_finds_overlapping_and_prefix_keywords(self):
+        matcher = KeywordMatcher(['sec', 'security', 'network security', 'aws'])
+        self.assertEqual(matcher.find('network security'), {'sec', 'security', 'network security'})
+        self.assertEqual(matcher.find('aws and secops'), {'aws', 'sec'})
+        self.assertEqual(matcher.find('nothing here'), frozenset())
+
+    def test_find_any_unions_texts(self):
+        matcher = KeywordMatcher(['python', 'java'])
+        self.assertEqual(matcher.find_any(['python', 'javascript']), {'python', 'java'})
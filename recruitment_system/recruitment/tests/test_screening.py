@@ -0,0 +1,98 @@
+from datetime import timedelta
+from unittest import mock
+from django.conf import settings
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+from recruitment.models import ScreeningBatch, ScreeningTask
+from recruitment.screening import batch_progress, claim_batch, claim_tasks, fail_batch, requeue_stale_work
+
+class ClaimTests(TestCase):
+    def test_claim_batch_takes_the_oldest_pending_batch(self):
+        first = ScreeningBatch.objects.create(jd_file='a.pdf')
+        ScreeningBatch.objects.create(jd_file='b.pdf')
+        ScreeningBatch.objects.create(jd_file='c.pdf', status=ScreeningBatch.STATUS_COMPLETED)
+        batch = claim_batch()
+        self.assertEqual(batch.pk, first.pk)
+        self.assertEqual(batch.status, ScreeningBatch.STATUS_SUMMARIZING)
+        self.assertIsNotNone(batch.started_at)
+        self.assertEqual(claim_batch().jd_file, 'b.pdf')
+        self.assertIsNone(claim_batch())
+
+    def test_claim_tasks_only_takes_tasks_of_summarized_batches(self):
+        waiting = ScreeningBatch.objects.create(jd_file='a.pdf')
+        ready = ScreeningBatch.objects.create(jd_file='b.pdf', status=ScreeningBatch.STATUS_PROCESSING)
+        ScreeningTask.objects.create(batch=waiting, file_name='a.pdf', cv_file='cvs/a.pdf')
+        for name in ('b.pdf', 'c.pdf', 'd.pdf'):
+            ScreeningTask.objects.create(batch=ready, file_name=name, cv_file=f'cvs/{name}')
+        tasks = claim_tasks(2)
+        self.assertEqual([task.file_name for task in tasks], ['b.pdf', 'c.pdf'])
+        for task in tasks:
+            self.assertEqual(task.status, ScreeningTask.STATUS_RUNNING)
+            self.assertEqual(task.attempts, 1)
+        self.assertEqual([task.file_name for task in claim_tasks(5)], ['d.pdf'])
+        self.assertEqual(claim_tasks(5), [])
+
+    def test_fail_batch_fails_unfinished_tasks(self):
+        batch = ScreeningBatch.objects.create(jd_file='a.pdf', status=ScreeningBatch.STATUS_PROCESSING)
+        ScreeningTask.objects.create(batch=batch, file_name='a.pdf', cv_file='cvs/a.pdf', status=ScreeningTask.STATUS_DONE)
+        ScreeningTask.objects.create(batch=batch, file_name='b.pdf', cv_file='cvs/b.pdf')
+        fail_batch(batch, 'Failed to process job description.')
+        progress = batch_progress(batch)
+        self.assertEqual(progress['status'], ScreeningBatch.STATUS_FAILED)
+        self.assertEqual((progress['done'], progress['failed']), (1, 1))
+        self.assertEqual(progress['failed_cvs'], ['b.pdf'])
+        self.assertTrue(progress['is_finished'])
+
+class RequeueStaleWorkTests(TestCase):
+    def setUp(self):
+        self.batch = ScreeningBatch.objects.create(jd_file='jd.pdf', status=ScreeningBatch.STATUS_PROCESSING)
+        self.stale = timezone.now() - timedelta(seconds=settings.SCREENING_TASK_TIMEOUT + 60)
+
+    def create_task(self, name, attempts, **fields):
+        return ScreeningTask.objects.create(
+            batch=self.batch, file_name=name, cv_file=f'cvs/{name}', status=ScreeningTask.STATUS_RUNNING,
+            attempts=attempts, started_at=self.stale, cv_text='parsed text', **fields
+        )
+
+    def test_exhausted_tasks_fail_and_finish_the_batch(self):
+        task = self.create_task('a.pdf', settings.SCREENING_TASK_MAX_ATTEMPTS)
+        ScreeningTask.objects.create(batch=self.batch, file_name='b.pdf', cv_file='cvs/b.pdf', status=ScreeningTask.STATUS_DONE)
+        requeue_stale_work()
+        task.refresh_from_db()
+        self.assertEqual(task.status, ScreeningTask.STATUS_FAILED)
+        self.assertEqual(task.error, 'Worker timed out processing this CV.')
+        self.assertEqual(task.cv_text, '')
+        self.assertIsNotNone(task.finished_at)
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, ScreeningBatch.STATUS_COMPLETED)
+        self.assertIsNotNone(self.batch.finished_at)
+
+    def test_retryable_tasks_are_requeued(self):
+        exhausted = self.create_task('a.pdf', settings.SCREENING_TASK_MAX_ATTEMPTS)
+        retryable = self.create_task('b.pdf', 1)
+        fresh = self.create_task('c.pdf', 1)
+        ScreeningTask.objects.filter(pk=fresh.pk).update(started_at=timezone.now())
+        requeue_stale_work()
+        statuses = dict(ScreeningTask.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[exhausted.pk], ScreeningTask.STATUS_FAILED)
+        self.assertEqual(statuses[retryable.pk], ScreeningTask.STATUS_PENDING)
+        self.assertEqual(statuses[fresh.pk], ScreeningTask.STATUS_RUNNING)
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, ScreeningBatch.STATUS_PROCESSING)
+
+    def test_stale_summarizing_batch_returns_to_queue(self):
+        ScreeningBatch.objects.filter(pk=self.batch.pk).update(status=ScreeningBatch.STATUS_SUMMARIZING, started_at=self.stale)
+        requeue_stale_work()
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, ScreeningBatch.STATUS_PENDING)
+        self.assertIsNone(self.batch.started_at)
+
+    def test_exhausted_tasks_locked_elsewhere_are_not_requeued(self):
+        task = self.create_task('a.pdf', settings.SCREENING_TASK_MAX_ATTEMPTS)
+        # Another worker holds the row lock, so skip_locked selects nothing
+        with mock.patch.object(QuerySet, 'select_for_update', lambda queryset, **kwargs: queryset.none()):
+            requeue_stale_work()
+        task.refresh_from_db()
+        self.assertEqual(task.status, ScreeningTask.STATUS_RUNNING)
+        self.assertEqual(task.error, '')
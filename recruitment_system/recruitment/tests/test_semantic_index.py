@@ -0,0 +1,89 @@
+import math
+import shutil
+import tempfile
+from django.test import SimpleTestCase, TestCase, override_settings
+from recruitment import semantic_index
+from recruitment.embeddings import HashedTfidfEmbedder, candidate_text, normalize_text
+from recruitment.models import Candidate
+from recruitment.semantic_index import VectorIndex, blend_score, sync_candidates
+
+TEXTS = {
+    1: 'penetration testing, ethical hacking, kali linux',
+    2: 'siem, splunk, incident response, security operations',
+    3: 'pastry chef, baking, cake decoration',
+}
+
+class EmbeddingTests(SimpleTestCase):
+    def test_synonyms_map_to_one_phrase(self):
+        self.assertEqual(normalize_text('Pentest and IDS for the SOC'), 'penetration testing and intrusion detection for the security operations')
+        # Only whole words are rewritten
+        self.assertEqual(normalize_text('kids'), 'kids')
+
+    def test_candidate_text_joins_the_scored_fields(self):
+        cv_data = {'skills': ['SIEM'], 'experience': ['3 years'], 'education': None, 'name': 'Jane'}
+        self.assertEqual(candidate_text(cv_data), 'SIEM\n3 years')
+        self.assertEqual(candidate_text('not a dict'), '')
+
+class VectorIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.index = VectorIndex(self.path, HashedTfidfEmbedder(dim=256))
+        self.index.add(list(TEXTS), list(TEXTS.values()))
+
+    def test_query_ranks_similar_candidates_first(self):
+        self.assertEqual([cid for cid, _ in self.index.query('pentest and ethical hacking', k=2)], [1, 2])
+        self.assertEqual(self.index.query('security operations center')[0][0], 2)
+
+    def test_unchanged_texts_are_not_embedded_again(self):
+        self.assertEqual(self.index.add([1, 2], [TEXTS[1], 'network security']), 1)
+        self.assertEqual(len(self.index), 3)
+
+    def test_removed_candidates_leave_a_tombstone(self):
+        self.assertEqual(self.index.remove([3, 99]), 1)
+        self.assertEqual(self.index.candidate_ids(), {1, 2})
+        self.assertEqual(self.index.stats()['tombstones'], 1)
+        self.assertNotIn(3, [cid for cid, _ in self.index.query('baking', k=5)])
+
+    def test_scores_for_unknown_candidates_are_nan(self):
+        scores = self.index.scores_for([3, 42, 1], 'cake baking')
+        self.assertTrue(math.isnan(scores[1]))
+        self.assertGreater(scores[0], scores[2])
+
+    def test_other_processes_see_writes(self):
+        reader = VectorIndex(self.path, HashedTfidfEmbedder(dim=256))
+        self.assertEqual(reader.candidate_ids(), {1, 2, 3})
+        self.index.add([4], ['cloud security, aws'])
+        reader.refresh()
+        self.assertEqual(reader.query('aws cloud security', k=1)[0][0], 4)
+
+    def test_index_from_another_embedder_is_ignored(self):
+        with self.assertLogs('recruitment.semantic_index', 'WARNING'):
+            other = VectorIndex(self.path, HashedTfidfEmbedder(dim=128))
+        self.assertEqual(len(other), 0)
+
+class BlendScoreTests(SimpleTestCase):
+    def test_blends_by_weight(self):
+        self.assertEqual(blend_score(80.0, 40.0, weight=0.25), 70.0)
+        self.assertEqual(blend_score(80.0, None, weight=0.25), 80.0)
+        self.assertEqual(blend_score(80.0, 40.0, weight=0.0), 80.0)
+
+class SyncCandidatesTests(TestCase):
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        settings_override = override_settings(SEMANTIC_INDEX_DIR=path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        semantic_index._index = None
+        self.addCleanup(setattr, semantic_index, '_index', None)
+
+    def test_sync_embeds_new_and_removes_deleted_candidates(self):
+        first = Candidate.objects.create(name='A', email='a@example.com', cv_data={'skills': ['SIEM']})
+        second = Candidate.objects.create(name='B', email='b@example.com', cv_data={'skills': ['AWS']})
+        self.assertEqual(sync_candidates(), (2, 0))
+        self.assertEqual(sync_candidates(), (0, 0))
+        second.delete()
+        self.assertEqual(sync_candidates(), (0, 1))
+        self.assertEqual(semantic_index.get_index().candidate_ids(), {first.pk})
+        self.assertEqual(sync_candidates(rebuild=True), (1, 0))
@@ -0,0 +1,50 @@
+from django.test import TestCase
+from recruitment import shortlist
+from recruitment.models import Application, Candidate, ScreeningBatch, ScreeningTask
+from recruitment.screening import get_job
+from .test_scoring import JDS
+
+class ShortlistPageTests(TestCase):
+    def setUp(self):
+        job = get_job('Security Analyst', JDS['full'])
+        self.batch = ScreeningBatch.objects.create(jd_file='jd.pdf', job=job, status=ScreeningBatch.STATUS_COMPLETED)
+        # Tied scores exercise the id tie-break
+        for index, score in enumerate([95.0, 80.0, 80.0, 80.0, 72.5, 40.0]):
+            candidate = Candidate.objects.create(name=f'Candidate {index}', email=f'c{index}@example.com', match_score=score)
+            Application.objects.create(candidate=candidate, job=job, batch=self.batch, match_score=score)
+            ScreeningTask.objects.create(batch=self.batch, file_name=f'{index}.pdf', cv_file=f'cvs/{index}.pdf', status=ScreeningTask.STATUS_DONE, candidate=candidate)
+
+    def collect_pages(self, sort):
+        rows, cursor, pages = [], None, 0
+        while True:
+            page = shortlist.shortlist_page(self.batch, sort=sort, cursor=cursor, page_size=2)
+            self.assertEqual(page['total'], 5)
+            rows.extend(page['candidates'])
+            pages += 1
+            cursor = page['next_cursor']
+            if cursor is None:
+                return rows, pages
+
+    def test_cursor_round_trip_visits_every_row_once(self):
+        for sort in (shortlist.SORT_SCORE_DESC, shortlist.SORT_SCORE_ASC, shortlist.SORT_NAME):
+            with self.subTest(sort=sort):
+                rows, pages = self.collect_pages(sort)
+                expected = list(shortlist.shortlist_rows(self.batch, sort=sort))
+                self.assertEqual(rows, expected)
+                self.assertEqual(len({row['id'] for row in rows}), 5)
+                self.assertEqual(pages, 3)
+
+    def test_encode_decode_cursor(self):
+        row = {'id': 7, 'match_score': 80.0, 'name': 'Ann'}
+        self.assertEqual(shortlist.decode_cursor(shortlist.encode_cursor(row, shortlist.SORT_SCORE_DESC)), (80.0, 7))
+        self.assertEqual(shortlist.decode_cursor(shortlist.encode_cursor(row, shortlist.SORT_NAME)), ('Ann', 7))
+        self.assertIsNone(shortlist.decode_cursor(''))
+
+    def test_malformed_cursor_restarts_from_first_page(self):
+        first = shortlist.shortlist_page(self.batch, page_size=2)
+        for cursor in ('%%%', 'bm90IGpzb24', 'eyJhIjogMX0', 'WzEsICJ4Il0'):
+            with self.subTest(cursor=cursor):
+                with self.assertLogs('recruitment.shortlist', 'WARNING'):
+                    self.assertIsNone(shortlist.decode_cursor(cursor))
+                with self.assertLogs('recruitment.shortlist', 'WARNING'):
+                    self.assertEqual(shortlist.shortlist_page(self.batch, cursor=cursor, page_size=2), first)
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from recruitment import pdf_text, uploads
+from recruitment.loadtest import synthetic_jd, synthetic_pdf
+from recruitment.models import ScreeningBatch, ScreeningTask
+
+def cv_upload(number, name=None):
+    return SimpleUploadedFile(name or f'cv{number}.pdf', synthetic_pdf([f'Candidate {number}', f'c{number}@example.com']), 'application/pdf')
+
+class UploadTestMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, FILE_UPLOAD_TEMP_DIR=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+@override_settings(UPLOAD_PARSE_WAIT=30)
+class UploadViewTests(UploadTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('recruiter', password='secret')
+        self.client.force_login(self.user)
+
+    def post(self, cvs, client=None, **extra):
+        jd = SimpleUploadedFile('jd.pdf', synthetic_jd(), 'application/pdf')
+        return (client or self.client).post(reverse('recruitment:upload'), {'jd_file': jd, 'cv_files': cvs, **extra})
+
+    def test_spools_hashes_and_parses_accepted_cvs(self):
+        cvs = [cv_upload(number) for number in range(3)]
+        expected_hashes = {cv.name: hashlib.sha256(cv.read()).hexdigest() for cv in cvs}
+        for cv in cvs:
+            cv.seek(0)
+        response = self.post(cvs)
+        batch = ScreeningBatch.objects.get()
+        self.assertRedirects(response, reverse('recruitment:batch_status', args=[batch.pk]), fetch_redirect_response=False)
+        tasks = list(batch.tasks.order_by('id'))
+        self.assertEqual({task.file_name: task.content_hash for task in tasks}, expected_hashes)
+        for number, task in enumerate(tasks):
+            self.assertIn(f'c{number}@example.com', task.cv_text)
+            self.assertEqual(task.stage, ScreeningTask.STAGE_PARSED)
+            self.assertTrue(os.path.isfile(os.path.join(self.media_root, task.cv_file)))
+
+    def test_rejects_more_than_80_cvs_without_parsing(self):
+        with mock.patch('recruitment.uploads.pdf_text.extract_texts', side_effect=AssertionError('parsed')):
+            response = self.post([cv_upload(number) for number in range(81)])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'up to 80 CVs')
+        self.assertFalse(ScreeningBatch.objects.exists())
+
+    def test_rejects_non_pdf_cvs_without_parsing(self):
+        with mock.patch('recruitment.uploads.pdf_text.extract_texts', side_effect=AssertionError('parsed')):
+            self.post([cv_upload(0), SimpleUploadedFile('notes.txt', b'plain text', 'text/plain')])
+        self.assertFalse(ScreeningBatch.objects.exists())
+
+    def test_csrf_is_checked_before_anything_is_parsed(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        with mock.patch('recruitment.uploads.pdf_text.extract_texts', side_effect=AssertionError('parsed')):
+            response = self.post([cv_upload(0)], client=client)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ScreeningBatch.objects.exists())
+        # With the token from the form the same upload is accepted
+        token = client.get(reverse('recruitment:upload')).context['csrf_token']
+        self.assertEqual(self.post([cv_upload(0)], client=client, csrfmiddlewaretoken=token).status_code, 302)
+
+    @override_settings(UPLOAD_PARSE_WAIT=0)
+    def test_parsing_can_be_left_to_the_worker(self):
+        self.post([cv_upload(0)])
+        task = ScreeningTask.objects.get()
+        self.assertEqual((task.cv_text, task.stage), ('', ''))
+        self.assertTrue(task.content_hash)
+
+class ParseAcceptedTests(UploadTestMixin, SimpleTestCase):
+    def write(self, name, data):
+        path = os.path.join(self.media_root, name)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+        return path
+
+    @override_settings(UPLOAD_PARSE_WAIT=30)
+    def test_returns_one_text_per_path(self):
+        paths = [self.write('a.pdf', synthetic_pdf(['Alice'])), self.write('broken.pdf', b'not a pdf')]
+        texts = uploads.parse_accepted(paths)
+        self.assertIn('Alice', texts[0])
+        self.assertIsNone(texts[1])
+        self.assertEqual(uploads.parse_accepted([]), [])
+
+    @override_settings(UPLOAD_PARSE_WAIT=0.2, PDF_PARSE_TIMEOUT=1, PDF_PARSE_WORKERS=2)
+    def test_parse_left_running_is_replaced_once_past_its_deadline(self):
+        pdf_text._reset_pool()
+        self.addCleanup(pdf_text._reset_pool)
+        # Opening a FIFO with no writer blocks forever, like a parser stuck inside a page
+        fifo = os.path.join(self.media_root, 'hung.pdf')
+        os.mkfifo(fifo)
+        pool = pdf_text._get_pool()
+        started = time.monotonic()
+        self.assertEqual(uploads.parse_accepted([fifo]), [None])
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(len(pdf_text._abandoned), 1)
+        with override_settings(UPLOAD_PARSE_WAIT=30):
+            # Still within its deadline: the next call keeps the pool and parses on its free worker
+            self.assertIn('Alice', uploads.parse_accepted([self.write('a.pdf', synthetic_pdf(['Alice']))])[0])
+            self.assertIs(pdf_text._get_pool(), pool)
+            _, result = pdf_text._abandoned[0]
+            pdf_text._abandoned[0] = (time.monotonic() - 1, result)
+            with self.assertLogs('recruitment.pdf_text', 'WARNING'):
+                texts = uploads.parse_accepted([self.write('b.pdf', synthetic_pdf(['Bob']))])
+        self.assertIn('Bob', texts[0])
+        self.assertIsNot(pdf_text._get_pool(), pool)
+        self.assertEqual(pdf_text._abandoned, [])
@@ -0,0 +1,59 @@
+import hashlib
+import logging
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from . import metrics, pdf_text
+from .prompt_text import PAGE_BREAK
+
+logger = logging.getLogger(__name__)
+
+class SpooledUploadedFile(TemporaryUploadedFile):
+    """A file streamed to a temporary file on disk, with the SHA-256 of its content."""
+
+    content_hash = ''
+
+def parse_accepted(paths):
+    """Parse the CVs of an accepted upload for at most UPLOAD_PARSE_WAIT seconds in total; return one text (None if not ready) per path.
+
+    Parsing starts once the whole request has been received and passed the CSRF and form checks.
+    Whatever is not parsed in time is left to the worker; a parse that keeps running past
+    PDF_PARSE_TIMEOUT has its pool replaced by the next pdf_text.extract_texts call.
+    """
+    if settings.UPLOAD_PARSE_WAIT <= 0 or not paths:
+        return [None] * len(paths)
+    texts = pdf_text.extract_texts(paths, max_chars=settings.PROMPT_SOURCE_MAX_CHARS, page_prefix=PAGE_BREAK, wait=settings.UPLOAD_PARSE_WAIT)
+    metrics.increment('upload_cvs_preparsed', sum(1 for text in texts if text))
+    return texts
+
+class CVSpoolUploadHandler(FileUploadHandler):
+    """Stream every uploaded file to a temporary file, hashing it on the way.
+
+    Nothing is buffered in memory beyond one UPLOAD_CHUNK_SIZE chunk per request (Django's default
+    handlers keep files under 2.5 MB in memory), and FileSystemStorage later moves the temporary
+    file into MEDIA_ROOT instead of copying it.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.chunk_size = settings.UPLOAD_CHUNK_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = SpooledUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        self._hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file.write(raw_data)
+        self._hasher.update(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_hash = self._hasher.hexdigest()
+        metrics.increment('upload_spooled_bytes', file_size)
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
@@ -5,10 +5,19 @@ from .views import CustomLoginView
 app_name = 'recruitment'
 urlpatterns = [
     path('', views.upload, name='upload'),
+    path('upload/async/', views.upload_async, name='upload_async'),
     path('register/', views.register, name='register'),
     path('login/', CustomLoginView.as_view(template_name='recruitment/login.html'), name='login'),
     path('logout/', views.user_logout, name='logout'),
+    path('batches/<int:batch_id>/', views.batch_status, name='batch_status'),
+    path('batches/<int:batch_id>/progress/', views.batch_progress_json, name='batch_progress'),
+    path('batches/<int:batch_id>/events/', views.batch_events, name='batch_events'),
+    path('batches/<int:batch_id>/shortlist.zip', views.export_shortlist_zip, name='export_shortlist_zip'),
     path('shortlisted/', views.shortlisted_candidates, name='shortlisted_candidates'),
+    path('rescore/', views.rescore, name='rescore'),
     path('send-email/', views.send_candidate_email, name='send_candidate_email'),
+    path('emails/<int:campaign_id>/', views.email_campaign_status, name='email_campaign_status'),
+    path('emails/<int:campaign_id>/progress/', views.email_campaign_progress_json, name='email_campaign_progress'),
     path('download-cv/<path:cv_path>/', views.download_cv, name='download_cv'),
+    path('metrics', views.metrics_endpoint, name='metrics'),
 ]
\ No newline at end of file
@@ -1,96 +1,75 @@
 
+import asyncio
+import functools
+import io
 import os
-import PyPDF2
-from google.generativeai import GenerativeModel, list_models, configure
-from google.api_core.exceptions import ResourceExhausted, NotFound
-from django.core.mail import send_mail
+import tempfile
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.template.loader import render_to_string
 import logging
 import re
 import json
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import time
+from .concurrency import map_bounded
+from .llm_client import llm_client
+from .model_registry import model_registry
+from . import extraction_cache, local_extraction, metrics, near_duplicates, pdf_text
+from .prompt_text import PAGE_BREAK, prepare_cv_text, prepare_jd_text, source_limits, split_cv_text
+from .models import ExtractionCacheEntry
+from .rate_control import estimate_tokens, gemini_rate_controller, parse_retry_after
+from .scoring import JD_SKILLS, RELATED_SKILLS, CYBERSECURITY_ROLES, JDRequirements, score_candidate
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Configure Google API key once
-configure(api_key=settings.GOOGLE_API_KEY)
+# Bump when a prompt changes so cached extractions from the old prompt are no longer served
+CV_PROMPT_VERSION = 'cv-v3'
+JD_PROMPT_VERSION = 'jd-v3'
 
-# Common stop words to ignore in matching
-STOP_WORDS = {
-    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he',
-    'in', 'is', 'it', 'its', 'of', 'on', 'that', 'the', 'to', 'was', 'were',
-    'will', 'with', 'skills', 'experience', 'education', 'certifications'
+# Response schemas for Gemini structured output (GEMINI_STRUCTURED_OUTPUT)
+_STRING_LIST = {'type': 'array', 'items': {'type': 'string'}}
+CV_RESPONSE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'name': {'type': 'string'},
+        'email': {'type': 'string'},
+        'skills': _STRING_LIST,
+        'experience': _STRING_LIST,
+        'education': _STRING_LIST,
+        'certifications': _STRING_LIST,
+        'summary': {'type': 'string'},
+    },
+    'required': ['name', 'email', 'skills', 'experience', 'education', 'certifications', 'summary'],
+}
+CV_BATCH_RESPONSE_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': dict(CV_RESPONSE_SCHEMA['properties'], index={'type': 'integer'}),
+        'required': ['index'] + CV_RESPONSE_SCHEMA['required'],
+    },
+}
+JD_RESPONSE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'job_title': {'type': 'string'},
+        'summary': {'type': 'string'},
+    },
+    'required': ['job_title', 'summary'],
 }
-
-# Keyword lists for matching
-JD_SKILLS = [
-    'siem', 'firewalls', 'intrusion detection', 'network security', 'encryption',
-    'penetration testing', 'vulnerability assessment', 'ethical hacking', 'risk assessment',
-    'security monitoring', 'cryptography', 'security analytics'
-]
-RELATED_SKILLS = [
-    'aws', 'python', 'java', 'docker', 'kubernetes', 'cloud security', 'security tools',
-    'sql', 'networking', 'linux', 'windows', 'scripting'
-]
-CYBERSECURITY_ROLES = [
-    'cybersecurity', 'security analyst', 'penetration tester', 'ethical hacker',
-    'security engineer', 'information security', 'network security'
-]
-TECHNICAL_ROLES = [
-    'software engineer', 'data scientist', 'product manager', 'developer',
-    'systems administrator', 'network engineer'
-]
 
 class QuotaExceededError(Exception):
-    pass
-
-retry_on_quota_exhausted = retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type(QuotaExceededError)
-)
+    """Gemini quota stayed exhausted for GEMINI_QUOTA_MAX_ATTEMPTS tries; callers requeue the work instead of failing it."""
 
 def validate_api_key():
     """Validate Google API key configuration."""
-    try:
-        models = list_models()
-        logger.debug(f"Available models: {[m.name for m in models if 'generateContent' in m.supported_generation_methods]}")
-        return True
-    except Exception as e:
-        logger.error(f"Invalid Google API key or connectivity issue: {str(e)}")
-        return False
+    return model_registry.get_model_name() is not None
 
 def get_available_model():
     """Fetch an available Gemini model for content generation."""
-    try:
-        models = list_models()
-        preferred_model = 'gemini-2.0-flash'  # Set to desired model
-        fallback_model = 'gemini-1.5-flash'   # Fallback if gemini-2.0-flash is unavailable
-        available_models = [m.name.split('/')[-1] for m in models if 'generateContent' in m.supported_generation_methods]
-        logger.debug(f"Available models: {available_models}")
-        
-        if preferred_model in available_models:
-            logger.debug(f"Selected model: {preferred_model}")
-            return preferred_model
-        
-        logger.warning(f"Preferred model {preferred_model} not available. Falling back to {fallback_model}")
-        if fallback_model in available_models:
-            logger.debug(f"Selected fallback model: {fallback_model}")
-            return fallback_model
-        
-        if available_models:
-            model = available_models[0]
-            logger.debug(f"Fallback to first available model: {model}")
-            return model
-        
-        logger.error("No models supporting generateContent found")
-        return None
-    except Exception as e:
-        logger.error(f"Error listing models: {str(e)}")
-        return None
+    return model_registry.get_model_name()
 
+@metrics.timed('json_repair_seconds')
 def clean_json_response(text):
     """Remove Markdown code block wrappers and fix JSON syntax issues, handling invalid escapes and truncated JSON."""
     text = text.strip()
@@ -123,6 +102,7 @@ def clean_json_response(text):
             parsed['summary'] = '; '.join([f"{k}: {v}" for k, v in parsed['summary'].items()])
         cleaned = json.dumps(parsed, ensure_ascii=False)
         logger.debug(f"Cleaned JSON response: {cleaned[:100]}...")
+        metrics.increment('json_repair_regex')
         return cleaned
     except json.JSONDecodeError as e:
         logger.warning(f"Initial JSON parse failed: {str(e)}. Attempting manual cleanup.")
@@ -149,6 +129,7 @@ def clean_json_response(text):
                 parsed['summary'] = '; '.join([f"{k}: {v}" for k, v in parsed['summary'].items()])
             cleaned = json.dumps(parsed, ensure_ascii=False)
             logger.debug(f"Manually cleaned JSON: {cleaned[:100]}...")
+            metrics.increment('json_repair_escape')
             return cleaned
         except json.JSONDecodeError as e:
             logger.error(f"Manual JSON cleanup failed: {str(e)}. Raw text: {text[:200]}...")
@@ -163,284 +144,752 @@ def clean_json_response(text):
                     }
                     cleaned = json.dumps(partial, ensure_ascii=False)
                     logger.debug(f"Extracted partial JSON: {cleaned[:100]}...")
+                    # Lossy: every field except job_title/summary is dropped
+                    metrics.increment('json_repair_partial')
                     return cleaned
                 else:
                     logger.error("Could not extract partial JSON")
+                    metrics.increment('json_repair_failed')
                     return None
             except Exception as e:
                 logger.error(f"Partial JSON extraction failed: {str(e)}")
+                metrics.increment('json_repair_failed')
                 return None
 
-@retry_on_quota_exhausted
-def make_api_call(model, prompt):
-    """Make an API call with retry logic for quota errors."""
+_JSON_DECODER = json.JSONDecoder()
+
+def _close_truncated_json(text):
+    """Append the quotes and brackets missing from a truncated JSON document, or return None if it is balanced."""
+    closers = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            closers.append('}')
+        elif ch == '[':
+            closers.append(']')
+        elif ch in '}]' and closers:
+            closers.pop()
+    if not closers and not in_string:
+        return None
+    text = text + '"' if in_string else text
+    return text.rstrip().rstrip(',') + ''.join(reversed(closers))
+
+def _decode_json_tiers(text, expected_type):
+    """Return (tier, value) for the cheapest tier that yields a value of `expected_type`."""
+    opener = '[' if expected_type is list else '{'
+    start = text.find(opener)
+    if start == -1:
+        return 'failed', None
+    body = text[start:]
+    try:
+        value, _ = _JSON_DECODER.raw_decode(body)
+        if isinstance(value, expected_type):
+            return 'direct', value
+    except json.JSONDecodeError:
+        pass
+    # Truncated output (e.g. max tokens reached): close what is open, dropping a trailing partial member if needed
+    candidate = body
+    for _ in range(3):
+        closed = _close_truncated_json(candidate)
+        if closed is None:
+            break
+        try:
+            value, _ = _JSON_DECODER.raw_decode(closed)
+            if isinstance(value, expected_type):
+                return 'completed', value
+        except json.JSONDecodeError:
+            pass
+        if ',' not in candidate:
+            break
+        candidate = candidate.rsplit(',', 1)[0]
+    if expected_type is dict:
+        cleaned = clean_json_response(text)
+        if cleaned is not None:
+            return 'repaired', json.loads(cleaned)
+    return 'failed', None
+
+def parse_json_response(text, expected_type=dict):
+    """Parse a model response into a JSON object (or list), using the regex repair cascade only as a last resort."""
+    started = time.perf_counter()
     try:
-        response = model.generate_content(prompt)
-        return response
-    except ResourceExhausted as e:
-        logger.error(f"API quota exceeded: {str(e)}")
-        raise QuotaExceededError(f"Quota exceeded: {str(e)}")
-    except NotFound as e:
-        logger.error(f"Model not found: {str(e)}")
+        tier, value = _decode_json_tiers((text or '').strip(), expected_type)
+    except Exception as e:
+        logger.error(f"JSON response parsing failed: {str(e)}")
+        tier, value = 'failed', None
+    elapsed = time.perf_counter() - started
+    metrics.increment(f'json_parse_{tier}')
+    metrics.increment(f'json_parse_seconds_{tier}', elapsed)
+    metrics.observe('json_parse_seconds', elapsed)
+    if tier == 'failed':
+        logger.error(f"Could not parse JSON response: {(text or '')[:200]}...")
+        return None
+    if tier != 'direct':
+        logger.warning(f"JSON response needed {tier} parsing")
+    if isinstance(value, dict) and isinstance(value.get('summary'), dict):
+        logger.warning(f"Summary is a dictionary: {value['summary']}. Converting to string.")
+        value['summary'] = '; '.join([f"{k}: {v}" for k, v in value['summary'].items()])
+    return value
+
+def structured_output_config(response_schema):
+    """Return a generation config requesting JSON that matches `response_schema`, or None when disabled."""
+    if not settings.GEMINI_STRUCTURED_OUTPUT or response_schema is None:
+        return None
+    return {'response_mime_type': 'application/json', 'response_schema': response_schema}
+
+def record_token_usage(response):
+    """Count the prompt and output tokens Gemini reports for a response; return the prompt tokens (None if unreported)."""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return None
+    prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+    metrics.increment('gemini_prompt_tokens', prompt_tokens)
+    metrics.increment('gemini_output_tokens', getattr(usage, 'candidates_token_count', 0) or 0)
+    return prompt_tokens
+
+QUOTA_ERROR = 'quota'
+MODEL_NOT_FOUND = 'model_not_found'
+
+def _classify_api_error(error):
+    """Count and log a failed Gemini call; return QUOTA_ERROR or MODEL_NOT_FOUND, or None for errors the caller re-raises."""
+    if isinstance(error, llm_client.errors.ResourceExhausted):
+        metrics.increment('gemini_quota_errors')
+        return QUOTA_ERROR
+    if isinstance(error, llm_client.errors.NotFound):
+        metrics.increment('gemini_model_not_found')
+        logger.error(f"Model not found: {str(error)}")
+        return MODEL_NOT_FOUND
+    metrics.increment('gemini_errors')
+    logger.error(f"API call failed: {str(error)}")
+    return None
+
+def _check_quota_retry(error, attempt):
+    """Raise QuotaExceededError once GEMINI_QUOTA_MAX_ATTEMPTS tries have hit the quota, else count the retry."""
+    if attempt >= settings.GEMINI_QUOTA_MAX_ATTEMPTS:
+        logger.error(f"API quota exceeded after {attempt} attempt(s): {str(error)}")
+        raise QuotaExceededError(f"Quota exceeded: {str(error)}")
+    metrics.increment('gemini_retries')
+    logger.warning(f"API quota exceeded (attempt {attempt}), retrying: {str(error)}")
+
+def _replacement_model(model, refreshed):
+    """Return the refreshed model to retry with after NotFound, or None if there is no other model."""
+    if refreshed is None or refreshed.model_name == model.model_name:
+        return None
+    logger.warning(f"Retrying with refreshed model {refreshed.model_name}")
+    return refreshed
+
+def _record_success(tokens, response):
+    gemini_rate_controller.on_success()
+    gemini_rate_controller.record_tokens(tokens, record_token_usage(response))
+    return response
+
+def make_api_call(model, prompt, response_schema=None):
+    """Make an API call paced by the shared rate controller, waiting out quota errors.
+
+    A quota error slows every caller in the process (and, with GEMINI_RATE_COORDINATION='db', every
+    worker) and pauses for the server's retry-after hint; after GEMINI_QUOTA_MAX_ATTEMPTS tries
+    QuotaExceededError is raised so the caller can requeue the work.
+    """
+    tokens = estimate_tokens(prompt)
+    generation_config = structured_output_config(response_schema)
+    for attempt in range(1, settings.GEMINI_QUOTA_MAX_ATTEMPTS + 1):
+        try:
+            with metrics.timer('gemini_rate_limit_wait_seconds'):
+                gemini_rate_controller.acquire(tokens)
+            metrics.increment('gemini_api_calls')
+            with metrics.timer('gemini_request_seconds'):
+                response = model.generate_content(prompt, generation_config=generation_config)
+        except Exception as e:
+            failure = _classify_api_error(e)
+            if failure == QUOTA_ERROR:
+                gemini_rate_controller.on_quota_error(parse_retry_after(e))
+                _check_quota_retry(e, attempt)
+                continue
+            if failure == MODEL_NOT_FOUND:
+                refreshed = _replacement_model(model, model_registry.get_model(force_refresh=True))
+                if refreshed is not None:
+                    return make_api_call(refreshed, prompt, response_schema)
+            raise
+        return _record_success(tokens, response)
+
+async def make_api_call_async(model, prompt, response_schema=None):
+    """make_api_call on the async Gemini client: waiting for the rate controller or Gemini holds no thread."""
+    tokens = estimate_tokens(prompt)
+    generation_config = structured_output_config(response_schema)
+    for attempt in range(1, settings.GEMINI_QUOTA_MAX_ATTEMPTS + 1):
+        try:
+            with metrics.timer('gemini_rate_limit_wait_seconds'):
+                await gemini_rate_controller.acquire_async(tokens)
+            metrics.increment('gemini_api_calls')
+            with metrics.timer('gemini_request_seconds'):
+                response = await model.generate_content_async(prompt, generation_config=generation_config)
+        except Exception as e:
+            failure = _classify_api_error(e)
+            if failure == QUOTA_ERROR:
+                await gemini_rate_controller.on_quota_error_async(parse_retry_after(e))
+                _check_quota_retry(e, attempt)
+                continue
+            if failure == MODEL_NOT_FOUND:
+                refreshed = _replacement_model(model, await asyncio.to_thread(model_registry.get_model, force_refresh=True))
+                if refreshed is not None:
+                    return await make_api_call_async(refreshed, prompt, response_schema)
+            raise
+        return _record_success(tokens, response)
+
+def _response_text(response, kind):
+    result = response.text.strip() if response.text else ''
+    logger.debug(f"Raw {kind} API response: {result[:200]}...")
+    return result
+
+def _cached_extraction(kind, prompt_version, document, extract):
+    """Return a cached result for `document` or run `extract(document, get_model)` and cache a non-empty result.
+
+    `get_model()` resolves the model (None if unavailable) only when `extract` needs Gemini, so cache
+    hits and locally extracted CVs need no API key or model listing.
+    """
+    digest = extraction_cache.content_hash(document)
+    cached = extraction_cache.get(kind, digest, prompt_version, model_registry.cached_model_name())
+    if cached is not None:
+        return cached
+    resolved = []
+
+    def get_model():
+        if not resolved:
+            resolved.append(_resolve_model())
+        return resolved[0][0]
+
+    data = extract(document, get_model)
+    # Results produced without a model (local extraction) are never cached
+    if data and resolved:
+        extraction_cache.put(kind, digest, prompt_version, resolved[0][1], data)
+    return data
+
+async def _cached_extraction_async(kind, prompt_version, source, extract, digest=None):
+    """_cached_extraction for coroutines; `source` is a path or bytes and `extract(source, get_model)` a coroutine function."""
+    if not digest:
+        digest = await asyncio.to_thread(_hash_source, source)
+    cached = await sync_to_async(extraction_cache.get)(kind, digest, prompt_version, model_registry.cached_model_name())
+    if cached is not None:
+        return cached
+    resolved = []
+
+    async def get_model():
+        if not resolved:
+            resolved.append(await asyncio.to_thread(_resolve_model))
+        return resolved[0][0]
+
+    data = await extract(source, get_model)
+    if data and resolved:
+        await sync_to_async(extraction_cache.put)(kind, digest, prompt_version, resolved[0][1], data)
+    return data
+
+def _hash_source(source):
+    if isinstance(source, (bytes, bytearray)):
+        return extraction_cache.content_hash(io.BytesIO(source))
+    with open(source, 'rb') as source_f:
+        return extraction_cache.content_hash(source_f)
+
+def _extract_source_texts(sources):
+    """Parse PDF paths or bytes on the PDF process pool; return one text (None on failure) per source."""
+    paths, spilled = [], []
+    try:
+        for source in sources:
+            if isinstance(source, (bytes, bytearray)):
+                # The pool parses files, so bytes are written to a temporary one first
+                with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as source_f:
+                    source_f.write(source)
+                spilled.append(source_f.name)
+                source = source_f.name
+            paths.append(source)
+        return pdf_text.extract_texts(paths, max_chars=settings.PROMPT_SOURCE_MAX_CHARS, page_prefix=PAGE_BREAK)
+    finally:
+        for path in spilled:
+            os.remove(path)
+
+async def _extract_source_texts_async(sources):
+    """_extract_source_texts without blocking the event loop: the wait for the pool runs on the loop's executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(_extract_source_texts, list(sources)))
+
+@metrics.timed('cv_extraction_seconds')
+def extract_cv_data(cv_file):
+    """Extract name, email, skills, experience, education, certifications, and summary from a CV PDF.
+
+    QuotaExceededError propagates so the caller can requeue the CV instead of failing it.
+    """
+    try:
+        return _cached_extraction(ExtractionCacheEntry.KIND_CV, CV_PROMPT_VERSION, cv_file, _extract_cv_data)
+    except QuotaExceededError:
         raise
     except Exception as e:
-        logger.error(f"API call failed: {str(e)}")
+        logger.error(f"Error extracting CV data: {str(e)}")
+        return {}
+
+CV_INSTRUCTIONS = (
+    "Name, Email, Skills, Experience, Education, Certifications, and a Summary. "
+    "The Summary must be a single string combining all key skills, experience, education, and certifications (e.g., 'Skills: Python, Cybersecurity; Experience: 3 years; Education: Bachelor\\'s in IT; Certifications: CEH'). "
+    "Include all cybersecurity-related skills (e.g., penetration testing, SIEM, firewalls, ethical hacking) and certifications (e.g., CEH, CISSP) explicitly in both Skills and Summary. "
+    "If no email is found, return an empty string for Email. "
+    "Ensure the Summary is a string, not a nested object. "
+)
+CV_EXAMPLE = (
+    "{\"name\": \"John Doe\", \"email\": \"user@example.com\", \"skills\": [\"Python\", \"Cybersecurity\", \"Penetration Testing\"], \"experience\": [\"3 years as a developer\"], \"education\": [\"Bachelor\\'s in CS\"], \"certifications\": [\"CEH\"], \"summary\": \"Skills: Python, Cybersecurity, Penetration Testing; Experience: 3 years; Education: Bachelor\\'s in CS; Certifications: CEH\"}"
+)
+
+def _find_email(text):
+    # Relaxed email regex to capture more formats
+    email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', text, re.IGNORECASE)
+    candidate_email = email_match.group(0) if email_match else None
+    if not candidate_email:
+        logger.warning("No email address found in CV text.")
+    return candidate_email
+
+def _validate_cv_data(data, candidate_email):
+    """Apply the CV field fallbacks and checks; return the cleaned dict or {} if it is unusable."""
+    if not isinstance(data, dict):
+        logger.error(f"CV data is not a JSON object: {str(data)[:200]}")
+        return {}
+    if not data.get('email') and candidate_email:
+        data['email'] = candidate_email
+    if not data.get('email'):
+        logger.warning("No email extracted from CV or API response")
+        return {}
+    if 'summary' in data and not isinstance(data['summary'], str):
+        logger.warning(f"CV summary is not a string: {data['summary']}. Converting to string.")
+        data['summary'] = str(data['summary'])
+    if not data.get('name'):
+        logger.warning("No name extracted from CV")
+        return {}
+    return data
+
+def _cv_prompt(text):
+    return (
+        "Extract the following from this CV in a structured format: "
+        + CV_INSTRUCTIONS +
+        "Return as a valid JSON object without markdown wrappers. Use double quotes for all string values and properly escape single quotes (e.g., Bachelor\\'s). "
+        "Example: "
+        + CV_EXAMPLE + " "
+        f"CV: {text}"
+    )
+
+def _cv_response_data(result, candidate_email):
+    data = parse_json_response(result)
+    if data is None:
+        logger.error("Failed to parse CV JSON response")
+        return {}
+    logger.debug(f"Extracted CV data: {data}")
+    return _validate_cv_data(data, candidate_email)
+
+def _plan_cv_extraction(text):
+    """Return (data, None) for a CV that needs no Gemini call (no text, or extracted locally), else (None, (prompt text, email))."""
+    if not text or not text.strip():
+        logger.warning("No text extracted from CV. Possible scanned PDF or empty content.")
+        return {}, None
+    split = split_cv_text(text)
+    local = local_extraction.try_extract(text, split[0])
+    if local is not None:
+        return local, None
+    # Look for the email in the full text: packing may leave out the line it was on
+    return None, (prepare_cv_text(text, split=split), _find_email(text))
+
+def _extract_cv_text(text, candidate_email, model):
+    """Extract structured CV data from prepared (budget-packed) CV text with a single Gemini request."""
+    try:
+        result = _response_text(make_api_call(model, _cv_prompt(text), CV_RESPONSE_SCHEMA), 'CV')
+    except QuotaExceededError:
+        # Let the caller requeue the CV rather than fail it
         raise
+    except Exception as e:
+        logger.error(f"Gemini API error in CV extraction: {str(e)}")
+        return {}
+    return _cv_response_data(result, candidate_email)
 
-def extract_cv_data(cv_file):
-    """Extract name, email, skills, experience, education, certifications, and summary from a CV PDF."""
+async def _extract_cv_text_async(text, candidate_email, model):
     try:
-        pdf_reader = PyPDF2.PdfReader(cv_file)
-        text = ""
-        for page in pdf_reader.pages:
-            extracted = page.extract_text() or ""
-            text += extracted + "\n"
+        result = _response_text(await make_api_call_async(model, _cv_prompt(text), CV_RESPONSE_SCHEMA), 'CV')
+    except QuotaExceededError:
+        raise
+    except Exception as e:
+        logger.error(f"Gemini API error in CV extraction: {str(e)}")
+        return {}
+    return _cv_response_data(result, candidate_email)
+
+def _extract_cv_data(cv_file, get_model):
+    """Parse a CV PDF and extract its structured data, resolving a model only if the local extractor cannot."""
+    try:
+        text = pdf_text.extract_text(cv_file, **source_limits())
         logger.debug(f"Extracted CV text (first 50 chars, len={len(text)}): {text[:50]}...")
-        
-        if not text.strip():
-            logger.warning("No text extracted from CV. Possible scanned PDF or empty content.")
-            return {}
-        
-        # Relaxed email regex to capture more formats
-        email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', text, re.IGNORECASE)
-        candidate_email = email_match.group(0) if email_match else None
-        if not candidate_email:
-            logger.warning("No email address found in CV text.")
-        
-        if not validate_api_key():
-            logger.error("API key validation failed")
-            return {}
-        
-        model_name = get_available_model()
-        if not model_name:
-            logger.error("No available model found")
-            return {}
-        
-        model = GenerativeModel(model_name)
-        prompt = (
-            "Extract the following from this CV in a structured format: "
-            "Name, Email, Skills, Experience, Education, Certifications, and a Summary. "
-            "The Summary must be a single string combining all key skills, experience, education, and certifications (e.g., 'Skills: Python, Cybersecurity; Experience: 3 years; Education: Bachelor\\'s in IT; Certifications: CEH'). "
-            "Include all cybersecurity-related skills (e.g., penetration testing, SIEM, firewalls, ethical hacking) and certifications (e.g., CEH, CISSP) explicitly in both Skills and Summary. "
-            "If no email is found, return an empty string for Email. "
-            "Ensure the Summary is a string, not a nested object. "
-            "Return as a valid JSON object without markdown wrappers. Use double quotes for all string values and properly escape single quotes (e.g., Bachelor\\'s). "
-            "Example: "
-            "{\"name\": \"John Doe\", \"email\": \"user@example.com\", \"skills\": [\"Python\", \"Cybersecurity\", \"Penetration Testing\"], \"experience\": [\"3 years as a developer\"], \"education\": [\"Bachelor\\'s in CS\"], \"certifications\": [\"CEH\"], \"summary\": \"Skills: Python, Cybersecurity, Penetration Testing; Experience: 3 years; Education: Bachelor\\'s in CS; Certifications: CEH\"} "
-            f"CV: {text[:4000]}"
-        )
-        try:
-            response = make_api_call(model, prompt)
-            result = response.text.strip() if response.text else ''
-            logger.debug(f"Raw CV API response: {result[:200]}...")
-        except QuotaExceededError as e:
-            logger.error(f"Failed to process CV due to API quota limit: {str(e)}")
-            return {}
-        except Exception as e:
-            logger.error(f"Gemini API error in CV extraction: {str(e)}")
-            return {}
-        
-        try:
-            cleaned_result = clean_json_response(result)
-            if cleaned_result is None:
-                logger.error("Failed to clean JSON response")
-                return {}
-            try:
-                data = json.loads(cleaned_result)
-                logger.debug(f"Extracted CV data: {data}")
-            except json.JSONDecodeError as e:
-                logger.error(f"Cleaned JSON is invalid: {str(e)}. Cleaned response: {cleaned_result[:200]}...")
-                logger.debug(f"Full raw CV response: {result[:200]}...")
-                return {}
-            if not data.get('email') and candidate_email:
-                data['email'] = candidate_email
-            if not data.get('email'):
-                logger.warning("No email extracted from CV or API response")
-                return {}
-            if 'summary' in data and not isinstance(data['summary'], str):
-                logger.warning(f"CV summary is not a string: {data['summary']}. Converting to string.")
-                data['summary'] = str(data['summary'])
-            if not data.get('name'):
-                logger.warning("No name extracted from CV")
-                return {}
+        data, request = _plan_cv_extraction(text)
+        if request is None:
             return data
-        except Exception as e:
-            logger.error(f"Error processing cleaned JSON: {str(e)}")
-            return {}
+        model = get_model()
+        return _extract_cv_text(*request, model) if model is not None else {}
+    except QuotaExceededError:
+        raise
     except Exception as e:
         logger.error(f"Error extracting CV data: {str(e)}")
         return {}
 
+async def _extract_cv_data_async(source, get_model, text=None):
+    try:
+        if text is None:
+            text, = await _extract_source_texts_async([source])
+        data, request = _plan_cv_extraction(text)
+        if request is None:
+            return data
+        model = await get_model()
+        return await _extract_cv_text_async(*request, model) if model is not None else {}
+    except QuotaExceededError:
+        raise
+    except Exception as e:
+        logger.error(f"Error extracting CV data: {str(e)}")
+        return {}
+
+@metrics.timed('cv_extraction_seconds')
+async def extract_cv_data_async(cv_source, digest=None, text=None):
+    """extract_cv_data for coroutines. `cv_source` is a path or bytes; `digest` and `text` skip re-hashing and re-parsing it."""
+    try:
+        return await _cached_extraction_async(
+            ExtractionCacheEntry.KIND_CV, CV_PROMPT_VERSION, cv_source,
+            lambda source, get_model: _extract_cv_data_async(source, get_model, text=text), digest=digest,
+        )
+    except QuotaExceededError:
+        raise
+    except Exception as e:
+        logger.error(f"Error extracting CV data: {str(e)}")
+        return {}
+
+async def extract_cvs_async(entries, concurrency=None, fingerprints=None):
+    """Extract many CVs concurrently on the async Gemini client.
+
+    `entries` are (cv_source, digest, text) tuples as taken by extract_cv_data_async; at most
+    `concurrency` (default GEMINI_MAX_CONCURRENCY) extractions run at once. Returns one dict per
+    entry in input order, with None for a CV deferred because Gemini quota ran out. CVs without
+    text are parsed together in one call to the PDF process pool, then all are checked for
+    near-duplicates first, as in extract_cvs_concurrently.
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.GEMINI_MAX_CONCURRENCY)
+    unparsed = [position for position, (_, _, text) in enumerate(entries) if text is None]
+    if unparsed:
+        parsed = await _extract_source_texts_async(entries[position][0] for position in unparsed)
+        entries = list(entries)
+        for position, text in zip(unparsed, parsed):
+            cv_source, digest, _ = entries[position]
+            # A CV that failed to parse is not parsed again; its empty text is extracted as {}
+            entries[position] = (cv_source, digest, text or '')
+    with_text = [position for position, (_, _, text) in enumerate(entries) if text]
+    reused, copies = await sync_to_async(_find_near_duplicates)(with_text, [entries[position][2] for position in with_text], fingerprints)
+
+    async def bounded(cv_source, digest, text):
+        async with semaphore:
+            try:
+                return await extract_cv_data_async(cv_source, digest=digest, text=text)
+            except QuotaExceededError as e:
+                logger.warning(f"Deferring CV: {str(e)}")
+                return None
+
+    extract = [position for position in range(len(entries)) if position not in reused and position not in copies]
+    results = dict(reused)
+    results.update(zip(extract, await asyncio.gather(*(bounded(*entries[position]) for position in extract))))
+    results = [results.get(position) for position in range(len(entries))]
+    _copy_near_duplicates(results, copies)
+    return results
+
+def _parse_cv_batch_result(result, count):
+    """Split a JSON-array batch response into `count` per-CV dicts, using None for entries that cannot be used."""
+    entries = [None] * count
+    parsed = parse_json_response(result, expected_type=list)
+    if parsed is None:
+        logger.warning("Batch CV response could not be parsed; falling back to single-CV requests")
+        return entries
+    for position, item in enumerate(parsed):
+        if not isinstance(item, dict):
+            continue
+        index = item.pop('index', position + 1)
+        if isinstance(index, int) and 1 <= index <= count and entries[index - 1] is None:
+            entries[index - 1] = item
+    return entries
+
+def _extract_cv_texts_batch(entries, model):
+    """Extract several CVs with one Gemini request; `entries` are (prepared text, candidate_email) pairs.
+
+    Returns one dict per entry, or None for a CV deferred because Gemini quota ran out. If the batch
+    request itself exhausts the quota, QuotaExceededError propagates and the whole chunk is deferred.
+    """
+    cv_blocks = ''.join(
+        f"CV {number}:\n{text}\n\n" for number, (text, _) in enumerate(entries, 1)
+    )
+    prompt = (
+        f"Extract the following from each of the {len(entries)} CVs below in a structured format: "
+        + CV_INSTRUCTIONS +
+        "Return a valid JSON array without markdown wrappers containing exactly one object per CV, in the same order, "
+        "each with an integer \"index\" field set to the CV number. Use double quotes for all string values. "
+        "Example element: "
+        + CV_EXAMPLE[:-1] + ", \"index\": 1} "
+        + cv_blocks
+    )
+    metrics.increment('cv_batch_requests')
+    metrics.increment('cv_batch_entries', len(entries))
+    try:
+        response = make_api_call(model, prompt, CV_BATCH_RESPONSE_SCHEMA)
+        result = response.text.strip() if response.text else ''
+        logger.debug(f"Raw batch CV API response: {result[:200]}...")
+    except QuotaExceededError:
+        raise
+    except Exception as e:
+        logger.error(f"Gemini API error in batch CV extraction: {str(e)}")
+        result = ''
+    results = []
+    for (text, candidate_email), data in zip(entries, _parse_cv_batch_result(result, len(entries))):
+        data = _validate_cv_data(data, candidate_email) if data is not None else {}
+        if not data:
+            # Retry this CV on its own rather than dropping it
+            metrics.increment('cv_batch_fallbacks')
+            try:
+                data = _extract_cv_text(text, candidate_email, model)
+            except QuotaExceededError:
+                data = None
+        results.append(data)
+    return results
+
+def _resolve_model():
+    """Return the shared model and its short name, or (None, None) if no model is available."""
+    model = model_registry.get_model()
+    if model is None:
+        logger.error("No available model found")
+        return None, None
+    return model, model.model_name.split('/')[-1]
+
+@metrics.timed('cv_chunk_extraction_seconds')
+def _extract_pending_chunk(chunk, model):
+    """Extract one chunk of (position, digest, text, email) entries, batching when it holds several CVs."""
+    if len(chunk) == 1:
+        _, _, text, candidate_email = chunk[0]
+        return [_extract_cv_text(text, candidate_email, model)]
+    return _extract_cv_texts_batch([(text, email) for _, _, text, email in chunk], model)
+
+def _extract_pending(pending, results, model, model_name, batch_size, max_workers):
+    """Run LLM extraction for parsed, uncached CVs and store successes in the extraction cache."""
+    batch_size = max(1, batch_size)
+    chunks = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+    outcomes = map_bounded(lambda chunk: _extract_pending_chunk(chunk, model), chunks, max_workers)
+    for chunk, (extracted, error) in zip(chunks, outcomes):
+        if isinstance(error, QuotaExceededError):
+            logger.warning(f"Deferring {len(chunk)} CV(s): {str(error)}")
+            extracted = [None for _ in chunk]
+        elif error is not None:
+            logger.error(f"Error extracting CV batch: {str(error)}")
+            extracted = [{} for _ in chunk]
+        for (position, digest, _, _), data in zip(chunk, extracted):
+            results[position] = data
+            if data:
+                extraction_cache.put(ExtractionCacheEntry.KIND_CV, digest, CV_PROMPT_VERSION, model_name, data)
+
+def _add_pending(pending, results, position, digest, text):
+    """Queue a parsed CV for Gemini, unless it has no text or the local extractor handles it confidently."""
+    data, request = _plan_cv_extraction(text)
+    if request is None:
+        results[position] = data
+    else:
+        pending.append((position, digest, *request))
+
+@metrics.timed('cv_batch_extraction_seconds')
+def extract_cvs_concurrently(cv_paths, max_workers=None, digests=None, texts=None, progress=None, fingerprints=None):
+    """Extract CV data for many files, returning one dict per path in input order.
+
+    Uncached PDFs are parsed on a process pool; CVs the local extractor cannot handle confidently
+    are then sent to Gemini in CV_EXTRACTION_BATCH_SIZE chunks from a bounded thread pool. None marks a CV deferred
+    because Gemini quota ran out. Optional `digests` and `texts` (one per path, falsy when unknown)
+    are content hashes and text already computed when the file was uploaded, so those files are not read again.
+    `progress(stage, positions)`, if given, is called once parsing and once extraction have finished.
+    Near-duplicates of stored candidates or of other CVs in the call reuse that CV data instead of
+    being extracted; `fingerprints`, if given, is filled with each parsed CV's text fingerprint.
+    """
+    results = [{} for _ in cv_paths]
+    digests = digests or [None] * len(cv_paths)
+    texts = texts or [None] * len(cv_paths)
+    try:
+        cached_model_name = model_registry.cached_model_name()
+        misses = []
+        for position, cv_path in enumerate(cv_paths):
+            try:
+                digest = digests[position]
+                if not digest:
+                    with open(cv_path, 'rb') as cv_f:
+                        digest = extraction_cache.content_hash(cv_f)
+                cached = extraction_cache.get(ExtractionCacheEntry.KIND_CV, digest, CV_PROMPT_VERSION, cached_model_name)
+                if cached is not None:
+                    results[position] = cached
+                else:
+                    misses.append((position, digest, cv_path))
+            except Exception as e:
+                logger.error(f"Error extracting CV data from {cv_path}: {str(e)}")
+        if not misses:
+            return results
+        unparsed = [cv_path for position, _, cv_path in misses if not texts[position]]
+        metrics.increment('pdf_parse_skipped', len(misses) - len(unparsed))
+        parsed = iter(pdf_text.extract_texts(unparsed, max_chars=settings.PROMPT_SOURCE_MAX_CHARS, page_prefix=PAGE_BREAK))
+        miss_texts = [texts[position] or next(parsed) for position, _, _ in misses]
+        reused, copies = _find_near_duplicates([position for position, _, _ in misses], miss_texts, fingerprints)
+        pending = []
+        parsed_positions = []
+        for (position, digest, _), text in zip(misses, miss_texts):
+            if text:
+                parsed_positions.append(position)
+            if position in reused:
+                results[position] = reused[position]
+            elif position not in copies:
+                _add_pending(pending, results, position, digest, text)
+        _report_progress(progress, 'parsed', parsed_positions)
+        # A model is only resolved for the CVs the local extractor left to Gemini; without one they stay empty
+        model, model_name = _resolve_model() if pending else (None, None)
+        if model is not None:
+            _extract_pending(pending, results, model, model_name, settings.CV_EXTRACTION_BATCH_SIZE, max_workers)
+        _copy_near_duplicates(results, copies)
+        _report_progress(progress, 'extracted', [position for position, data in enumerate(results) if data])
+    except Exception as e:
+        logger.error(f"Error extracting CV data: {str(e)}")
+    return results
+
+def _find_near_duplicates(positions, texts, fingerprints=None):
+    """Fingerprint parsed CV texts and match them with near_duplicates; return ({position: cv_data}, {position: source position})."""
+    try:
+        entries = []
+        for position, text in zip(positions, texts):
+            digest = near_duplicates.fingerprint(text) if text else None
+            if fingerprints is not None:
+                fingerprints[position] = digest
+            entries.append((digest, _find_email(text) if digest is not None else None))
+        reused, copies = near_duplicates.find_near_duplicates(entries)
+    except Exception as e:
+        logger.error(f"Near-duplicate lookup failed: {str(e)}")
+        return {}, {}
+    return {positions[index]: data for index, data in reused.items()}, {positions[index]: positions[source] for index, source in copies.items()}
+
+def _copy_near_duplicates(results, copies):
+    for position, source in sorted(copies.items()):
+        # An empty or None result is shared as is, keeping a LocalExtraction's failure reason
+        results[position] = dict(results[source]) if results[source] else results[source]
+
+def _report_progress(progress, stage, positions):
+    if progress is None or not positions:
+        return
+    try:
+        progress(stage, positions)
+    except Exception as e:
+        logger.warning(f"Could not record CV {stage} progress: {str(e)}")
+
+@metrics.timed('jd_summary_seconds')
 def summarize_jd(jd_file):
     """Summarize a job description PDF into key requirements and a job title."""
     try:
-        pdf_reader = PyPDF2.PdfReader(jd_file)
-        text = ""
-        for page in pdf_reader.pages:
-            extracted = page.extract_text() or ""
-            text += ' ' + extracted + '\n'
+        return _cached_extraction(ExtractionCacheEntry.KIND_JD, JD_PROMPT_VERSION, jd_file, _summarize_jd)
+    except QuotaExceededError:
+        # The screening worker requeues the batch
+        raise
+    except Exception as e:
+        logger.error(f"Error summarizing JD: {str(e)}")
+        return {}
+
+def _jd_prompt(text):
+    return (
+        "Summarize this job description into a concise string of key requirements and extract the job title. "
+        "Include all skills (e.g., SIEM, firewalls, intrusion detection, ethical hacking), qualifications, certifications (e.g., CEH, CISSP), and responsibilities explicitly in the summary. "
+        "Ensure the Summary is a single string, not a nested object. "
+        "Return as a valid JSON object without markdown wrappers. Use double quotes for all string values and properly escape single quotes (e.g., Bachelor\\'s). "
+        "Example: "
+        "{\"job_title\": \"Cybersecurity Analyst\", \"summary\": \"Skills: SIEM, firewalls, intrusion detection, network security; Experience: Monitor networks, analyze incidents; Qualifications: Bachelor\\'s in Cybersecurity; Certifications: CEH, CISSP\"} "
+        f"Job description: {prepare_jd_text(text)}"
+    )
+
+def _jd_response_data(result):
+    data = parse_json_response(result)
+    if data is None:
+        logger.error(f"Failed to parse JD JSON response. Raw response: {result[:200]}...")
+        return {}
+    logger.debug(f"Extracted JD data: {data}")
+    if 'summary' in data and not isinstance(data['summary'], str):
+        logger.warning(f"JD summary is not a string: {data['summary']}. Converting to string.")
+        data['summary'] = str(data['summary'])
+    return data
+
+def _summarize_jd(jd_file, get_model):
+    """Parse a JD PDF and summarize it with the model returned by `get_model()`."""
+    try:
+        text = pdf_text.extract_text(jd_file, **source_limits())
         logger.debug(f"Extracted JD text (first 50 chars, len={len(text)}): {text[:50]}...")
         
         if not text.strip():
             logger.debug("No text extracted from JD")
             return {}
-        
-        if not validate_api_key():
-            logger.error("API key validation failed")
-            return {}
-        
-        model_name = get_available_model()
-        if not model_name:
-            logger.error(f"No available model found")
+        model = get_model()
+        if model is None:
             return {}
         
-        model = GenerativeModel(model_name)
-        prompt = (
-            "Summarize this job description into a concise string of key requirements and extract the job title. "
-            "Include all skills (e.g., SIEM, firewalls, intrusion detection, ethical hacking), qualifications, certifications (e.g., CEH, CISSP), and responsibilities explicitly in the summary. "
-            "Ensure the Summary is a single string, not a nested object. "
-            "Return as a valid JSON object without markdown wrappers. Use double quotes for all string values and properly escape single quotes (e.g., Bachelor\\'s). "
-            "Example: "
-            "{\"job_title\": \"Cybersecurity Analyst\", \"summary\": \"Skills: SIEM, firewalls, intrusion detection, network security; Experience: Monitor networks, analyze incidents; Qualifications: Bachelor\\'s in Cybersecurity; Certifications: CEH, CISSP\"} "
-            f"Job description: {text[:4000]}"
-        )
         try:
-            response = make_api_call(model, prompt)
-            result = response.text.strip() if response.text else None
-            logger.debug(f"Raw JD API response: {result[:100]}...")
+            result = _response_text(make_api_call(model, _jd_prompt(text), JD_RESPONSE_SCHEMA), 'JD')
+        except QuotaExceededError:
+            raise
         except Exception as e:
             logger.error(f"Gemini API error in JD summarization: {str(e)}")
             return {}
-        
+        return _jd_response_data(result)
+    except QuotaExceededError:
+        raise
+    except Exception as e:
+        logger.error(f"Error summarizing JD: {str(e)}")
+        return {}
+
+@metrics.timed('jd_summary_seconds')
+async def summarize_jd_async(jd_source):
+    """summarize_jd for coroutines; `jd_source` is a path or bytes. QuotaExceededError propagates as in summarize_jd."""
+    try:
+        return await _cached_extraction_async(ExtractionCacheEntry.KIND_JD, JD_PROMPT_VERSION, jd_source, _summarize_jd_async)
+    except QuotaExceededError:
+        raise
+    except Exception as e:
+        logger.error(f"Error summarizing JD: {str(e)}")
+        return {}
+
+async def _summarize_jd_async(jd_source, get_model):
+    try:
+        text, = await _extract_source_texts_async([jd_source])
+        if not text or not text.strip():
+            logger.debug("No text extracted from JD")
+            return {}
+        model = await get_model()
+        if model is None:
+            return {}
         try:
-            cleaned_result = clean_json_response(result)
-            if cleaned_result is None:
-                logger.error("Failed to clean JD JSON response. Raw response: {result[:200]}...")
-                return {}
-            try:
-                data = json.loads(cleaned_result)
-                logger.debug(f"Extracted JD data: {data}")
-            except json.JSONDecodeError as e:
-                logger.error(f"Cleaned JSON is invalid: {cleaned_result}")
-                logger.debug(f"Full raw JD response: {result}")
-                return {}
-            if 'summary' in data and not isinstance(data['summary'], str):
-                logger.warning(f"JD summary is not a string: {data['summary']}. Converting to string.")
-                data['summary'] = str(data['summary'])
-            return data
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON JD response: {str(e)}. Raw response: {result}")
+            result = _response_text(await make_api_call_async(model, _jd_prompt(text), JD_RESPONSE_SCHEMA), 'JD')
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            logger.error(f"Gemini API error in JD summarization: {str(e)}")
             return {}
+        return _jd_response_data(result)
+    except QuotaExceededError:
+        raise
     except Exception as e:
         logger.error(f"Error summarizing JD: {str(e)}")
         return {}
 
+@metrics.timed('scoring_seconds')
 def calculate_match_score(cv_data, jd_data):
     """Calculate a match score between CV data and JD summary, scoring only the degree mentioned in JD."""
     try:
         if not isinstance(cv_data, dict) or not isinstance(jd_data, dict):
             logger.error("CV data or JD data is not a dictionary")
             return 0.0
-        
-        logger.debug(f"Raw CV data: {cv_data}")
-        logger.debug(f"Raw JD data: {jd_data}")
-        
-        # Initialize score and max possible score
-        score = 0.0
-        max_score = 0.0
-        
-        # Parse JD summary to identify mandatory and optional requirements
-        jd_summary = jd_data.get('summary', '').lower()
-        mandatory_skills = [s for s in JD_SKILLS if s in jd_summary and 'required' in jd_summary]
-        optional_skills = [s for s in RELATED_SKILLS if s in jd_summary]
-        
-        # Extract required degree from JD summary
-        degree_match = re.search(r"(?:bachelor\'s|master\'s|b\.s\.|m\.s\.)\s*(?:in)?\s*([\w\s]+)", jd_summary)
-        required_degree = degree_match.group(1).strip().lower() if degree_match else None
-        logger.debug(f"Required degree from JD: {required_degree}")
-        
-        # Points for mandatory skills (25 each)
-        cv_skills = [s.lower() for s in cv_data.get('skills', [])]
-        for skill in mandatory_skills:
-            max_score += 25.0
-            if any(skill in cv_skill for cv_skill in cv_skills):
-                score += 25.0
-                logger.debug(f"Matched mandatory skill: {skill}, +25 points")
-        
-        # Points for optional skills (7 each)
-        for skill in optional_skills:
-            max_score += 7.0
-            if any(skill in cv_skill for cv_skill in cv_skills):
-                score += 7.0
-                logger.debug(f"Matched optional skill: {skill}, +7 points")
-        
-        # Points for experience (10 if matches JD years, 5 for roles)
-        cv_experience = [e.lower() for e in cv_data.get('experience', [])]
-        years_required = re.search(r'(\d+)\s*(?:year|years)', jd_summary)
-        years_required = int(years_required.group(1)) if years_required else 0
-        if years_required:
-            max_score += 10.0
-            for exp in cv_experience:
-                years_match = re.search(r'(\d+)\s*(?:year|years)', exp)
-                if years_match and int(years_match.group(1)) >= years_required:
-                    score += 10.0
-                    logger.debug(f"Matched experience years: {years_match.group(0)}, +10 points")
-                    break
-                if any(role in exp for role in CYBERSECURITY_ROLES):
-                    score += 5.0
-                    logger.debug(f"Matched cybersecurity role: {exp}, +5 points")
-        
-        # Points for education (10 if matches JD degree, 0 otherwise)
-        if required_degree:
-            max_score += 10.0
-            cv_education = [e.lower() for e in cv_data.get('education', [])]
-            for edu in cv_education:
-                if required_degree in edu:
-                    score += 10.0
-                    logger.debug(f"Matched required degree: {edu}, +10 points")
-                    break
-        
-        # Bonus for exceeding skill requirements
-        if len(cv_skills) > len(mandatory_skills) + len(optional_skills):
-            bonus = 10.0
-            score += bonus
-            max_score += bonus
-            logger.debug(f"Bonus for extra skills: +{bonus} points")
-        
-        # Normalize score
-        if max_score > 0:
-            final_score = (score / max_score) * 100
-        else:
-            final_score = 0.0
-            logger.warning("Max score is 0, no JD requirements identified")
-        
-        logger.debug(f"Final score: {final_score} (earned {score}/{max_score})")
-        return round(final_score, 2)
+        return score_candidate(cv_data, JDRequirements.from_jd(jd_data))
     except Exception as e:
         logger.error(f"Error calculating match score: {str(e)}")
         return 0.0
-
-
-def send_custom_email(candidate_email, candidate_name, subject, message):
-    try:
-        full_message = render_to_string('emails/custom_email.txt', {
-            'candidate_name': candidate_name,
-            'message': message,
-        })
-        logger.debug(f"Rendered email content for {candidate_email}: {full_message[:100]}...")
-        result = send_mail(
-            subject=subject,
-            message=full_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[candidate_email],
-            fail_silently=False,
-        )
-        if result == 1:
-            logger.info(f"Custom email successfully sent to {candidate_email}")
-            return True
-        else:
-            logger.error(f"Failed to send custom email to {candidate_email}: No emails sent")
-            return False
-    except Exception as e:
-        logger.error(f"Failed to send custom email to {candidate_email}: {str(e)}")
-        raise
\ No newline at end of file
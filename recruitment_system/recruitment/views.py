@@ -1,19 +1,31 @@
 
+import hmac
 import logging
-import os
-from django.shortcuts import render, redirect
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.forms import UserCreationForm
-from django.contrib.auth.views import LoginView
-from django.http import HttpResponseRedirect, HttpResponse
+from django.contrib.auth.views import LoginView, redirect_to_login
+from django.http import HttpResponseRedirect, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
+from django.utils.http import content_disposition_header
 from django.conf import settings
-from django.core.files.storage import FileSystemStorage
-from .forms import UploadFileForm
-from .utils import extract_cv_data, summarize_jd, calculate_match_score, send_custom_email
-from .models import Candidate
+from django.db.models import F
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from .forms import UploadFileForm, RescoreForm, ShortlistFilterForm, EmailCampaignForm
+from .models import EmailCampaign, ScreeningBatch
+from .screening import create_batch, batch_progress
+from .async_screening import screen_batch_async
+from .rescoring import rescore_candidates
+from .shortlist import DEFAULT_MIN_SCORE, SORT_CHOICES, SORT_SCORE_DESC, batch_applications, shortlist_page, shortlist_rows
+from .downloads import file_response, resolve_cv_path, stream_zip
+from .mailing import campaign_progress, create_campaign
+from .progress_stream import BatchEventStream, event_stream_response
+from .uploads import CVSpoolUploadHandler
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -46,7 +58,23 @@ def user_logout(request):
     return redirect('recruitment:login')
 
 @login_required
+@csrf_exempt
 def upload(request):
+    # The upload handlers must be replaced before anything reads request.POST, including the CSRF check
+    if request.method == 'POST':
+        request.upload_handlers = [CVSpoolUploadHandler(request)]
+    return _upload(request)
+
+@csrf_protect
+def _upload(request):
+    batch, response = _accept_upload(request)
+    if batch is None:
+        return response
+    messages.success(request, f'Queued {batch.cv_count} CV(s) for screening.')
+    return HttpResponseRedirect(reverse('recruitment:batch_status', args=[batch.pk]))
+
+def _accept_upload(request, claimed=False):
+    """Validate the upload form and create its batch; return (batch, None), or (None, the response to send instead)."""
     if request.method == 'POST':
         form = UploadFileForm(request.POST, request.FILES)
         if form.is_valid():
@@ -56,145 +84,210 @@ def upload(request):
             
             if len(cv_files) > 80:
                 messages.error(request, 'You can upload up to 80 CVs at a time.')
-                return render(request, 'recruitment/upload.html', {'form': form})
-            
-            jd_result = summarize_jd(jd_file)
-            if not jd_result or 'summary' not in jd_result or not jd_result.get('summary'):
-                logger.warning("Empty JD summary")
-                messages.error(request, 'Failed to process job description.')
-                return render(request, 'recruitment/upload.html', {'form': form})
-            
-            candidates = []
-            failed_cvs = []
-            fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'cvs'))
-            for cv_file in cv_files:
-                try:
-                    # Save CV file
-                    cv_filename = fs.save(cv_file.name, cv_file)
-                    cv_path = os.path.join(settings.MEDIA_ROOT, 'cvs', cv_filename)
-                    
-                    with open(cv_path, 'rb') as cv_f:
-                        cv_data = extract_cv_data(cv_f)
-                    if not cv_data or not cv_data.get('email') or not cv_data.get('name'):
-                        logger.warning(f"No valid data extracted from CV: {cv_file.name}")
-                        failed_cvs.append(cv_file.name)
-                        fs.delete(cv_filename)
-                        continue
-                    
-                    match_score = calculate_match_score(cv_data, jd_result)
-                    email = cv_data.get('email')
-                    name = cv_data.get('name', 'Unknown')
-                    
-                    # Check for existing candidate
-                    candidate, created = Candidate.objects.get_or_create(
-                        email=email,
-                        defaults={
-                            'name': name,
-                            'match_score': match_score,
-                            'cv_data': cv_data,
-                            'job_title': jd_result.get('job_title', 'Unknown'),
-                            'cv_file': f'cvs/{cv_filename}'
-                        }
-                    )
-                    if not created:
-                        # Update existing candidate
-                        candidate.name = name
-                        candidate.match_score = match_score
-                        candidate.cv_data = cv_data
-                        candidate.job_title = jd_result.get('job_title', 'Unknown')
-                        candidate.cv_file = f'cvs/{cv_filename}'
-                        candidate.save()
-                        logger.info(f"Updated existing candidate: {email}")
-                    else:
-                        logger.info(f"Created new candidate: {email}")
-                    
-                    candidates.append({
-                        'name': candidate.name,
-                        'email': candidate.email,
-                        'match_score': candidate.match_score,
-                        'cv_data': candidate.cv_data,
-                        'cv_file': candidate.cv_file
-                    })
-                except Exception as e:
-                    logger.error(f"Error processing CV {cv_file.name}: {str(e)}")
-                    failed_cvs.append(cv_file.name)
-                    fs.delete(cv_filename) if os.path.exists(cv_path) else None
-            
-            if failed_cvs:
-                messages.warning(request, f"Failed to process {len(failed_cvs)} CV(s): {', '.join(failed_cvs)}. Check logs for details.")
-            if not candidates:
-                messages.error(request, 'No valid CVs processed. All CVs failed due to missing email, name, or unreadable content.')
-                return render(request, 'recruitment/upload.html', {'form': form})
+                return None, render(request, 'recruitment/upload.html', {'form': form})
             
-            request.session['candidates'] = candidates
-            request.session['job_title'] = jd_result.get('job_title', 'Unknown')
-            return HttpResponseRedirect(reverse('recruitment:shortlisted_candidates'))
+            batch = create_batch(jd_file, cv_files, user=request.user, claimed=claimed)
+            batch.cv_count = len(cv_files)
+            request.session['batch_id'] = batch.pk
+            return batch, None
         else:
             for field, errors in form.errors.items():
                 for error in errors:
                     messages.error(request, f"{field}: {error}")
     else:
         form = UploadFileForm()
-    return render(request, 'recruitment/upload.html', {'form': form})
+    return None, render(request, 'recruitment/upload.html', {'form': form})
+
+def _accept_inline_upload(request):
+    # The sync half of upload_async: login_required and csrf_protect don't wrap async views in Django 4.2
+    if not request.user.is_authenticated:
+        return None, redirect_to_login(request.get_full_path())
+    if request.method == 'POST':
+        request.upload_handlers = [CVSpoolUploadHandler(request)]
+        rejected = CsrfViewMiddleware(lambda req: None).process_view(request, None, (), {})
+        if rejected is not None:
+            return None, rejected
+    return _accept_upload(request, claimed=True)
+
+async def upload_async(request):
+    """Upload a JD and CVs and screen them within the request on the async Gemini client.
+
+    Meant for ASGI servers, where one process holds many of these requests open while they wait on
+    Gemini. The response redirects to the finished batch; CVs deferred by exhausted Gemini quota
+    are left to the screening worker.
+    """
+    batch, response = await sync_to_async(_accept_inline_upload)(request)
+    if batch is None:
+        return response
+    await screen_batch_async(batch)
+    await sync_to_async(messages.success)(request, f'Screened {batch.cv_count} CV(s).')
+    return HttpResponseRedirect(reverse('recruitment:batch_status', args=[batch.pk]))
+
+# Checked in _accept_inline_upload instead, once the upload handlers are replaced
+upload_async.csrf_exempt = True
+
+def _session_batch(request):
+    """Return the user's most recently uploaded batch from the session, if any."""
+    batch_id = request.session.get('batch_id')
+    if not batch_id:
+        return None
+    return ScreeningBatch.objects.filter(pk=batch_id, created_by=request.user).first()
+
+def _batch_candidates(batch):
+    """Return the candidate id, name, email and match score of every candidate screened in a batch."""
+    return list(batch_applications(batch).order_by('candidate__name').values(
+        'candidate_id', 'match_score', name=F('candidate__name'), email=F('candidate__email'),
+    ))
+
+@login_required
+def batch_status(request, batch_id):
+    batch = get_object_or_404(ScreeningBatch, pk=batch_id, created_by=request.user)
+    request.session['batch_id'] = batch.pk
+    return render(request, 'recruitment/batch_status.html', {
+        'batch': batch,
+        'progress': batch_progress(batch),
+    })
+
+@login_required
+def batch_progress_json(request, batch_id):
+    batch = get_object_or_404(ScreeningBatch, pk=batch_id, created_by=request.user)
+    return JsonResponse(batch_progress(batch))
+
+@login_required
+def batch_events(request, batch_id):
+    """Stream per-CV progress and new shortlist rows of a batch as Server-Sent Events."""
+    batch = get_object_or_404(ScreeningBatch, pk=batch_id, created_by=request.user)
+    form = ShortlistFilterForm(request.GET)
+    min_score = form.cleaned_data['min_score'] if form.is_valid() else DEFAULT_MIN_SCORE
+    return event_stream_response(request, BatchEventStream(batch, min_score=min_score))
 
 @login_required
 def shortlisted_candidates(request):
-    candidates = request.session.get('candidates', [])
-    job_title = request.session.get('job_title', 'Unknown')
-    if not candidates:
+    batch = _session_batch(request)
+    # While screening runs the page shows the rows scored so far and streams in the rest
+    if batch is None or (batch.is_finished and not batch_applications(batch).exists()):
         messages.error(request, 'No candidates found. Please upload files first.')
         return redirect('recruitment:upload')
-    
-    # Filter candidates with match_score >= 70
-    shortlisted_candidates = [c for c in candidates if c['match_score'] >= 70]
-    
-    if not shortlisted_candidates:
-        messages.warning(request, 'No candidates met the 70% match score threshold.')
+
+    form = ShortlistFilterForm(request.GET)
+    if form.is_valid():
+        min_score, sort, cursor = form.cleaned_data['min_score'], form.cleaned_data['sort'], form.cleaned_data['after']
+    else:
+        min_score, sort, cursor = DEFAULT_MIN_SCORE, SORT_SCORE_DESC, None
+    page = shortlist_page(batch, min_score=min_score, sort=sort, cursor=cursor)
+
+    if not page['total'] and batch.is_finished:
+        messages.warning(request, f'No candidates met the {min_score:g}% match score threshold.')
         logger.info("No candidates shortlisted")
-    
+
     return render(request, 'recruitment/shortlisted.html', {
-        'candidates': shortlisted_candidates,
+        'candidates': page['candidates'],
+        'total': page['total'],
+        'next_cursor': page['next_cursor'],
+        'is_first_page': not cursor,
+        'min_score': min_score,
+        'sort': sort,
+        'sort_choices': SORT_CHOICES,
+        'job_title': batch.job_title,
+        'batch': batch,
+        'live': not batch.is_finished,
+    })
+
+@login_required
+def rescore(request):
+    candidates = None
+    job_title = ''
+    if request.method == 'POST':
+        form = RescoreForm(request.POST)
+        if form.is_valid():
+            job_title = form.cleaned_data['job_title'] or 'Unknown'
+            min_score = form.cleaned_data['min_score']
+            min_score = 70.0 if min_score is None else min_score
+            candidates = rescore_candidates({'job_title': job_title, 'summary': form.cleaned_data['jd_summary']}, min_score=min_score)
+            logger.info(f"Rescored stored candidates for {job_title}: {len(candidates)} at or above {min_score}")
+            if not candidates:
+                messages.warning(request, f'No stored candidates met the {min_score:g}% match score threshold.')
+        else:
+            for field, errors in form.errors.items():
+                for error in errors:
+                    messages.error(request, f"{field}: {error}")
+    else:
+        form = RescoreForm()
+    return render(request, 'recruitment/rescore.html', {
+        'form': form,
+        'candidates': candidates,
         'job_title': job_title,
     })
 
 @login_required
 def send_candidate_email(request):
+    batch = _session_batch(request)
+    candidates = _batch_candidates(batch) if batch is not None else []
     if request.method == 'POST':
-        candidate_email = request.POST.get('candidate_email')
-        candidate_name = request.POST.get('candidate_name', 'Candidate')
-        subject = request.POST.get('subject')
-        message = request.POST.get('message')
-        
-        logger.debug(f"Sending email to {candidate_email} with subject: {subject}")
-        try:
-            success = send_custom_email(
-                candidate_email=candidate_email,
-                candidate_name=candidate_name,
-                subject=subject,
-                message=message,
+        form = EmailCampaignForm(request.POST, candidates=candidates)
+        if form.is_valid():
+            campaign = create_campaign(
+                user=request.user,
+                subject=form.cleaned_data['subject'],
+                message=form.cleaned_data['message'],
+                recipients=form.cleaned_data['recipients'],
+                batch=batch,
             )
-            if success:
-                messages.success(request, f'Email successfully sent to {candidate_email}')
-            else:
-                messages.error(request, f'Failed to send email to {candidate_email}: No emails sent')
-        except Exception as e:
-            messages.error(request, f'Failed to send email to {candidate_email}: {str(e)}')
-            logger.error(f"View-level error sending email to {candidate_email}: {str(e)}")
-        
-        return redirect('recruitment:shortlisted_candidates')
-    
-    candidates = request.session.get('candidates', [])
-    logger.debug(f"Candidates in session: {candidates}")
-    return render(request, 'recruitment/send_email.html', {'candidates': candidates})
+            messages.success(request, f'Queued {campaign.deliveries.count()} email(s) for sending.')
+            return redirect('recruitment:email_campaign_status', campaign_id=campaign.pk)
+        for field, errors in form.errors.items():
+            for error in errors:
+                messages.error(request, f"{field}: {error}")
+    else:
+        # Shortlisted candidates are selected by default
+        form = EmailCampaignForm(candidates=candidates, initial={
+            'recipients': [str(candidate['candidate_id']) for candidate in candidates if candidate['match_score'] >= DEFAULT_MIN_SCORE],
+        })
+    return render(request, 'recruitment/send_email.html', {'form': form, 'candidates': candidates})
+
+@login_required
+def email_campaign_status(request, campaign_id):
+    campaign = get_object_or_404(EmailCampaign, pk=campaign_id, created_by=request.user)
+    return render(request, 'recruitment/email_campaign.html', {
+        'campaign': campaign,
+        'progress': campaign_progress(campaign),
+        'deliveries': campaign.deliveries.only('email', 'name', 'status', 'attempts', 'error', 'sent_at'),
+    })
+
+@login_required
+def email_campaign_progress_json(request, campaign_id):
+    campaign = get_object_or_404(EmailCampaign, pk=campaign_id, created_by=request.user)
+    return JsonResponse(campaign_progress(campaign))
 
 @login_required
 def download_cv(request, cv_path):
-    file_path = os.path.join(settings.MEDIA_ROOT, cv_path)
-    if os.path.exists(file_path):
-        with open(file_path, 'rb') as fh:
-            response = HttpResponse(fh.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename={os.path.basename(file_path)}'
-            return response
-    logger.error(f"CV file not found: {file_path}")
+    file_path = resolve_cv_path(cv_path)
+    if file_path is not None:
+        return file_response(request, file_path)
+    logger.error(f"CV file not found: {cv_path}")
     messages.error(request, 'CV file not found.')
     return redirect('recruitment:shortlisted_candidates')
+
+@login_required
+def export_shortlist_zip(request, batch_id):
+    batch = get_object_or_404(ScreeningBatch, pk=batch_id, created_by=request.user)
+    form = ShortlistFilterForm(request.GET)
+    if form.is_valid():
+        min_score, sort = form.cleaned_data['min_score'], form.cleaned_data['sort']
+    else:
+        min_score, sort = DEFAULT_MIN_SCORE, SORT_SCORE_DESC
+    logger.info(f"Exporting shortlisted CVs of batch {batch.pk} (score >= {min_score})")
+    response = StreamingHttpResponse(stream_zip(shortlist_rows(batch, min_score=min_score, sort=sort)), content_type='application/zip')
+    response['Content-Disposition'] = content_disposition_header(True, f'shortlist-batch-{batch.pk}.zip')
+    return response
+
+def metrics_endpoint(request):
+    """Export pipeline counters and histograms from every process in Prometheus text format.
+
+    Requires the METRICS_TOKEN bearer token or a logged-in staff user.
+    """
+    token = settings.METRICS_TOKEN
+    authorized = bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not (authorized or request.user.is_staff):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
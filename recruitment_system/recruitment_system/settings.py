@@ -136,6 +136,97 @@ LOGIN_REDIRECT_URL = '/'
 
 # File upload settings
 DATA_UPLOAD_MAX_NUMBER_FILES = 500
+# CV uploads stream to temporary files in FILE_UPLOAD_TEMP_DIR (keep it on the MEDIA_ROOT filesystem so saving is a rename)
+FILE_UPLOAD_TEMP_DIR = config('FILE_UPLOAD_TEMP_DIR', default=None)
+UPLOAD_CHUNK_SIZE = config('UPLOAD_CHUNK_SIZE', default=64 * 1024, cast=int)  # Bytes held in memory per upload request
+UPLOAD_PARSE_WAIT = config('UPLOAD_PARSE_WAIT', default=2.0, cast=float)  # Seconds an accepted upload spends parsing its CVs in total (0 = parse in the worker)
+
+# Background screening worker (python manage.py process_screening_tasks)
+SCREENING_WORKER_POLL_INTERVAL = config('SCREENING_WORKER_POLL_INTERVAL', default=2.0, cast=float)
+SCREENING_CLAIM_SIZE = config('SCREENING_CLAIM_SIZE', default=10, cast=int)
+SCREENING_TASK_TIMEOUT = config('SCREENING_TASK_TIMEOUT', default=600, cast=int)  # Seconds before a running task is considered abandoned
+SCREENING_TASK_MAX_ATTEMPTS = config('SCREENING_TASK_MAX_ATTEMPTS', default=3, cast=int)
+
+# Queued candidate emails (sent by the screening worker or python manage.py send_queued_emails)
+EMAIL_SEND_CHUNK_SIZE = config('EMAIL_SEND_CHUNK_SIZE', default=50, cast=int)  # Messages sent per SMTP connection
+EMAIL_MAX_ATTEMPTS = config('EMAIL_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_RETRY_BACKOFF = config('EMAIL_RETRY_BACKOFF', default=30, cast=int)  # Seconds before the first retry, doubled per attempt
+EMAIL_RETRY_BACKOFF_MAX = config('EMAIL_RETRY_BACKOFF_MAX', default=3600, cast=int)
+EMAIL_SEND_TIMEOUT = config('EMAIL_SEND_TIMEOUT', default=300, cast=int)  # Seconds before a claimed email is considered abandoned
+
+# Live batch progress (Server-Sent Events): how often a stream polls its batch, and how long before the browser reconnects
+PROGRESS_STREAM_POLL_INTERVAL = config('PROGRESS_STREAM_POLL_INTERVAL', default=1.0, cast=float)  # Seconds
+PROGRESS_STREAM_MAX_SECONDS = config('PROGRESS_STREAM_MAX_SECONDS', default=300, cast=int)
+
+# Candidates per shortlist page (keyset pagination)
+SHORTLIST_PAGE_SIZE = config('SHORTLIST_PAGE_SIZE', default=25, cast=int)
+
+# CV downloads: '' streams from Django; 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx) hands the file to the proxy
+CV_DOWNLOAD_OFFLOAD = config('CV_DOWNLOAD_OFFLOAD', default='')
+CV_DOWNLOAD_ACCEL_PREFIX = config('CV_DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')  # nginx internal location mapped to MEDIA_ROOT
+
+# Gemini backend: 'google' calls the real API; 'fake' uses the offline stand-in in recruitment/fake_gemini.py (benchmarks, CI)
+GEMINI_BACKEND = config('GEMINI_BACKEND', default='google')
+FAKE_GEMINI_LATENCY = config('FAKE_GEMINI_LATENCY', default=0.5, cast=float)  # Seconds per request
+FAKE_GEMINI_LATENCY_JITTER = config('FAKE_GEMINI_LATENCY_JITTER', default=0.2, cast=float)  # Extra uniform random seconds
+FAKE_GEMINI_QUOTA_RATE = config('FAKE_GEMINI_QUOTA_RATE', default=0.0, cast=float)  # Share of requests failing with ResourceExhausted
+FAKE_GEMINI_ERROR_RATE = config('FAKE_GEMINI_ERROR_RATE', default=0.0, cast=float)  # Share failing with ServiceUnavailable
+FAKE_GEMINI_MALFORMED_RATE = config('FAKE_GEMINI_MALFORMED_RATE', default=0.0, cast=float)  # Share returning truncated JSON
+FAKE_GEMINI_QUOTA_RPM = config('FAKE_GEMINI_QUOTA_RPM', default=0, cast=int)  # Simulated per-minute quota with retry hints; 0 = none
+FAKE_GEMINI_SEED = config('FAKE_GEMINI_SEED', default=0, cast=int)
+
+# Gemini request concurrency and rate limiting
+GEMINI_MAX_CONCURRENCY = config('GEMINI_MAX_CONCURRENCY', default=5, cast=int)
+GEMINI_REQUESTS_PER_MINUTE = config('GEMINI_REQUESTS_PER_MINUTE', default=15, cast=int)  # Starting and maximum rate; 0 = unpaced until quota runs out
+GEMINI_MODEL_TTL = config('GEMINI_MODEL_TTL', default=3600, cast=int)  # Seconds before the model list is re-fetched
+GEMINI_STRUCTURED_OUTPUT = config('GEMINI_STRUCTURED_OUTPUT', default=True, cast=bool)  # Request JSON via response schema
+CV_EXTRACTION_BATCH_SIZE = config('CV_EXTRACTION_BATCH_SIZE', default=5, cast=int)  # CVs packed into one Gemini request; 1 disables batching
+
+# Adaptive (AIMD) Gemini rate control: slow down on quota errors, creep back up while requests succeed
+GEMINI_MIN_REQUESTS_PER_MINUTE = config('GEMINI_MIN_REQUESTS_PER_MINUTE', default=2.0, cast=float)
+GEMINI_TOKENS_PER_MINUTE = config('GEMINI_TOKENS_PER_MINUTE', default=0, cast=int)  # Token budget per minute; 0 = not enforced
+GEMINI_AIMD_INCREASE = config('GEMINI_AIMD_INCREASE', default=1.0, cast=float)  # Requests/minute added per minute of successes
+GEMINI_AIMD_DECREASE = config('GEMINI_AIMD_DECREASE', default=0.5, cast=float)  # Rate multiplier after a quota error
+GEMINI_AIMD_COOLDOWN = config('GEMINI_AIMD_COOLDOWN', default=10.0, cast=float)  # Seconds between two decreases
+GEMINI_QUOTA_MAX_ATTEMPTS = config('GEMINI_QUOTA_MAX_ATTEMPTS', default=3, cast=int)  # Tries per request before the CV is requeued
+GEMINI_QUOTA_MAX_DEFERRALS = config('GEMINI_QUOTA_MAX_DEFERRALS', default=20, cast=int)  # Requeues before a CV or JD is failed
+GEMINI_RATE_COORDINATION = config('GEMINI_RATE_COORDINATION', default='')  # 'db' shares one rate between all worker processes
+GEMINI_RATE_SYNC_INTERVAL = config('GEMINI_RATE_SYNC_INTERVAL', default=5.0, cast=float)  # Seconds between shared-state syncs
+
+# Prompt text budgeting: CV/JD text is cleaned of repeated headers/footers and packed section by section (about 4 characters per token)
+CV_PROMPT_TOKEN_BUDGET = config('CV_PROMPT_TOKEN_BUDGET', default=900, cast=int)  # Tokens of text per CV in a prompt
+JD_PROMPT_TOKEN_BUDGET = config('JD_PROMPT_TOKEN_BUDGET', default=1000, cast=int)
+PROMPT_SOURCE_MAX_CHARS = config('PROMPT_SOURCE_MAX_CHARS', default=20000, cast=int)  # Characters read from each PDF before packing
+
+# Local-first CV extraction: 'auto' skips Gemini for well-structured CVs, 'off' always calls Gemini, 'only' never does
+LOCAL_EXTRACTION_MODE = config('LOCAL_EXTRACTION_MODE', default='auto')
+LOCAL_EXTRACTION_MIN_CONFIDENCE = config('LOCAL_EXTRACTION_MIN_CONFIDENCE', default=0.85, cast=float)  # 0-1; share of fields found
+
+# Duplicate CVs: a hash of the normalized CV text, matched against stored candidates and the rest of the batch
+NEAR_DUPLICATE_DETECTION_ENABLED = config('NEAR_DUPLICATE_DETECTION_ENABLED', default=True, cast=bool)
+
+# PDF text extraction limits (per file) and process pool size (0 = one process per CPU)
+PDF_MAX_PAGES = config('PDF_MAX_PAGES', default=50, cast=int)
+PDF_MAX_BYTES = config('PDF_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+PDF_PARSE_TIMEOUT = config('PDF_PARSE_TIMEOUT', default=30, cast=int)  # Seconds
+PDF_PARSE_WORKERS = config('PDF_PARSE_WORKERS', default=0, cast=int)
+
+# Content-addressed cache of CV/JD extraction results (keyed by PDF SHA-256, prompt version and model)
+EXTRACTION_CACHE_ENABLED = config('EXTRACTION_CACHE_ENABLED', default=True, cast=bool)
+EXTRACTION_CACHE_MAX_BYTES = config('EXTRACTION_CACHE_MAX_BYTES', default=50 * 1024 * 1024, cast=int)
+
+# Optional semantic scoring: candidate embeddings stored in a local memory-mapped index and blended into match scores
+SEMANTIC_SCORING_ENABLED = config('SEMANTIC_SCORING_ENABLED', default=False, cast=bool)
+SEMANTIC_SCORE_WEIGHT = config('SEMANTIC_SCORE_WEIGHT', default=0.3, cast=float)  # Share of the final score from semantic similarity
+SEMANTIC_EMBEDDER = config('SEMANTIC_EMBEDDER', default='recruitment.embeddings.HashedTfidfEmbedder')
+SEMANTIC_EMBEDDING_DIM = config('SEMANTIC_EMBEDDING_DIM', default=512, cast=int)
+SEMANTIC_INDEX_DIR = config('SEMANTIC_INDEX_DIR', default=str(BASE_DIR / 'semantic_index'))
+
+# Metrics: workers write snapshots to METRICS_DIR and GET /metrics exports every process in Prometheus text format
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'metrics'))
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=10.0, cast=float)  # Seconds between worker snapshots
+METRICS_SNAPSHOT_TTL = config('METRICS_SNAPSHOT_TTL', default=600.0, cast=float)  # Seconds after which an unrefreshed snapshot is deleted
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # /metrics accepts "Authorization: Bearer <token>" or a staff session
 
 # Logging configuration
 LOGGING = {